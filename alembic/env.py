@@ -0,0 +1,67 @@
+from logging.config import fileConfig
+
+from sqlalchemy import create_engine, pool
+
+from alembic import context
+from app.db.base import Base
+
+# Every model module, so autogenerate sees the whole schema
+from app.models import (  # noqa: F401
+    about_company,
+    company,
+    company_pages,
+    interview_question,
+    interview_tips,
+    prep_job,
+    prep_result_cache,
+    project,
+    tos_verdict,
+    user,
+    user_auth,
+)
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def _url_override():
+    # `alembic -x dburl=postgresql://...` (used by the benchmarks) or sqlalchemy.url in alembic.ini
+    return context.get_x_argument(as_dictionary=True).get("dburl") or config.get_main_option("sqlalchemy.url")
+
+
+def run_migrations_offline() -> None:
+    url = _url_override()
+    if not url:
+        from app.core.config import settings
+        url = settings.database_url
+    context.configure(
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    url = _url_override()
+    if url:
+        connectable = create_engine(url, poolclass=pool.NullPool)
+    else:
+        # Same engine (and SSL settings) as the app
+        from app.db.sessions import engine as connectable
+
+    with connectable.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
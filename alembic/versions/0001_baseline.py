@@ -0,0 +1,120 @@
+"""baseline: schema as created by Base.metadata.create_all before migrations
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18
+
+Existing databases already have these tables: `alembic stamp 0001_baseline`, then upgrade.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0001_baseline"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user",
+        sa.Column("user_id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("user_type", sa.String(), nullable=True),
+        sa.Column("img_url", sa.String(), nullable=True),
+        sa.Column("disabled", sa.Boolean(), server_default=sa.text("false"), nullable=True),
+        sa.Column("credits", sa.Integer(), server_default=sa.text("0"), nullable=True),
+    )
+    op.create_index("ix_user_user_id", "user", ["user_id"])
+    op.create_index("ix_user_email", "user", ["email"], unique=True)
+
+    op.create_table(
+        "user_auth",
+        sa.Column("auth_id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("email_id", sa.String(), nullable=True),
+        sa.Column("auth_method", sa.String(), nullable=False),
+        sa.Column("provider_user_id", sa.String(), nullable=True),
+        sa.Column("refresh_token", sa.String(), nullable=True),
+        sa.Column("google_access_token", sa.String(), nullable=True),
+        sa.Column("google_refresh_token", sa.String(), nullable=True),
+        sa.Column("google_token_expiry", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.String(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_user_auth_auth_id", "user_auth", ["auth_id"])
+
+    op.create_table(
+        "company",
+        sa.Column("company_id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("url", sa.String(), nullable=False),
+        sa.Column("image", sa.String(), nullable=False),
+    )
+    op.create_index("ix_company_company_id", "company", ["company_id"])
+
+    op.create_table(
+        "company_pages",
+        sa.Column("page_id", sa.Integer(), primary_key=True),
+        sa.Column("company_id", sa.Integer(), nullable=False),
+        sa.Column("page_title", sa.String(), nullable=False),
+        sa.Column("page_url", sa.String(), nullable=False),
+        sa.Column("page_content", sa.String(), nullable=False),
+        sa.Column("scraped_at", sa.String(), nullable=False),
+    )
+    op.create_index("ix_company_pages_page_id", "company_pages", ["page_id"])
+
+    op.create_table(
+        "project",
+        sa.Column("project_id", sa.Integer(), primary_key=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("company_id", sa.Integer(), nullable=False),
+        sa.Column("position", sa.String(), nullable=False),
+        sa.Column("company_name", sa.String(), nullable=False),
+        sa.Column("company_logo", sa.String(), nullable=False),
+        sa.Column("created_at", sa.String(), nullable=False),
+    )
+    op.create_index("ix_project_project_id", "project", ["project_id"])
+
+    op.create_table(
+        "interview_question",
+        sa.Column("question_id", sa.Integer(), primary_key=True),
+        sa.Column("project_id", sa.Integer(), nullable=False),
+        sa.Column("question_type", sa.String(), nullable=False),
+        sa.Column("question", sa.String(), nullable=False),
+        sa.Column("answer", sa.String(), nullable=False),
+    )
+    op.create_index("ix_interview_question_question_id", "interview_question", ["question_id"])
+
+    op.create_table(
+        "interview_tips",
+        sa.Column("tip_id", sa.Integer(), primary_key=True),
+        sa.Column("project_id", sa.Integer(), nullable=False),
+        sa.Column("tip", sa.String(), nullable=False),
+    )
+    op.create_index("ix_interview_tips_tip_id", "interview_tips", ["tip_id"])
+
+    op.create_table(
+        "about_company",
+        sa.Column("about_company_id", sa.Integer(), primary_key=True),
+        sa.Column("project_id", sa.Integer(), nullable=False),
+        sa.Column("vision", sa.String(), nullable=False),
+        sa.Column("vision_url", sa.String(), nullable=False),
+        sa.Column("mission", sa.String(), nullable=False),
+        sa.Column("mission_url", sa.String(), nullable=False),
+        sa.Column("additional", sa.String(), nullable=False),
+        sa.Column("additional_url", sa.String(), nullable=False),
+    )
+    op.create_index("ix_about_company_about_company_id", "about_company", ["about_company_id"])
+
+
+def downgrade() -> None:
+    for table in (
+        "about_company", "interview_tips", "interview_question", "project",
+        "company_pages", "company", "user_auth", "user",
+    ):
+        op.drop_table(table)
@@ -0,0 +1,87 @@
+"""pipeline tables: page validators, ToS verdicts, prep result cache, prep jobs
+
+Revision ID: 0002_pipeline_tables
+Revises: 0001_baseline
+Create Date: 2026-10-18
+
+Until now create_all created new tables on startup but never added columns, so on an
+existing database some of this may already be there; every step checks first.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0002_pipeline_tables"
+down_revision: Union[str, None] = "0001_baseline"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PAGE_COLUMNS = ("etag", "last_modified", "content_hash", "checked_at")
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+
+    existing_columns = {c["name"] for c in inspector.get_columns("company_pages")}
+    for name in PAGE_COLUMNS:
+        if name not in existing_columns:
+            op.add_column("company_pages", sa.Column(name, sa.String(), nullable=True))
+
+    if "tos_verdict" not in tables:
+        op.create_table(
+            "tos_verdict",
+            sa.Column("verdict_id", sa.Integer(), primary_key=True),
+            sa.Column("host", sa.String(), nullable=False),
+            sa.Column("policy_hash", sa.String(), nullable=False),
+            sa.Column("allowed", sa.Boolean(), nullable=False),
+            sa.Column("checked_at", sa.String(), nullable=False),
+            sa.UniqueConstraint("host", "policy_hash", name="uq_tos_verdict_host_policy_hash"),
+        )
+        op.create_index("ix_tos_verdict_verdict_id", "tos_verdict", ["verdict_id"])
+        op.create_index("ix_tos_verdict_host", "tos_verdict", ["host"])
+
+    if "prep_result_cache" not in tables:
+        op.create_table(
+            "prep_result_cache",
+            sa.Column("cache_id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("company_id", sa.Integer(), nullable=False),
+            sa.Column("input_hash", sa.String(), nullable=False),
+            sa.Column("project_id", sa.Integer(), nullable=False),
+            sa.Column("result_json", sa.Text(), nullable=False),
+            sa.Column("created_at", sa.String(), nullable=False),
+            sa.UniqueConstraint("user_id", "input_hash", name="uq_prep_result_cache_user_input"),
+        )
+        op.create_index("ix_prep_result_cache_cache_id", "prep_result_cache", ["cache_id"])
+        op.create_index("ix_prep_result_cache_company_id", "prep_result_cache", ["company_id"])
+
+    if "prep_job" not in tables:
+        op.create_table(
+            "prep_job",
+            sa.Column("job_id", sa.String(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), nullable=False),
+            sa.Column("status", sa.String(), nullable=False),
+            sa.Column("payload", sa.Text(), nullable=True),
+            sa.Column("attempts", sa.Integer(), nullable=False),
+            sa.Column("available_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("locked_by", sa.String(), nullable=True),
+            sa.Column("prep_id", sa.Integer(), nullable=True),
+            sa.Column("error", sa.String(), nullable=True),
+            sa.Column("error_status", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        )
+        op.create_index("ix_prep_job_user_id", "prep_job", ["user_id"])
+        op.create_index("ix_prep_job_status", "prep_job", ["status"])
+        op.create_index("ix_prep_job_available_at", "prep_job", ["available_at"])
+
+
+def downgrade() -> None:
+    op.drop_table("prep_job")
+    op.drop_table("prep_result_cache")
+    op.drop_table("tos_verdict")
+    for name in reversed(PAGE_COLUMNS):
+        op.drop_column("company_pages", name)
@@ -0,0 +1,103 @@
+"""hot path indexes, foreign keys and unique company URL
+
+Revision ID: 0003_hot_path_indexes
+Revises: 0002_pipeline_tables
+Create Date: 2026-10-18
+
+Every lookup the API does (company by URL, pages by company, projects by user, questions /
+tips / about_company by project, user_auth by user + method) was a sequential scan.
+
+The unique URL and the foreign keys need clean data: duplicate company rows (same URL, from
+concurrent first-time preps) and rows whose parent no longer exists. This migration doesn't
+delete or merge anything itself. It counts them and stops if there are any;
+app/db/data_cleanup.py reports, archives and removes them as a separate, explicit step.
+Indexes are built CONCURRENTLY and foreign keys are added NOT VALID then validated, so
+project / question tables stay writable while this runs.
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision: str = "0003_hot_path_indexes"
+down_revision: Union[str, None] = "0002_pipeline_tables"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# name, table, columns
+INDEXES = [
+    ("ix_company_pages_company_id_page_url", "company_pages", ["company_id", "page_url"]),
+    ("ix_project_user_id", "project", ["user_id"]),
+    ("ix_interview_question_project_id", "interview_question", ["project_id"]),
+    ("ix_interview_tips_project_id", "interview_tips", ["project_id"]),
+    ("ix_about_company_project_id", "about_company", ["project_id"]),
+    ("ix_user_auth_user_id_auth_method", "user_auth", ["user_id", "auth_method"]),
+]
+
+# name, table, column, referred table, referred column, ON DELETE
+FOREIGN_KEYS = [
+    ("fk_company_pages_company_id_company", "company_pages", "company_id", "company", "company_id", "CASCADE"),
+    ("fk_project_user_id_user", "project", "user_id", "user", "user_id", "CASCADE"),
+    ("fk_project_company_id_company", "project", "company_id", "company", "company_id", None),
+    ("fk_interview_question_project_id_project", "interview_question", "project_id", "project", "project_id", "CASCADE"),
+    ("fk_interview_tips_project_id_project", "interview_tips", "project_id", "project", "project_id", "CASCADE"),
+    ("fk_about_company_project_id_project", "about_company", "project_id", "project", "project_id", "CASCADE"),
+    ("fk_user_auth_user_id_user", "user_auth", "user_id", "user", "user_id", "CASCADE"),
+    ("fk_prep_result_cache_project_id_project", "prep_result_cache", "project_id", "project", "project_id", "CASCADE"),
+]
+
+
+def _check_data() -> None:
+    """Stop before touching the schema if the new constraints would reject existing rows."""
+    if context.is_offline_mode():
+        return
+    bind = op.get_bind()
+    problems = []
+    duplicates = bind.execute(sa.text("SELECT count(*) - count(DISTINCT url) FROM company")).scalar()
+    if duplicates:
+        problems.append(f"{duplicates} duplicate company rows (same url)")
+    for name, table, column, ref_table, ref_column, _ in FOREIGN_KEYS:
+        orphans = bind.execute(sa.text(
+            f'SELECT count(*) FROM {table} t WHERE t.{column} IS NOT NULL '
+            f'AND NOT EXISTS (SELECT 1 FROM "{ref_table}" r WHERE r.{ref_column} = t.{column})'
+        )).scalar()
+        if orphans:
+            problems.append(f"{orphans} {table} rows without their {ref_table} ({name})")
+    if problems:
+        raise RuntimeError(
+            "0003 can't add its constraints: " + "; ".join(problems) + ". Review "
+            "`python -m app.db.data_cleanup` (report only), run it with --apply, then upgrade again."
+        )
+
+
+def upgrade() -> None:
+    _check_data()
+
+    inspector = sa.inspect(op.get_bind())
+    has_unique_url = any(uc["column_names"] == ["url"] for uc in inspector.get_unique_constraints("company"))
+    if not has_unique_url:
+        op.create_unique_constraint("uq_company_url", "company", ["url"])
+
+    for name, table, column, ref_table, ref_column, ondelete in FOREIGN_KEYS:
+        on_delete = f" ON DELETE {ondelete}" if ondelete else ""
+        op.execute(
+            f'ALTER TABLE {table} ADD CONSTRAINT {name} FOREIGN KEY ({column}) '
+            f'REFERENCES "{ref_table}" ({ref_column}){on_delete} NOT VALID'
+        )
+
+    # CONCURRENTLY can't run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        for name, table, *_ in FOREIGN_KEYS:
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}")
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    for name, table, *_ in reversed(FOREIGN_KEYS):
+        op.drop_constraint(name, table, type_="foreignkey")
+    op.drop_constraint("uq_company_url", "company", type_="unique")
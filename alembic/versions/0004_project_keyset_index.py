@@ -0,0 +1,39 @@
+"""composite index for keyset pagination of a user's projects
+
+Revision ID: 0004_project_keyset_index
+Revises: 0003_hot_path_indexes
+Create Date: 2026-10-18
+
+GET /prep/ pages through a user's projects newest first on (created_at, project_id).
+(user_id, created_at, project_id) answers that with an index range scan read backwards,
+and the per-user count with an index-only scan. It also covers everything
+ix_project_user_id did, so that index is dropped once the new one exists.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "0004_project_keyset_index"
+down_revision: Union[str, None] = "0003_hot_path_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY can't run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_project_user_id_created_at_project_id", "project", ["user_id", "created_at", "project_id"],
+            postgresql_concurrently=True, if_not_exists=True,
+        )
+        op.drop_index("ix_project_user_id", table_name="project", postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index("ix_project_user_id", "project", ["user_id"], postgresql_concurrently=True, if_not_exists=True)
+        op.drop_index(
+            "ix_project_user_id_created_at_project_id", table_name="project",
+            postgresql_concurrently=True, if_exists=True,
+        )
@@ -0,0 +1,32 @@
+"""prep_job.credit_reserved
+
+Revision ID: 0005_prep_job_credit
+Revises: 0004_project_keyset_index
+Create Date: 2026-10-18
+
+A queued prep's credit is reserved once per job and recorded on the job row, so a
+re-delivered attempt reuses it instead of reserving another, and a job that fails for
+good gives it back.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0005_prep_job_credit"
+down_revision: Union[str, None] = "0004_project_keyset_index"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Constant default: no table rewrite on Postgres 11+
+    op.add_column(
+        "prep_job",
+        sa.Column("credit_reserved", sa.Boolean(), nullable=False, server_default=sa.text("false")),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("prep_job", "credit_reserved")
@@ -0,0 +1,29 @@
+"""company_pages.scrape_mode
+
+Revision ID: 0006_company_pages_scrape_mode
+Revises: 0005_prep_job_credit
+Create Date: 2026-10-18
+
+How each page was first fetched: "static" (httpx) or "playwright". The company refresh
+re-validates pages with plain HTTP requests, which only reproduces "static" pages; a
+Playwright-rendered page re-fetched that way loses whatever its scripts rendered. Pages
+stored before this column are NULL (unknown) and are left alone by the refresh.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = "0006_company_pages_scrape_mode"
+down_revision: Union[str, None] = "0005_prep_job_credit"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("company_pages", sa.Column("scrape_mode", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("company_pages", "scrape_mode")
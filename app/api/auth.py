@@ -1,14 +1,15 @@
 import os
 from datetime import timedelta
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 from typing import Annotated
 from fastapi import Depends, Request, APIRouter, HTTPException
 from authlib.integrations.starlette_client import OAuth
 from app.core.config import settings
 from app.core.ratelimit import limiter
-from app.db.helper import get_db
+from app.db.helper import get_async_db
 from app.models.user import User
 from app.models.user_auth import UserAuth
 from app.schema.auth_schema import TokenResponse, RefreshTokenRequest
@@ -37,7 +38,7 @@ async def auth_google(request:Request):
 
 @router.get('/google/callback')
 @limiter.limit("5/minute")
-async def google_callback(request:Request,db:Session=Depends(get_db)):
+async def google_callback(request:Request,db:AsyncSession=Depends(get_async_db)):
     # Handle Google OAuth callback
     try:
         token=await oauth.google.authorize_access_token(request)
@@ -46,7 +47,7 @@ async def google_callback(request:Request,db:Session=Depends(get_db)):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Failed to get user info")
 
         # Get or create user in database with Google tokens
-        user = AuthService.get_or_create_user(
+        user = await AuthService.get_or_create_user(
             db,
             user_info,
             google_refresh_token = token.get("refresh_token") or token.get("refresh"),
@@ -62,7 +63,7 @@ async def google_callback(request:Request,db:Session=Depends(get_db)):
 
         # Store refresh token in db
 
-        AuthService.update_user_refresh_token(db,user.user_id,refresh_token)
+        await AuthService.update_user_refresh_token(db,user.user_id,refresh_token)
         # Redirect to frontend with tokens
         redirect_url = (
             f"{settings.FRONTEND_URL}/auth/callback"
@@ -82,7 +83,7 @@ async def google_callback(request:Request,db:Session=Depends(get_db)):
 async def refresh_access_tokens(
         request:Request,
         refresh_request:RefreshTokenRequest,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_async_db),
 ):
     """
     Refresh the access token using the refresh token.
@@ -97,7 +98,7 @@ async def refresh_access_tokens(
     user_id = int(payload.get("sub"))
 
     # Verify user exists and is not disabled
-    user = db.query(User).filter(User.user_id==user_id).first()
+    user = await db.get(User,user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="User not found")
     if user.disabled:
@@ -113,7 +114,7 @@ async def refresh_access_tokens(
     new_refresh_token=AuthService.create_refresh_token(data={"sub": str(user.user_id), "email": user.email})
 
     # Update refresh token in database
-    AuthService.update_user_refresh_token(db,user.user_id,new_refresh_token)
+    await AuthService.update_user_refresh_token(db,user.user_id,new_refresh_token)
 
     return TokenResponse(
         access_token=new_access_token,
@@ -123,16 +124,16 @@ async def refresh_access_tokens(
 
 @router.post("/logout")
 @limiter.limit("5/minute")
-async def logout(request:Request,refresh_request:RefreshTokenRequest,db:Session=Depends(get_db)):
+async def logout(request:Request,refresh_request:RefreshTokenRequest,db:AsyncSession=Depends(get_async_db)):
     """Logout endpoint - invalidates refresh token"""
     payload = AuthService.verify_token(refresh_request.refresh_token,token_type="refresh")
     if payload:
         user_id=int(payload.get("sub"))
-        user_auth=db.query(UserAuth).filter(UserAuth.user_id==user_id,
-                                            UserAuth.auth_method=="google"
-                                            ).first()
+        user_auth=await db.scalar(select(UserAuth).where(UserAuth.user_id==user_id,
+                                                         UserAuth.auth_method=="google"
+                                                         ))
         if user_auth:
             user_auth.refresh_token=None
-            db.commit()
+            await db.commit()
     return {"message": "Logged out successfully"}
 
@@ -0,0 +1,20 @@
+import secrets
+
+from fastapi import APIRouter, Header, HTTPException, status
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from app.core.config import settings
+import app.core.metrics  # noqa: F401  registers the pipeline metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics(authorization: str = Header(None)):
+    # Optional bearer token so the endpoint isn't public when METRICS_TOKEN is set
+    if settings.METRICS_TOKEN:
+        expected = f"Bearer {settings.METRICS_TOKEN}"
+        if not authorization or not secrets.compare_digest(authorization, expected):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorised Access")
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
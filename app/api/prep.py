@@ -1,26 +1,33 @@
-from fastapi import APIRouter, Request, UploadFile, File, Form, HTTPException,status
+import asyncio
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Request, UploadFile, File, Form, HTTPException, Query, status
 from fastapi.params import Depends
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import HttpUrl
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.core.deps import get_access_token
 from app.core.ratelimit import limiter
-from app.db.helper import get_db
-from app.models.about_company import AboutCompany
-from app.models.interview_question import InterviewQuestions
-from app.models.interview_tips import InterviewTips
-from app.models.project import Project
+from app.db.credit_db import CreditDB
+from app.db.helper import get_async_db
+from app.db.prep_db import InvalidDataException
+from app.db.project_db import DETAIL_CACHE_CONTROL, ProjectDB, decode_cursor, detail_etag, project_detail_cache
+from app.db.sessions import SessionLocal
 from app.models.user import User
 from app.services.auth_services import AuthService
 from app.services.interview_prep_service import InterviewPrep
+from app.services.job_queue import get_job_queue
+from app.utils.cancellation import cancel_on_disconnect
+from app.utils.etag import etag_matches
 from app.utils.pdf_text_extractor import extract_text_from_pdf
 from app.utils.url import valid_base_url
 router = APIRouter(prefix="/prep",tags=["interview-prep"])
 
-@router.post("/")
-@limiter.limit("5/minute")
-async def interview_prep(request:Request,resume:UploadFile=File(...), url:HttpUrl=Form(...), job_desc:str=Form(...),token:str=Depends(get_access_token),db:Session=Depends(get_db)):
+
+async def _read_resume(resume:UploadFile)->str:
     if resume.content_type!="application/pdf":
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Only pdf files are allowed")
     size=0
@@ -30,41 +37,163 @@ async def interview_prep(request:Request,resume:UploadFile=File(...), url:HttpUr
         chunk = await resume.read(1024*1024)
         if not chunk:
             break
-        size=+len(chunk)
+        size+=len(chunk)
         if size>settings.MAX_FILE_SIZE:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,detail="File size is too large(Max 7MB)")
         chunks.append(chunk)
     pdf_byte=b"".join(chunks)
-    resume_parsed = extract_text_from_pdf(pdf_byte)
+    return extract_text_from_pdf(pdf_byte)
+
+
+# Streaming preps bypass the worker queue (its capacity limits don't apply), so they get their own
+_stream_slots = asyncio.Semaphore(settings.PREP_STREAM_MAX_CONCURRENCY)
+STREAM_BUSY_DETAIL = "Too many streaming preps in progress, use POST /prep/ or try again later"
+
+
+def _sse(event:str,data)->str:
+    return f"event: {event}\ndata: {json.dumps(data,ensure_ascii=False,default=str)}\n\n"
+
+
+@router.post("/")
+@limiter.limit("5/minute")
+async def interview_prep(request:Request,resume:UploadFile=File(...), url:HttpUrl=Form(...), job_desc:str=Form(...),token:str=Depends(get_access_token),db:AsyncSession=Depends(get_async_db)):
+    resume_parsed = await _read_resume(resume)
     base_url = valid_base_url(url)
-    result =await InterviewPrep.create_prep(resume_parsed,base_url,job_desc,token,db)
+    if settings.PREP_QUEUE_ENABLED:
+        # The pipeline runs in app.workers.prep_worker; poll GET /prep/jobs/{job_id}
+        payload = InterviewPrep.verify_access(token)
+        # The worker reserves the credit; this only avoids queueing a job that would fail with 402
+        if not await CreditDB.has_credit(payload.get("sub"),db):
+            raise HTTPException(status_code=status.HTTP_402_PAYMENT_REQUIRED,detail="You have run out of credits")
+        # The queue is shared with the (sync) worker; keep its DB round trip off the event loop
+        job_id = await asyncio.to_thread(get_job_queue().enqueue,int(payload.get("sub")),{
+            "resume":resume_parsed,
+            "url":base_url,
+            "job_desc":job_desc,
+        })
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED,content={"job_id":job_id,"status":"queued"})
+    # Inline fallback: the prep pipeline runs on the sync session, as it does in the worker;
+    # it does its DB round trips in threads, so they don't block the event loop
+    sync_db = SessionLocal()
+    try:
+        # Stop scraping / Gemini work if the client goes away mid-prep
+        result =await cancel_on_disconnect(request,InterviewPrep.create_prep(resume_parsed,base_url,job_desc,token,sync_db))
+    finally:
+        await asyncio.to_thread(sync_db.close)
     return result
 
+
+@router.post("/stream")
+@limiter.limit("5/minute")
+async def interview_prep_stream(request:Request,resume:UploadFile=File(...), url:HttpUrl=Form(...), job_desc:str=Form(...),token:str=Depends(get_access_token)):
+    """
+    Same as POST /prep/ but answers with text/event-stream:
+    stage -> {stage, status[, elapsed_sec]}, section -> {name, data}, done -> {prep_id, result},
+    error -> {status_code, detail}. Failures after the stream started arrive as an error event.
+
+    Unlike POST /prep/, this always runs the pipeline in the API process, also with the queue
+    on; at most PREP_STREAM_MAX_CONCURRENCY at once, beyond that it answers 503.
+    """
+    if not AuthService.verify_token(token,"access"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,detail="Unauthorised Access")
+    if _stream_slots.locked():
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,detail=STREAM_BUSY_DETAIL)
+    resume_parsed = await _read_resume(resume)
+    base_url = valid_base_url(url)
+
+    async def events():
+        # The slot is taken here, where it is also released: the body might never be iterated.
+        # Requests that got past the check above while the last slot went get an error event
+        if _stream_slots.locked():
+            yield _sse("error",{"status_code":status.HTTP_503_SERVICE_UNAVAILABLE,"detail":STREAM_BUSY_DETAIL})
+            return
+        async with _stream_slots:
+            # Own session: yield-dependencies are torn down before a streaming body is sent.
+            # The pipeline runs its DB round trips on it in threads, off the event loop
+            db = SessionLocal()
+            try:
+                async for event, data in InterviewPrep.create_prep_stream(resume_parsed,base_url,job_desc,token,db):
+                    yield _sse(event,data)
+            except HTTPException as e:
+                yield _sse("error",{"status_code":e.status_code,"detail":e.detail})
+            except InvalidDataException:
+                yield _sse("error",{"status_code":status.HTTP_502_BAD_GATEWAY,"detail":"AI service returned an invalid prep, please try again"})
+            except Exception as e:
+                print(f"[ERROR] Streaming prep failed for {base_url}: {e}")
+                yield _sse("error",{"status_code":status.HTTP_500_INTERNAL_SERVER_ERROR,"detail":"Internal server error"})
+            finally:
+                await asyncio.to_thread(db.close)
+
+    # Starlette cancels events() when the client disconnects, which cancels the scrape / Gemini work
+    return StreamingResponse(events(),media_type="text/event-stream",headers={
+        "Cache-Control":"no-cache",
+        "X-Accel-Buffering":"no",
+    })
+
+@router.get("/jobs/{job_id}")
+@limiter.limit("60/minute")
+async def get_prep_job(request:Request,job_id:str,token:str=Depends(get_access_token)):
+    payload = InterviewPrep.verify_access(token)
+    job = await asyncio.to_thread(get_job_queue().get,job_id)
+    if job is None or str(job.pop("user_id"))!=str(payload.get("sub")):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="Job not found")
+    return job
+
+
 @router.get("/")
 @limiter.limit("30/minute")
-def all_prep(request:Request,token:str=Depends(get_access_token),db:Session=Depends(get_db)):
+async def all_prep(request:Request,
+                  limit:int=Query(settings.PREP_LIST_PAGE_SIZE,ge=1,le=settings.PREP_LIST_MAX_PAGE_SIZE),
+                  cursor:Optional[str]=None,
+                  token:str=Depends(get_access_token),db:AsyncSession=Depends(get_async_db)):
+    """
+    The caller's projects, newest first, `limit` per page. The body is the list of projects;
+    when there are more, X-Next-Cursor holds the value to pass as ?cursor= for the next page.
+    """
     payload = AuthService.verify_token(token, "access")
     if not payload:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorised Access")
-    projects = db.query(Project).filter(Project.user_id==payload.get("sub")).all()
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Invalid cursor")
+    projects, next_cursor = await ProjectDB.list_page(int(payload.get("sub")),after,limit,db)
+    headers = {"X-Next-Cursor":next_cursor} if next_cursor else None
+    return JSONResponse(content=projects,headers=headers)
 
-    return projects
+
+@router.get("/count")
+@limiter.limit("30/minute")
+async def count_prep(request:Request,token:str=Depends(get_access_token),db:AsyncSession=Depends(get_async_db)):
+    payload = AuthService.verify_token(token, "access")
+    if not payload:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorised Access")
+    return {"total":await ProjectDB.count(int(payload.get("sub")),db)}
 
 
 @router.get("/{prep_id}")
 @limiter.limit("60/minute")
-def get_prep(request:Request,prep_id:int,token:str=Depends(get_access_token),db:Session=Depends(get_db)):
+async def get_prep(request:Request,prep_id:int,token:str=Depends(get_access_token),db:AsyncSession=Depends(get_async_db)):
+    """
+    {project, interview_question, interview_tips, about_company} for one of the caller's projects.
+    Projects are immutable: the body is cached per process, and a cached entry is proof of
+    ownership, so only then can a matching If-None-Match skip the DB. Otherwise the project
+    is read (and a missing or foreign one is a 404) before the ETag is compared.
+    """
     payload = AuthService.verify_token(token, "access")
     if not payload:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Unauthorised Access")
-    project = db.query(Project).filter(Project.project_id==prep_id).first()
-    interview_question=db.query(InterviewQuestions).filter(InterviewQuestions.project_id==prep_id).all()
-    tips=db.query(InterviewTips).filter(InterviewTips.project_id==prep_id).all()
-    about_company=db.query(AboutCompany).filter(AboutCompany.project_id==prep_id).all()
-
-    return {
-            "interview_question":interview_question,
-            "interview_tips":tips,
-            "about_company":about_company
-            }
+    user_id = int(payload.get("sub"))
+    headers = {"ETag":detail_etag(user_id,prep_id),"Cache-Control":DETAIL_CACHE_CONTROL}
 
+    body = project_detail_cache.get(user_id,prep_id)
+    if body is None:
+        # One statement; also the ownership check (someone else's project is a 404, like a missing one)
+        document = await ProjectDB.detail_json(user_id,prep_id,db)
+        if document is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="Prep not found")
+        body = document.encode("utf-8")
+        project_detail_cache.put(user_id,prep_id,body)
+    if etag_matches(request.headers.get("if-none-match"),headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED,headers=headers)
+    return Response(content=body,media_type="application/json",headers=headers)
@@ -1,13 +1,16 @@
 from fastapi import APIRouter, status, Request, HTTPException
 from fastapi.params import Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.deps import get_access_token
 from app.core.ratelimit import limiter
-from app.db.helper import get_db
+from app.db.helper import get_async_db
+from app.db.project_db import project_detail_cache
 from app.models.about_company import AboutCompany
 from app.models.interview_question import InterviewQuestions
 from app.models.interview_tips import InterviewTips
+from app.models.prep_job import PrepJob
 from app.models.project import Project
 from app.models.user import User
 from app.core.security import get_current_user
@@ -18,7 +21,7 @@ router = APIRouter(prefix='/user', tags=['user'])
 
 @router.get("/",status_code=status.HTTP_200_OK)
 @limiter.limit("10/minute")
-async def user(request:Request,db:Session=Depends(get_db)):
+async def user(request:Request,db:AsyncSession=Depends(get_async_db)):
     """Get current user information"""
     auth_header=request.headers.get("Authorization")
     if not auth_header or not auth_header.startswith("Bearer "):
@@ -28,7 +31,7 @@ async def user(request:Request,db:Session=Depends(get_db)):
     if not payload:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,detail="Invalid or Expired token.Please Refresh")
     user_id=int(payload.get("sub"))
-    user=db.query(User).filter(User.user_id==user_id).first()
+    user=await db.get(User,user_id)
 
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="User not found")
@@ -47,52 +50,53 @@ async def user(request:Request,db:Session=Depends(get_db)):
 @limiter.limit("5/minute")
 async def delete_user(request:Request, user_id: int,
             token: str = Depends(get_access_token),
-            db: Session = Depends(get_db)):
+            db: AsyncSession = Depends(get_async_db)):
     payload = AuthService.verify_token(token, "access")
     if not payload:
         raise HTTPException(status_code=401, detail="Unauthorised Access")
 
-    requester_id = payload.get("sub")
+    # "sub" is a string claim; the path parameter is an int
+    requester_id = int(payload.get("sub"))
     if requester_id != user_id:
         raise HTTPException(status_code=403, detail="Forbidden")
 
-    user = db.query(User).filter(User.user_id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     try:
-        project_ids = [
-            pid for (pid,) in db.query(Project.project_id)
-            .filter(Project.user_id == user_id)
-            .all()
-        ]
-
-        if project_ids:
-            db.query(InterviewQuestions).filter(
-                InterviewQuestions.project_id.in_(project_ids)
-            ).delete(synchronize_session=False)
-
-            db.query(InterviewTips).filter(
-                InterviewTips.project_id.in_(project_ids)
-            ).delete(synchronize_session=False)
-
-            db.query(AboutCompany).filter(
-                AboutCompany.project_id.in_(project_ids)
-            ).delete(synchronize_session=False)
-
-            db.query(Project).filter(Project.project_id.in_(project_ids)).delete(
-                synchronize_session=False
-            )
+        # Queued jobs must not run for a deleted user; a running one loses its lease with the row,
+        # so its worker stops and its outcome is ignored
+        await db.execute(delete(PrepJob).where(PrepJob.user_id == user_id).execution_options(synchronize_session=False))
+
+        project_ids = select(Project.project_id).where(Project.user_id == user_id)
+
+        await db.execute(
+            delete(InterviewQuestions).where(InterviewQuestions.project_id.in_(project_ids))
+            .execution_options(synchronize_session=False)
+        )
+        await db.execute(
+            delete(InterviewTips).where(InterviewTips.project_id.in_(project_ids))
+            .execution_options(synchronize_session=False)
+        )
+        await db.execute(
+            delete(AboutCompany).where(AboutCompany.project_id.in_(project_ids))
+            .execution_options(synchronize_session=False)
+        )
+        await db.execute(
+            delete(Project).where(Project.user_id == user_id).execution_options(synchronize_session=False)
+        )
         # 4) Delete auth row(s)
-        db.query(UserAuth).filter(UserAuth.user_id == user_id).delete(synchronize_session=False)
+        await db.execute(delete(UserAuth).where(UserAuth.user_id == user_id).execution_options(synchronize_session=False))
 
-        db.query(User).filter(User.user_id == user_id).delete(synchronize_session=False)
+        await db.execute(delete(User).where(User.user_id == user_id).execution_options(synchronize_session=False))
 
-        db.commit()
+        await db.commit()
+        project_detail_cache.drop_user(user_id)
         return None  # 204 No Content
 
     except Exception:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Failed to delete user")
 
 
@@ -0,0 +1,152 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+from playwright.async_api import Browser, BrowserContext, Playwright, async_playwright
+
+from app.core.config import settings
+
+
+class BrowserPool:
+    """
+    Process-wide Chromium pool shared by the scraper and the ToS extractor.
+
+    - One browser is launched per process and handed out as isolated BrowserContexts
+    - At most `max_contexts` contexts are open at once, the rest wait their turn
+    - The browser is recycled after `recycle_after_pages` pages or when it crashes;
+      contexts still open on the old browser finish before it is closed
+    """
+
+    def __init__(self, max_contexts: int, recycle_after_pages: int):
+        self.max_contexts = max_contexts
+        self.recycle_after_pages = recycle_after_pages
+        self._semaphore = asyncio.Semaphore(max_contexts)
+        self._lock = asyncio.Lock()
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._open_contexts: Dict[Browser, int] = {}
+        self._pages_on_browser = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.launches = 0
+        self.crashes = 0
+
+    async def start(self) -> None:
+        async with self._lock:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            if self._browser is None:
+                await self._launch()
+
+    async def stop(self) -> None:
+        async with self._lock:
+            # Cleared first: _on_disconnected only counts disconnects nobody asked for
+            self._browser = None
+            for browser in list(self._open_contexts):
+                await self._close_browser(browser)
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+    async def _launch(self) -> None:
+        browser = await self._playwright.chromium.launch(headless=True)
+        browser.on("disconnected", self._on_disconnected)
+        self._browser = browser
+        self._open_contexts[browser] = 0
+        self._pages_on_browser = 0
+        self.launches += 1
+
+    def _on_disconnected(self, browser: Browser) -> None:
+        if browser is self._browser:
+            print("[WARN] Pooled browser disconnected, relaunching on next use")
+            self.crashes += 1
+            self._browser = None
+        self._open_contexts.pop(browser, None)
+
+    async def _close_browser(self, browser: Browser) -> None:
+        self._open_contexts.pop(browser, None)
+        try:
+            await browser.close()
+        except Exception as e:
+            print(f"[WARN] Failed to close pooled browser: {e}")
+
+    async def _acquire_browser(self) -> Browser:
+        async with self._lock:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+
+            browser = self._browser
+            if browser is not None and not browser.is_connected():
+                browser = None
+            if browser is not None and self._pages_on_browser >= self.recycle_after_pages:
+                # Retire it: close now if idle, otherwise when its last context closes.
+                # No longer current, so its disconnect isn't counted as a crash
+                self._browser = None
+                if self._open_contexts.get(browser, 0) == 0:
+                    await self._close_browser(browser)
+                browser = None
+
+            if browser is None:
+                await self._launch()
+                browser = self._browser
+
+            self._open_contexts[browser] = self._open_contexts.get(browser, 0) + 1
+            return browser
+
+    async def _release_browser(self, browser: Browser) -> None:
+        async with self._lock:
+            if browser not in self._open_contexts:
+                return
+            self._open_contexts[browser] -= 1
+            if browser is not self._browser and self._open_contexts[browser] <= 0:
+                await self._close_browser(browser)
+
+    def _count_page(self, _page) -> None:
+        self._pages_on_browser += 1
+
+    @asynccontextmanager
+    async def context(self, **context_kwargs) -> AsyncIterator[BrowserContext]:
+        """
+        Yield a fresh BrowserContext (own cookies/cache/storage) from the pooled browser.
+        Accepts the same keyword arguments as Browser.new_context().
+        """
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_use += 1
+        browser: Optional[Browser] = None
+        context: Optional[BrowserContext] = None
+        try:
+            browser = await self._acquire_browser()
+            context = await browser.new_context(**context_kwargs)
+            context.on("page", self._count_page)
+            yield context
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+            if browser is not None:
+                await self._release_browser(browser)
+            self.in_use -= 1
+            self._semaphore.release()
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "max_contexts": self.max_contexts,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "launches": self.launches,
+            "crashes": self.crashes,
+            "pages_on_current_browser": self._pages_on_browser,
+        }
+
+
+browser_pool = BrowserPool(
+    max_contexts=settings.BROWSER_POOL_MAX_CONTEXTS,
+    recycle_after_pages=settings.BROWSER_POOL_RECYCLE_AFTER_PAGES,
+)
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -17,6 +19,16 @@ class Settings(BaseSettings):
     POSTGRES_SERVER:str
     POSTGRES_PORT:str
     POSTGRES_DB:str
+    # Pool per engine and per process (API: async engine, worker / prep pipeline: sync engine)
+    DB_POOL_SIZE:int=10
+    DB_MAX_OVERFLOW:int=20
+    DB_POOL_TIMEOUT_SEC:float=30.0
+    DB_POOL_RECYCLE_SEC:int=1800
+    DB_POOL_PRE_PING:bool=True
+    # Async engine only (API requests); 0 = no limit
+    DB_STATEMENT_TIMEOUT_MS:int=15000
+    # asyncpg prepared statements cached per connection; set 0 behind PgBouncer in transaction mode
+    DB_PREPARED_STATEMENT_CACHE_SIZE:int=500
     # --------------------------
     # --Google Authentication--
     # --------------------------
@@ -32,6 +44,108 @@ class Settings(BaseSettings):
     # --Google GEMINI API--
     # --------------------------
     GOOGLE_GEMINI_API_KEY:str
+    GEMINI_MAX_CONCURRENCY:int=8
+    GEMINI_TOS_TIMEOUT_SEC:float=60.0
+    GEMINI_PREP_TIMEOUT_SEC:float=150.0
+    # --------------------------
+    # --Prep prompt context--
+    # --------------------------
+    PREP_CONTEXT_SELECTION_ENABLED:bool=True
+    PREP_CONTEXT_TOKEN_BUDGET:int=8000
+    # --------------------------
+    # --Boilerplate removal--
+    # --------------------------
+    BOILERPLATE_REMOVAL_ENABLED:bool=True
+    BOILERPLATE_SHINGLE_WORDS:int=8
+    # --------------------------
+    # --Prep result dedup--
+    # --------------------------
+    PREP_DEDUP_ENABLED:bool=True
+    PREP_DEDUP_WINDOW_HOURS:int=24
+    # --------------------------
+    # --Prep job queue--
+    # --------------------------
+    PREP_QUEUE_ENABLED:bool=True
+    PREP_QUEUE_BACKEND:str="database"
+    PREP_JOB_MAX_ATTEMPTS:int=3
+    PREP_JOB_VISIBILITY_TIMEOUT_SEC:int=300
+    PREP_JOB_RETRY_BACKOFF_SEC:int=30
+    PREP_WORKER_PROCESSES:int=1
+    PREP_WORKER_CONCURRENCY:int=4
+    PREP_WORKER_POLL_SEC:float=1.0
+    # Workers serve /metrics on PORT+process index (0 = off). With the queue on, the pipeline
+    # runs in the workers, so this is where its stage / Gemini / scrape metrics are
+    PREP_WORKER_METRICS_PORT:int=9101
+    # POST /prep/stream runs the pipeline in the API process even with the queue on (its
+    # progress events can't come from a worker); at most this many at once per process (0 = off)
+    PREP_STREAM_MAX_CONCURRENCY:int=2
+    # --------------------------
+    # --Project list--
+    # --------------------------
+    PREP_LIST_PAGE_SIZE:int=20
+    PREP_LIST_MAX_PAGE_SIZE:int=100
+    # --------------------------
+    # --Project detail cache--
+    # --------------------------
+    # Rendered GET /prep/{id} bodies per process (0 = off); projects are immutable, so no TTL
+    PROJECT_DETAIL_CACHE_MAX_ENTRIES:int=2048
+    # --------------------------
+    # --Metrics--
+    # --------------------------
+    METRICS_TOKEN:Optional[str]=None
+    # --------------------------
+    # --Playwright browser pool--
+    # --------------------------
+    BROWSER_POOL_MAX_CONTEXTS:int=4
+    BROWSER_POOL_RECYCLE_AFTER_PAGES:int=200
+    # --------------------------
+    # --robots.txt cache--
+    # --------------------------
+    ROBOTS_CACHE_TTL_SEC:int=6*60*60
+    ROBOTS_CACHE_NEGATIVE_TTL_SEC:int=10*60
+    ROBOTS_CACHE_MAX_HOSTS:int=1024
+    # --------------------------
+    # --Outbound HTTP client--
+    # --------------------------
+    HTTP_TIMEOUT_SEC:float=10.0
+    HTTP_MAX_CONNECTIONS:int=100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS:int=20
+    HTTP_KEEPALIVE_EXPIRY_SEC:float=30.0
+    # --------------------------
+    # --Crawl scheduler--
+    # --------------------------
+    # One request per host per second, as the sequential scrapers did (robots.txt Crawl-delay can slow it further)
+    CRAWL_HOST_MIN_INTERVAL_SEC:float=1.0
+    CRAWL_HOST_BURST:int=1
+    CRAWL_PER_HOST_CONCURRENCY:int=3
+    CRAWL_GLOBAL_CONCURRENCY:int=32
+    # --------------------------
+    # --HTML parsing--
+    # --------------------------
+    HTML_PARSER_BACKEND:str="auto"  # auto | selectolax | lxml | bs4
+    # --------------------------
+    # --Playwright page loading--
+    # --------------------------
+    # Off until bench_page_render shows lightweight loads keep the scraped text for our targets
+    PLAYWRIGHT_LIGHTWEIGHT_MODE:bool=False
+    PLAYWRIGHT_SETTLE_POLL_MS:int=250
+    PLAYWRIGHT_SETTLE_STABLE_POLLS:int=2
+    PLAYWRIGHT_SETTLE_TIMEOUT_MS:int=5000
+    # --------------------------
+    # --Company page refresh--
+    # --------------------------
+    COMPANY_REFRESH_ENABLED:bool=True
+    COMPANY_REFRESH_AFTER_HOURS:int=7*24
+    # --------------------------
+    # --Favicon store--
+    # --------------------------
+    FAVICON_DIR:str="static/favicons"
+    FAVICON_MAX_BYTES:int=256*1024
+    FAVICON_PUBLIC_BASE_URL:str="/api/v1/favicons"
+    # --------------------------
+    # --ToS verdict cache--
+    # --------------------------
+    TOS_VERDICT_TTL_HOURS:int=30*24
 
     model_config = SettingsConfigDict(
         env_file='.env',
@@ -44,6 +158,10 @@ class Settings(BaseSettings):
     def database_url(self)->str:
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@"f"{self.POSTGRES_SERVER}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
 
+    @property
+    def async_database_url(self)->str:
+        return self.database_url.replace("postgresql://","postgresql+asyncpg://",1)
+
 
 
 settings = Settings()
\ No newline at end of file
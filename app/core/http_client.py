@@ -0,0 +1,39 @@
+from typing import Optional
+
+import httpx
+
+from app.core.config import settings
+
+DEFAULT_HEADERS = {
+    "User-Agent": "PrepLinkBot/0.1 (+https://github.com/apk-official/PrepLinkApp)"
+}
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Process-wide AsyncClient for outbound scraping (keep-alive + HTTP/2).
+    Created on first use, closed in the app lifespan.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,
+            follow_redirects=True,
+            headers=DEFAULT_HEADERS,
+            timeout=httpx.Timeout(settings.HTTP_TIMEOUT_SEC),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SEC,
+            ),
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,161 @@
+# app/core/metrics.py
+"""
+Prometheus metrics for the prep pipeline, served on GET /metrics (app/api/metrics.py) by the
+API and on PREP_WORKER_METRICS_PORT (+ process index) by each prep worker process. Every
+process only reports what it ran itself, so with PREP_QUEUE_ENABLED the pipeline series come
+from the workers; scrape both.
+
+- preplink_prep_stage_seconds{stage, outcome}: one histogram per pipeline stage
+- preplink_gemini_tokens_total{call, kind}: from usage_metadata of every Gemini call
+- preplink_scraped_pages_total / preplink_scraped_bytes_total{mode}: what the scrapers kept
+- preplink_boilerplate_removed_bytes_total{mode}: cross-page boilerplate dropped before storage
+- preplink_cache_requests_total{cache, result}: hit/miss counters of the in-process and DB caches
+- preplink_credit_reservations_total{result}: reserved / rejected (402) / refunded prep credits
+- preplink_browser_pool_* / preplink_render_*: read from the existing .metrics() at scrape time
+
+Label values are fixed sets (stage names, cache names, modes), never URLs or hosts.
+"""
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List
+
+from prometheus_client import REGISTRY, Counter, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+STAGES = {
+    "total", "tos_check", "scrape", "site_type", "static_scrape", "playwright_scrape",
+    "refresh", "context_selection", "gemini_tos", "gemini_prep", "save",
+}
+OUTCOMES = {"ok", "error", "cancelled"}
+GEMINI_CALLS = {"tos", "prep"}
+SCRAPE_MODES = {"static", "playwright"}
+
+PREP_STAGE_SECONDS = Histogram(
+    "preplink_prep_stage_seconds",
+    "Time spent in each prep pipeline stage",
+    ["stage", "outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 90, 120, 180, 300),
+)
+GEMINI_TOKENS = Counter(
+    "preplink_gemini_tokens",
+    "Gemini token usage reported in usage_metadata",
+    ["call", "kind"],
+)
+SCRAPED_PAGES = Counter("preplink_scraped_pages", "Pages kept by the company scrapers", ["mode"])
+SCRAPED_BYTES = Counter("preplink_scraped_bytes", "UTF-8 bytes of page text kept by the company scrapers", ["mode"])
+BOILERPLATE_REMOVED = Counter(
+    "preplink_boilerplate_removed_bytes", "Characters of repeated nav/footer/banner text dropped before storage", ["mode"]
+)
+
+# usage_metadata attribute -> kind label
+USAGE_FIELDS = {
+    "prompt_token_count": "prompt",
+    "candidates_token_count": "completion",
+    "thoughts_token_count": "thoughts",
+    "cached_content_token_count": "cached",
+}
+
+
+def _bounded(value: str, allowed: set, fallback: str = "other") -> str:
+    return value if value in allowed else fallback
+
+
+def observe_stage(stage: str, outcome: str, seconds: float) -> None:
+    PREP_STAGE_SECONDS.labels(_bounded(stage, STAGES), _bounded(outcome, OUTCOMES)).observe(seconds)
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """`with stage_timer("save"):` records the block's duration and how it ended."""
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        observe_stage(stage, outcome, time.perf_counter() - started)
+
+
+def record_gemini_usage(call: str, usage: Any) -> None:
+    if usage is None:
+        return
+    call = _bounded(call, GEMINI_CALLS)
+    for field, kind in USAGE_FIELDS.items():
+        count = getattr(usage, field, None)
+        if count:
+            GEMINI_TOKENS.labels(call, kind).inc(count)
+
+
+def record_scraped_pages(mode: str, pages: List[Dict[str, Any]]) -> None:
+    mode = _bounded(mode, SCRAPE_MODES)
+    SCRAPED_PAGES.labels(mode).inc(len(pages))
+    SCRAPED_BYTES.labels(mode).inc(sum(len((p.get("text") or "").encode("utf-8")) for p in pages))
+
+
+def record_boilerplate_removed(mode: str, chars: int) -> None:
+    BOILERPLATE_REMOVED.labels(_bounded(mode, SCRAPE_MODES)).inc(chars)
+
+
+class ComponentCollector:
+    """Exposes the counters components already keep (robots cache, browser pool, ...) at scrape time."""
+
+    def describe(self) -> Iterable[Any]:
+        # Keeps REGISTRY.register from calling collect() (and its imports) at import time
+        return []
+
+    def collect(self) -> Iterable[Any]:
+        # Imported here: these modules are heavy and some of them import this one
+        from app.core.browser_pool import browser_pool
+        from app.db.credit_db import CreditDB
+        from app.db.prep_cache_db import PrepCacheDB
+        from app.db.project_db import project_detail_cache
+        from app.db.tos_db import TosVerdictDB
+        from app.services.page_render import render_stats
+        from app.utils.fetch_context import FetchContext
+        from app.utils.robot_parser import robots_cache
+
+        cache = CounterMetricFamily(
+            "preplink_cache_requests", "Cache lookups by cache and result", labels=["cache", "result"]
+        )
+        robots = robots_cache.metrics()
+        for name, hits, misses in (
+            ("robots", robots["hits"], robots["misses"]),
+            ("fetch_context", FetchContext.total_hits, FetchContext.total_fetches),
+            ("tos_verdict", TosVerdictDB.hits, TosVerdictDB.misses),
+            ("prep_result", PrepCacheDB.hits, PrepCacheDB.misses),
+            ("project_detail", project_detail_cache.hits, project_detail_cache.misses),
+        ):
+            cache.add_metric([name, "hit"], hits)
+            cache.add_metric([name, "miss"], misses)
+        yield cache
+
+        credits = CounterMetricFamily("preplink_credit_reservations", "Prep credit reservations by result", labels=["result"])
+        for result, count in CreditDB.metrics().items():
+            credits.add_metric([result], count)
+        yield credits
+
+        pool = browser_pool.metrics()
+        for key in ("max_contexts", "in_use", "waiting", "pages_on_current_browser"):
+            yield GaugeMetricFamily(f"preplink_browser_pool_{key}", f"Browser pool {key.replace('_', ' ')}", value=pool[key])
+        for key in ("launches", "crashes"):
+            yield CounterMetricFamily(f"preplink_browser_pool_{key}", f"Browser pool {key}", value=pool[key])
+
+        render_pages = CounterMetricFamily("preplink_render_pages", "Playwright page loads", labels=["mode"])
+        render_bytes = CounterMetricFamily("preplink_render_bytes", "Bytes received by Playwright page loads", labels=["mode"])
+        render_blocked = CounterMetricFamily("preplink_render_blocked_requests", "Requests aborted in lightweight mode", labels=["mode"])
+        for mode, totals in render_stats.totals().items():
+            render_pages.add_metric([mode], totals["pages"])
+            render_bytes.add_metric([mode], totals["bytes"])
+            render_blocked.add_metric([mode], totals["blocked"])
+        yield render_pages
+        yield render_bytes
+        yield render_blocked
+
+
+REGISTRY.register(ComponentCollector())
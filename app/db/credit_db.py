@@ -0,0 +1,96 @@
+from typing import Dict
+
+from fastapi import HTTPException,status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+
+
+class CreditDB:
+    """
+    Prep credits. A credit is reserved with one conditional UPDATE before any scrape or Gemini
+    work, so concurrent preps by the same user can't overspend, and refunded if no prep is saved.
+    """
+    reserved = 0
+    rejected = 0
+    refunded = 0
+
+    @staticmethod
+    async def has_credit(user_id, db:AsyncSession) -> bool:
+        """Cheap pre-check for callers that reserve later (queued preps, from the API's async session)."""
+        credits = await db.scalar(select(User.credits).where(User.user_id == int(user_id)))
+        return bool(credits and credits > 0)
+
+    @staticmethod
+    def take(user_id, db:Session) -> bool:
+        """The conditional decrement, in the caller's transaction; False when no credit is left."""
+        remaining = db.execute(
+            update(User)
+            .where(User.user_id == user_id, User.credits > 0)
+            .values(credits=User.credits - 1)
+            .returning(User.credits)
+        ).scalar_one_or_none()
+        if remaining is None:
+            CreditDB.rejected += 1
+            return False
+        CreditDB.reserved += 1
+        return True
+
+    @staticmethod
+    def give_back(user_id, db:Session) -> None:
+        """Return a taken credit, in the caller's transaction."""
+        db.execute(update(User).where(User.user_id == user_id).values(credits=User.credits + 1))
+        CreditDB.refunded += 1
+
+    @staticmethod
+    def reserve(user_id, db:Session) -> None:
+        """UPDATE ... SET credits = credits - 1 WHERE credits > 0 RETURNING credits; raises 402 when none are left."""
+        try:
+            taken = CreditDB.take(user_id, db)
+            # Committed straight away: the row lock is not held through the scrape / Gemini call
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        if not taken:
+            raise HTTPException(status_code=status.HTTP_402_PAYMENT_REQUIRED,detail="You have run out of credits")
+
+    @staticmethod
+    def refund(user_id, db:Session) -> None:
+        """Give back a reserved credit. Never raises, so it can't mask the error that caused it."""
+        try:
+            # Nothing else is pending on a failed or deduplicated prep; clears an aborted transaction
+            db.rollback()
+            CreditDB.give_back(user_id, db)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"[ERROR] Failed to refund a prep credit to user {user_id}: {e}")
+
+    @staticmethod
+    def metrics() -> Dict[str, int]:
+        return {"reserved": CreditDB.reserved, "rejected": CreditDB.rejected, "refunded": CreditDB.refunded}
+
+
+class PrepCredit:
+    """
+    The credit a prep runs on, as run_prep sees it: reserve() before any scrape or Gemini work,
+    release() when the prep finished without using it (cached / someone else's identical
+    generation), failed() when it didn't finish. Each call gets the session of whoever makes it.
+
+    This one is a request's own credit: reserved on the user row, refunded either way.
+    """
+
+    def __init__(self, user_id):
+        self.user_id = user_id
+
+    def reserve(self, db:Session) -> None:
+        CreditDB.reserve(self.user_id, db)
+
+    def release(self, db:Session) -> None:
+        CreditDB.refund(self.user_id, db)
+
+    def failed(self, db:Session) -> None:
+        CreditDB.refund(self.user_id, db)
@@ -0,0 +1,100 @@
+# app/db/data_cleanup.py
+"""
+Data cleanup migration 0003 needs before it can add the unique company URL and the foreign
+keys: duplicate company rows (same URL, from concurrent first-time preps) and rows whose
+parent no longer exists. 0003 refuses to run while any are left and says so.
+
+    python -m app.db.data_cleanup [--url postgresql://...]            # report only
+    python -m app.db.data_cleanup --apply [--url postgresql://...]
+
+Every step runs in one transaction and prints how many rows it touched; without --apply
+the transaction is rolled back, so the report is exactly what --apply would do. Nothing is
+dropped outright: deleted rows are first copied into cleanup_archive_<table> (same columns,
+no constraints), where they can be inspected or put back.
+"""
+import argparse
+from typing import List, Optional, Tuple
+
+from sqlalchemy import create_engine, text
+
+ARCHIVE_PREFIX = "cleanup_archive_"
+
+# Duplicates keep the oldest row (lowest id); projects are moved over to it, nothing is lost
+DUPLICATE_COMPANIES = """
+    CREATE TEMP TABLE company_dups ON COMMIT DROP AS
+    SELECT c.company_id AS dup_id, k.keep_id
+    FROM company c
+    JOIN (SELECT url, min(company_id) AS keep_id FROM company GROUP BY url HAVING count(*) > 1) k
+      ON c.url = k.url AND c.company_id <> k.keep_id
+"""
+
+# (kind, table, label, SQL); "delete" steps are `DELETE ... RETURNING <table>.*` and get archived
+STEPS: List[Tuple[str, str, str, str]] = [
+    ("update", "project", "projects moved to the kept duplicate company",
+     "UPDATE project p SET company_id = d.keep_id FROM company_dups d WHERE p.company_id = d.dup_id"),
+    ("delete", "company_pages", "pages of duplicate companies",
+     "DELETE FROM company_pages cp USING company_dups d WHERE cp.company_id = d.dup_id RETURNING cp.*"),
+    ("delete", "prep_result_cache", "cached preps of duplicate companies",
+     "DELETE FROM prep_result_cache r USING company_dups d WHERE r.company_id = d.dup_id RETURNING r.*"),
+    ("delete", "company", "duplicate companies",
+     "DELETE FROM company c USING company_dups d WHERE c.company_id = d.dup_id RETURNING c.*"),
+    # Projects first, so their questions / tips / ... count as orphans below
+    ("delete", "project", "projects of deleted users",
+     'DELETE FROM project p WHERE NOT EXISTS (SELECT 1 FROM "user" u WHERE u.user_id = p.user_id) RETURNING p.*'),
+    ("delete", "project", "projects of deleted companies",
+     "DELETE FROM project p WHERE NOT EXISTS (SELECT 1 FROM company c WHERE c.company_id = p.company_id) RETURNING p.*"),
+    *[
+        ("delete", table, f"{table} rows of deleted projects",
+         f"DELETE FROM {table} t WHERE NOT EXISTS (SELECT 1 FROM project p WHERE p.project_id = t.project_id) RETURNING t.*")
+        for table in ("interview_question", "interview_tips", "about_company", "prep_result_cache")
+    ],
+    ("delete", "company_pages", "pages of deleted companies",
+     "DELETE FROM company_pages cp WHERE NOT EXISTS (SELECT 1 FROM company c WHERE c.company_id = cp.company_id) RETURNING cp.*"),
+    ("delete", "user_auth", "logins of deleted users",
+     'DELETE FROM user_auth ua WHERE NOT EXISTS (SELECT 1 FROM "user" u WHERE u.user_id = ua.user_id) RETURNING ua.*'),
+]
+
+
+def run(url: Optional[str], apply: bool) -> int:
+    """Runs every step, prints the counts, commits only with `apply`. Returns the rows touched."""
+    if url:
+        engine = create_engine(url)
+    else:
+        from app.db.sessions import engine
+
+    total = 0
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            conn.execute(text(DUPLICATE_COMPANIES))
+            for kind, table, label, sql in STEPS:
+                if kind == "delete":
+                    archive = ARCHIVE_PREFIX + table
+                    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {archive} (LIKE {table})"))
+                    sql = f"WITH gone AS ({sql}) INSERT INTO {archive} SELECT * FROM gone"
+                count = conn.execute(text(sql)).rowcount
+                total += count
+                target = f"-> {ARCHIVE_PREFIX}{table}" if kind == "delete" else ""
+                print(f"{kind:<7} {count:>9}  {label} {target}")
+        except Exception:
+            trans.rollback()
+            raise
+        if apply:
+            trans.commit()
+            print(f"Applied: {total} rows")
+        else:
+            trans.rollback()
+            print(f"Dry run, rolled back: {total} rows would change (run again with --apply)")
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="database URL (default: the app's database)")
+    parser.add_argument("--apply", action="store_true", help="commit instead of rolling back")
+    args = parser.parse_args()
+    run(args.url, args.apply)
+
+
+if __name__ == "__main__":
+    main()
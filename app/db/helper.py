@@ -1,9 +1,15 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import Generator
-from app.db.sessions import SessionLocal
+from typing import AsyncGenerator, Generator
+from app.db.sessions import AsyncSessionLocal, SessionLocal
 def get_db()->Generator[Session,None,None]:
     db=SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db()->AsyncGenerator[AsyncSession,None]:
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.company_pages import CompanyPages
+from app.models.prep_result_cache import PrepResultCache
+from app.models.project import Project
+from app.schema.prep_schema import InterviewPrepResponse
+from app.utils.hashing import text_hash
+
+
+def pages_version(pages_rows: List[CompanyPages]) -> str:
+    """Changes whenever any stored page's content does (refresh rewrites content_hash)."""
+    parts = sorted(
+        f"{row.page_url}\n{row.content_hash or text_hash(row.page_content)}" for row in pages_rows
+    )
+    return text_hash("\n".join(parts))
+
+
+def prep_input_hash(resume: str, company_id: int, pages_rows: List[CompanyPages], job_desc: str) -> str:
+    return text_hash("\n".join([
+        text_hash(resume),
+        f"{company_id}:{pages_version(pages_rows)}",
+        text_hash(job_desc),
+    ]))
+
+
+class PrepCacheDB:
+    """
+    Finished preps keyed by (user, input hash), reused for PREP_DEDUP_WINDOW_HOURS so a
+    resubmitted resume + company + job description doesn't pay for another generation or credit.
+    """
+    hits = 0
+    misses = 0
+
+    @staticmethod
+    def get_result(user_id:int, input_hash:str, db:Session) -> Optional[Tuple[int, InterviewPrepResponse]]:
+        row = db.query(PrepResultCache).filter(
+            PrepResultCache.user_id == user_id,
+            PrepResultCache.input_hash == input_hash,
+        ).first()
+        if row is not None:
+            created = datetime.fromisoformat(row.created_at)
+            fresh = datetime.now(timezone.utc) - created < timedelta(hours=settings.PREP_DEDUP_WINDOW_HOURS)
+            # The user may have deleted the project since
+            exists = db.query(Project.project_id).filter(
+                Project.project_id == row.project_id,
+                Project.user_id == user_id,
+            ).first()
+            if fresh and exists is not None:
+                PrepCacheDB.hits += 1
+                return row.project_id, InterviewPrepResponse.model_validate_json(row.result_json)
+        PrepCacheDB.misses += 1
+        return None
+
+    @staticmethod
+    def save_result(user_id:int, company_id:int, input_hash:str, project_id:int, result:InterviewPrepResponse, db:Session) -> None:
+        now = datetime.now(timezone.utc).isoformat()
+        row = db.query(PrepResultCache).filter(
+            PrepResultCache.user_id == user_id,
+            PrepResultCache.input_hash == input_hash,
+        ).first()
+        try:
+            if row is None:
+                db.add(PrepResultCache(
+                    user_id=user_id,
+                    company_id=company_id,
+                    input_hash=input_hash,
+                    project_id=project_id,
+                    result_json=result.model_dump_json(),
+                    created_at=now,
+                ))
+            else:
+                row.project_id = project_id
+                row.result_json = result.model_dump_json()
+                row.created_at = now
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    @staticmethod
+    def invalidate_company(company_id:int, db:Session) -> int:
+        """Drop cached preps built from this company's pages; the caller commits."""
+        return db.query(PrepResultCache).filter(
+            PrepResultCache.company_id == company_id
+        ).delete(synchronize_session=False)
+
+    @staticmethod
+    def metrics() -> Dict[str, float]:
+        total = PrepCacheDB.hits + PrepCacheDB.misses
+        return {
+            "hits": PrepCacheDB.hits,
+            "misses": PrepCacheDB.misses,
+            "hit_rate": round(PrepCacheDB.hits / total, 3) if total else 0.0,
+        }
@@ -1,4 +1,5 @@
 from fastapi import HTTPException,status
+from sqlalchemy import Integer, String, insert, literal, select
 from sqlalchemy.orm import Session
 
 from app.models.about_company import AboutCompany
@@ -6,7 +7,6 @@ from app.models.company import Company
 from app.models.interview_question import InterviewQuestions
 from app.models.interview_tips import InterviewTips
 from app.models.project import Project
-from app.models.user import User
 
 
 class InvalidDataException(Exception):
@@ -85,47 +85,40 @@ class PrepDB:
             if _looks_invalid(about_company):
                 raise InvalidDataException("invalid data")
 
-                # -------- If all validations pass, then save --------
-            company = db.query(Company).filter(Company.company_id==company_id).first()
-
-            project = Project(
-            user_id=user_id,
-            company_id=company_id,
-            position=getattr(result, "job_position", "unknown"),
-            company_name=company.name,
-            company_logo = company.image,
-            created_at=created_at
-            )
-            db.add(project)
-            db.commit()
-            db.refresh(project)
-
-            sections = {
-                "General": result.interview_qa.General,
-                "Technical": result.interview_qa.Technical,
-                "Behavioural":result.interview_qa.Behavioural,
-                "Other": result.interview_qa.Other,
-            }
-
-            for section_name, qa_list in sections.items():
-                for qa in qa_list:
-                    db.add(
-                        InterviewQuestions(
-                            project_id=project.project_id,
-                            question_type=section_name,
-                            question=qa.question,
-                            answer=qa.answer,
-                        )
-                    )
-            db.commit()
-            for tip in result.tips:
-                db.add(InterviewTips(
-                    project_id=project.project_id,
-                    tip=tip.tip
-            ))
-            db.commit()
-            db.add(AboutCompany(
-                project_id=project.project_id,
+            # -------- If all validations pass, save everything in one transaction --------
+            # Project row copies name/logo straight from company: INSERT ... SELECT ... RETURNING
+            project_id = db.execute(
+                insert(Project)
+                .from_select(
+                    ["user_id", "company_id", "position", "company_name", "company_logo", "created_at"],
+                    select(
+                        literal(user_id, Integer),
+                        Company.company_id,
+                        literal(getattr(result, "job_position", "unknown"), String),
+                        Company.name,
+                        Company.image,
+                        literal(created_at, String),
+                    ).where(Company.company_id == company_id),
+                )
+                .returning(Project.project_id)
+            ).scalar_one()
+
+            # Bulk inserts: one executemany per table instead of one INSERT per ORM object
+            db.execute(insert(InterviewQuestions), [
+                {
+                    "project_id": project_id,
+                    "question_type": section_name,
+                    "question": qa.question,
+                    "answer": qa.answer,
+                }
+                for section_name, qa_list in sections.items()
+                for qa in qa_list
+            ])
+            db.execute(insert(InterviewTips), [
+                {"project_id": project_id, "tip": tip.tip} for tip in result.tips
+            ])
+            db.execute(insert(AboutCompany).values(
+                project_id=project_id,
                 vision=result.about_company.vision.content,
                 vision_url=result.about_company.vision.source_url,
                 mission=result.about_company.mission.content,
@@ -133,11 +126,9 @@ class PrepDB:
                 additional=result.about_company.additional.content,
                 additional_url=result.about_company.additional.source_url,
             ))
+            # The credit was already reserved (PrepCredit.reserve) before generation started
             db.commit()
-            user=db.query(User).filter(User.user_id==user_id).first()
-            user.credits=user.credits-1
-            db.commit()
-            db.refresh(user)
+            return project_id
         except InvalidDataException:
             db.rollback()
             raise
@@ -0,0 +1,165 @@
+import base64
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Integer, String, Text, cast, func, literal, literal_column, select, tuple_
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.about_company import AboutCompany
+from app.models.interview_question import InterviewQuestions
+from app.models.interview_tips import InterviewTips
+from app.models.project import Project
+from app.utils.hashing import text_hash
+
+# Bump when the detail payload changes shape: it is part of the ETag, so clients refetch
+DETAIL_FORMAT = "1"
+# Projects never change after creation; "private" because the response depends on the bearer token
+DETAIL_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+# What the project list view shows; user_id / company_id stay server-side
+LIST_COLUMNS = (Project.project_id, Project.position, Project.company_name, Project.company_logo, Project.created_at)
+
+
+def encode_cursor(created_at:str, project_id:int) -> str:
+    raw = json.dumps([created_at, project_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor:str) -> Tuple[str, int]:
+    """Raises ValueError for anything encode_cursor didn't produce."""
+    try:
+        created_at, project_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+    if not isinstance(created_at, str) or not isinstance(project_id, int):
+        raise ValueError("invalid cursor")
+    return created_at, project_id
+
+
+def _json_object(**members):
+    # Keys as SQL literals: json_build_object(VARIADIC "any") can't type bind parameters under asyncpg
+    return func.json_build_object(*[part for key, value in members.items() for part in (literal_column(f"'{key}'"), value)])
+
+
+def _json_rows(model, order_by, *columns):
+    """json_agg of the project's child rows (same keys as the ORM columns), '[]' when there are none."""
+    row = _json_object(**{c.key: c for c in columns})
+    return (
+        select(func.coalesce(func.json_agg(aggregate_order_by(row, order_by)), literal_column("'[]'::json")))
+        .where(model.project_id == Project.project_id)
+        .scalar_subquery()
+    )
+
+
+def detail_etag(user_id:int, prep_id:int) -> str:
+    """The project can't change, so (owner, id, payload format) identifies the body. Only valid once ownership is checked."""
+    return '"' + text_hash(f"{user_id}:{prep_id}:{DETAIL_FORMAT}")[:32] + '"'
+
+
+class ProjectDB:
+    @staticmethod
+    async def detail_json(user_id:int, prep_id:int, db:AsyncSession) -> Optional[str]:
+        """
+        The whole project detail as a JSON document, built by Postgres in one statement
+        (project header + questions + tips + about_company). None if the project doesn't
+        exist or belongs to someone else.
+        """
+        q, t, a = InterviewQuestions, InterviewTips, AboutCompany
+        document = _json_object(
+            project=_json_object(
+                project_id=Project.project_id,
+                position=Project.position,
+                company_name=Project.company_name,
+                company_logo=Project.company_logo,
+                created_at=Project.created_at,
+            ),
+            interview_question=_json_rows(
+                q, q.question_id, q.question_id, q.project_id, q.question_type, q.question, q.answer,
+            ),
+            interview_tips=_json_rows(t, t.tip_id, t.tip_id, t.project_id, t.tip),
+            about_company=_json_rows(
+                a, a.about_company_id, a.about_company_id, a.project_id,
+                a.vision, a.vision_url, a.mission, a.mission_url, a.additional, a.additional_url,
+            ),
+        )
+        return await db.scalar(
+            select(cast(document, Text)).where(Project.project_id == prep_id, Project.user_id == user_id)
+        )
+
+    @staticmethod
+    async def list_page(user_id:int, after:Optional[Tuple[str, int]], limit:int, db:AsyncSession) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of the user's projects, newest first, keyed on (created_at, project_id) so deep
+        pages cost the same as the first. Returns (rows, cursor of the next page or None).
+        """
+        query = (
+            select(*LIST_COLUMNS)
+            .where(Project.user_id == user_id)
+            .order_by(Project.created_at.desc(), Project.project_id.desc())
+            # One extra row tells whether there is a next page without a count
+            .limit(limit + 1)
+        )
+        if after is not None:
+            created_at, project_id = after
+            query = query.where(
+                tuple_(Project.created_at, Project.project_id) < tuple_(literal(created_at, String), literal(project_id, Integer))
+            )
+        rows = [dict(r) for r in (await db.execute(query)).mappings()]
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1]["created_at"], rows[-1]["project_id"])
+
+    @staticmethod
+    async def count(user_id:int, db:AsyncSession) -> int:
+        # Index-only scan on ix_project_user_id_created_at_project_id
+        return await db.scalar(select(func.count()).select_from(Project).where(Project.user_id == user_id))
+
+
+class ProjectDetailCache:
+    """
+    In-process LRU of rendered project details keyed by (owner, project id).
+    Entries never go stale (projects are immutable), so there is no TTL, only `max_entries`.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[int, int], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int, prep_id: int) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get((user_id, prep_id))
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((user_id, prep_id))
+            self.hits += 1
+            return body
+
+    def put(self, user_id: int, prep_id: int, body: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[(user_id, prep_id)] = body
+            self._entries.move_to_end((user_id, prep_id))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def drop_user(self, user_id: int) -> None:
+        """Best effort on account deletion (this process only)."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == user_id]:
+                del self._entries[key]
+
+    def metrics(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+project_detail_cache = ProjectDetailCache(max_entries=settings.PROJECT_DETAIL_CACHE_MAX_ENTRIES)
@@ -1,13 +1,63 @@
+import os
+import ssl
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 
 SQL_ALCHEMY_DATABASE_URL=settings.database_url
+SSL_ROOT_CERT="/certs/global-bundle.pem"
+
+POOL_OPTIONS = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SEC,
+    pool_recycle=settings.DB_POOL_RECYCLE_SEC,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
 
+# Sync engine: prep pipeline, job queue, worker and Alembic
 engine=create_engine(SQL_ALCHEMY_DATABASE_URL,connect_args={
         "sslmode": "verify-full",
-        "sslrootcert": "/certs/global-bundle.pem",
-    },)
+        "sslrootcert": SSL_ROOT_CERT,
+    },**POOL_OPTIONS)
+
+SessionLocal=sessionmaker(autocommit=False, autoflush=False,bind=engine)
+
+
+def _ssl_context() -> ssl.SSLContext:
+    """
+    asyncpg takes an SSLContext; hostname check + CA bundle is the same as verify-full.
+    Without the bundle (tests, scripts, a dev box) this module still imports, and connections
+    are verified against the system CAs only, so an RDS server is rejected at connect time.
+    """
+    ssl_context = ssl.create_default_context()
+    if os.path.exists(SSL_ROOT_CERT):
+        ssl_context.load_verify_locations(cafile=SSL_ROOT_CERT)
+    return ssl_context
+
+
+def _async_connect_args() -> dict:
+    ssl_context = _ssl_context()
+    server_settings = {"application_name": "preplink-api"}
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+    return {
+        "ssl": ssl_context,
+        "server_settings": server_settings,
+        # asyncpg's own cache; SQLAlchemy's is sized by prepared_statement_cache_size below
+        "statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+    }
+
+
+# Async engine: request handlers, so a slow query doesn't block the event loop
+async_engine=create_async_engine(
+    f"{settings.async_database_url}?prepared_statement_cache_size={settings.DB_PREPARED_STATEMENT_CACHE_SIZE}",
+    connect_args=_async_connect_args(),
+    **POOL_OPTIONS,
+)
 
-SessionLocal=sessionmaker(autocommit=False, autoflush=False,bind=engine)
\ No newline at end of file
+# expire_on_commit=False: attributes stay readable after commit without an implicit (sync) refresh
+AsyncSessionLocal=async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
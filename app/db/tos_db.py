@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.tos_verdict import TosVerdict
+from app.utils.hashing import text_hash
+
+
+def policy_hash(tos_data: dict) -> str:
+    """Hash of the extracted legal text, independent of page order and whitespace."""
+    pages = sorted(tos_data.get("pages") or [], key=lambda p: p.get("url") or "")
+    return text_hash("\n".join((p.get("text") or "") for p in pages))
+
+
+class TosVerdictDB:
+    """Persistent ToS verdicts keyed by (host, policy text hash), valid for TOS_VERDICT_TTL_HOURS."""
+    hits = 0
+    misses = 0
+
+    @staticmethod
+    def get_verdict(host:str, policy_hash_value:str, db:Session) -> Optional[bool]:
+        row = db.query(TosVerdict).filter(
+            TosVerdict.host == host,
+            TosVerdict.policy_hash == policy_hash_value,
+        ).first()
+        if row is not None:
+            checked = datetime.fromisoformat(row.checked_at)
+            if datetime.now(timezone.utc) - checked < timedelta(hours=settings.TOS_VERDICT_TTL_HOURS):
+                TosVerdictDB.hits += 1
+                return row.allowed
+        TosVerdictDB.misses += 1
+        return None
+
+    @staticmethod
+    def save_verdict(host:str, policy_hash_value:str, allowed:bool, db:Session) -> None:
+        now = datetime.now(timezone.utc).isoformat()
+        row = db.query(TosVerdict).filter(
+            TosVerdict.host == host,
+            TosVerdict.policy_hash == policy_hash_value,
+        ).first()
+        try:
+            if row is None:
+                db.add(TosVerdict(host=host, policy_hash=policy_hash_value, allowed=allowed, checked_at=now))
+            else:
+                row.allowed = allowed
+                row.checked_at = now
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    @staticmethod
+    def metrics() -> Dict[str, int]:
+        return {"hits": TosVerdictDB.hits, "misses": TosVerdictDB.misses}
+
+
+def host_of(url:str) -> str:
+    return (urlparse(url).hostname or "").lower()
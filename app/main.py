@@ -1,5 +1,7 @@
 
 
+from contextlib import asynccontextmanager
+
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from slowapi import _rate_limit_exceeded_handler
@@ -9,13 +11,31 @@ from starlette.middleware.sessions import SessionMiddleware
 from app.api.auth import router as auth_router
 from app.api.user import router as user_router
 from app.api.prep import router as prep_router
+from app.api.favicon import router as favicon_router
+from app.api.metrics import router as metrics_router
+from app.core.browser_pool import browser_pool
 from app.core.config import settings
-from app.db.base import Base
-from app.db.sessions import engine
+from app.core.http_client import close_http_client
 from app.core.ratelimit import limiter
+from app.db.sessions import async_engine
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(title="PrepLink", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app:FastAPI):
+    # Shared Chromium for scraping + ToS extraction, launched once per worker
+    try:
+        await browser_pool.start()
+    except Exception as e:
+        print(f"[WARN] Browser pool failed to start, will retry on first use: {e}")
+    try:
+        yield
+    finally:
+        await browser_pool.stop()
+        await close_http_client()
+        await async_engine.dispose()
+
+app = FastAPI(title="PrepLink", version="1.0.0", lifespan=lifespan)
 
 app.state.limiter = limiter
 app.add_middleware(SessionMiddleware,
@@ -34,13 +54,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],      # or ["GET","POST","PUT","DELETE"]
     allow_headers=["*"],      # includes Authorization
+    expose_headers=["X-Next-Cursor"],  # GET /prep/ pagination
 )
 
 ##API routers with versioned(v1) URL prefixes
 app.include_router(auth_router,prefix="/api/v1")
 app.include_router(user_router, prefix="/api/v1")
 app.include_router(prep_router, prefix="/api/v1")
+app.include_router(favicon_router, prefix="/api/v1")
+# Prometheus scrape endpoint, unversioned
+app.include_router(metrics_router)
 
 
-# Create database tables on startup (based on SQLAlchemy models)
-Base.metadata.create_all(bind=engine)
\ No newline at end of file
+# Schema is managed with Alembic (alembic/): run `alembic upgrade head` before starting
\ No newline at end of file
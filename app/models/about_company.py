@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer,String
+from sqlalchemy import Column, ForeignKey, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.base import Base
 
@@ -6,7 +6,7 @@ from app.db.base import Base
 class AboutCompany(Base):
     __tablename__ = "about_company"
     about_company_id=Column(Integer,primary_key=True,index=True)
-    project_id:Mapped[int]=mapped_column(Integer)
+    project_id:Mapped[int]=mapped_column(Integer,ForeignKey("project.project_id",ondelete="CASCADE",name="fk_about_company_project_id_project"),index=True)
     vision:Mapped[str]=mapped_column(String)
     vision_url:Mapped[str]=mapped_column(String)
     mission:Mapped[str]=mapped_column(String)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, UniqueConstraint
 from sqlalchemy.orm import Mapped,mapped_column
 
 from app.db.base import Base
@@ -6,6 +6,7 @@ from app.db.base import Base
 
 class Company(Base):
     __tablename__ = "company"
+    __table_args__ = (UniqueConstraint("url", name="uq_company_url"),)
     company_id:Mapped[int]=mapped_column(Integer,primary_key=True,index=True)
     name:Mapped[str]=mapped_column(String)
     url:Mapped[str]=mapped_column(String)
@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String
+from typing import Optional
+
+from sqlalchemy import Column, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped,mapped_column
 
 from app.db.base import Base
@@ -6,10 +8,18 @@ from app.db.base import Base
 
 class CompanyPages(Base):
     __tablename__="company_pages"
+    __table_args__ = (Index("ix_company_pages_company_id_page_url", "company_id", "page_url"),)
     page_id:Mapped[int]=mapped_column(Integer,primary_key=True,index=True)
-    company_id:Mapped[int]=mapped_column(Integer)
+    company_id:Mapped[int]=mapped_column(Integer,ForeignKey("company.company_id",ondelete="CASCADE",name="fk_company_pages_company_id_company"))
     page_title:Mapped[str]=mapped_column(String)
     page_url:Mapped[str]=mapped_column(String)
     page_content:Mapped[str]=mapped_column(String)
     scraped_at:Mapped[str]=mapped_column(String)
+    # Incremental refresh: HTTP validators + hash of page_content
+    etag:Mapped[Optional[str]]=mapped_column(String,nullable=True)
+    last_modified:Mapped[Optional[str]]=mapped_column(String,nullable=True)
+    content_hash:Mapped[Optional[str]]=mapped_column(String,nullable=True)
+    checked_at:Mapped[Optional[str]]=mapped_column(String,nullable=True)
+    # "static" | "playwright": how the page was fetched; only static pages are refreshed (NULL: unknown)
+    scrape_mode:Mapped[Optional[str]]=mapped_column(String,nullable=True)
 
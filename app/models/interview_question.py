@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer,String
+from sqlalchemy import Column, ForeignKey, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
@@ -7,7 +7,7 @@ from app.db.base import Base
 class InterviewQuestions(Base):
     __tablename__ = "interview_question"
     question_id:Mapped[int]=mapped_column(Integer,primary_key=True,index=True)
-    project_id:Mapped[int]=mapped_column(Integer)
+    project_id:Mapped[int]=mapped_column(Integer,ForeignKey("project.project_id",ondelete="CASCADE",name="fk_interview_question_project_id_project"),index=True)
     question_type:Mapped[str]=mapped_column(String)
     question:Mapped[str]=mapped_column(String)
     answer:Mapped[str]=mapped_column(String)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer
+from sqlalchemy import Column, ForeignKey, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
@@ -7,5 +7,5 @@ from app.db.base import Base
 class InterviewTips(Base):
     __tablename__ = "interview_tips"
     tip_id:Mapped[int]=mapped_column(Integer,primary_key=True,index=True)
-    project_id:Mapped[int]=mapped_column(Integer)
+    project_id:Mapped[int]=mapped_column(Integer,ForeignKey("project.project_id",ondelete="CASCADE",name="fk_interview_tips_project_id_project"),index=True)
     tip:Mapped[str]=mapped_column(String)
\ No newline at end of file
@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Boolean, DateTime, Integer, String, Text, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class PrepJob(Base):
+    __tablename__ = "prep_job"
+    job_id:Mapped[str]=mapped_column(String,primary_key=True)
+    user_id:Mapped[int]=mapped_column(Integer,index=True)
+    # queued | running | done | failed
+    status:Mapped[str]=mapped_column(String,index=True)
+    # JSON {"resume", "url", "job_desc"}; cleared once the job is finished
+    payload:Mapped[Optional[str]]=mapped_column(Text,nullable=True)
+    attempts:Mapped[int]=mapped_column(Integer,default=0)
+    # The user's credit for this job is taken (once, by the first attempt that got that far)
+    credit_reserved:Mapped[bool]=mapped_column(Boolean,default=False,server_default=text("false"))
+    # queued: earliest start (retry backoff); running: lease expiry (visibility timeout)
+    available_at:Mapped[datetime]=mapped_column(DateTime(timezone=True),index=True)
+    locked_by:Mapped[Optional[str]]=mapped_column(String,nullable=True)
+    prep_id:Mapped[Optional[int]]=mapped_column(Integer,nullable=True)
+    error:Mapped[Optional[str]]=mapped_column(String,nullable=True)
+    error_status:Mapped[Optional[int]]=mapped_column(Integer,nullable=True)
+    created_at:Mapped[datetime]=mapped_column(DateTime(timezone=True))
+    updated_at:Mapped[datetime]=mapped_column(DateTime(timezone=True))
@@ -0,0 +1,17 @@
+from sqlalchemy import ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class PrepResultCache(Base):
+    __tablename__ = "prep_result_cache"
+    __table_args__ = (UniqueConstraint("user_id", "input_hash", name="uq_prep_result_cache_user_input"),)
+    cache_id:Mapped[int]=mapped_column(Integer,primary_key=True,index=True)
+    user_id:Mapped[int]=mapped_column(Integer)
+    company_id:Mapped[int]=mapped_column(Integer,index=True)
+    # sha256 of resume text + company page version + job description
+    input_hash:Mapped[str]=mapped_column(String)
+    project_id:Mapped[int]=mapped_column(Integer,ForeignKey("project.project_id",ondelete="CASCADE",name="fk_prep_result_cache_project_id_project"))
+    result_json:Mapped[str]=mapped_column(Text)
+    created_at:Mapped[str]=mapped_column(String)
@@ -1,4 +1,4 @@
-from sqlalchemy import  Integer, String
+from sqlalchemy import ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.base import Base
@@ -6,9 +6,11 @@ from app.db.base import Base
 
 class Project(Base):
     __tablename__ = "project"
+    # Keyset pagination of a user's projects (newest first); also serves plain user_id lookups
+    __table_args__ = (Index("ix_project_user_id_created_at_project_id", "user_id", "created_at", "project_id"),)
     project_id:Mapped[int]=mapped_column(Integer,primary_key=True,index=True)
-    user_id:Mapped[int]=mapped_column(Integer)
-    company_id:Mapped[int]=mapped_column(Integer)
+    user_id:Mapped[int]=mapped_column(Integer,ForeignKey("user.user_id",ondelete="CASCADE",name="fk_project_user_id_user"))
+    company_id:Mapped[int]=mapped_column(Integer,ForeignKey("company.company_id",name="fk_project_company_id_company"))
     position:Mapped[str]=mapped_column(String)
     company_name:Mapped[str]=mapped_column(String)
     company_logo:Mapped[str]=mapped_column(String)
@@ -0,0 +1,14 @@
+from sqlalchemy import Boolean, Integer, String, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class TosVerdict(Base):
+    __tablename__ = "tos_verdict"
+    __table_args__ = (UniqueConstraint("host", "policy_hash", name="uq_tos_verdict_host_policy_hash"),)
+    verdict_id:Mapped[int]=mapped_column(Integer,primary_key=True,index=True)
+    host:Mapped[str]=mapped_column(String,index=True)
+    policy_hash:Mapped[str]=mapped_column(String)
+    allowed:Mapped[bool]=mapped_column(Boolean)
+    checked_at:Mapped[str]=mapped_column(String)
@@ -1,15 +1,16 @@
 from datetime import datetime
 
 from pydantic import BaseModel
-from sqlalchemy import Column, Integer, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import Mapped,mapped_column
 from app.db.base import Base
 
 
 class UserAuth(Base):
     __tablename__ = "user_auth"
+    __table_args__ = (Index("ix_user_auth_user_id_auth_method", "user_id", "auth_method"),)
     auth_id=Column(Integer,primary_key=True,index=True)
-    user_id:Mapped[int]=mapped_column(Integer)
+    user_id:Mapped[int]=mapped_column(Integer,ForeignKey("user.user_id",ondelete="CASCADE",name="fk_user_auth_user_id_user"))
     email_id=Column(String)
     auth_method:Mapped[str]=mapped_column(String)
     provider_user_id=Column(String)
@@ -5,7 +5,8 @@ from typing import Optional
 import httpx
 from fastapi import HTTPException,status
 from jwt import ExpiredSignatureError, InvalidTokenError
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
 import jwt
 from app.models.user import User
@@ -82,8 +83,8 @@ class AuthService:
             )
 
     @staticmethod
-    def get_or_create_user(
-            db:Session,
+    async def get_or_create_user(
+            db:AsyncSession,
             google_user_info:dict,
             google_refresh_token:Optional[str]=None,
             google_access_token:Optional[str]=None,
@@ -94,7 +95,7 @@ class AuthService:
         google_id=google_user_info.get("sub")
 
        # Check if user exist
-        user=db.query(User).filter(User.email==email).first()
+        user=await db.scalar(select(User).where(User.email==email))
 
         if not user:
             # Create New User
@@ -107,18 +108,18 @@ class AuthService:
                 credits=5
             )
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
         else:
             #update user info if changed
             user.name=google_user_info.get("name", user.name)
             user.img_url=google_user_info.get("picture",user.img_url)
 
         # Check if auth record exists
-        user_auth=db.query(UserAuth).filter(
+        user_auth=await db.scalar(select(UserAuth).where(
             UserAuth.user_id==user.user_id,
             UserAuth.auth_method=="google"
-        ).first()
+        ))
 
         token_expiry = datetime.now()+timedelta(seconds=expires_in)
 
@@ -141,18 +142,18 @@ class AuthService:
             if google_access_token:
                 user_auth.google_access_token = google_access_token
                 user_auth.google_token_expiry=token_expiry
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
 
         return user
 
     @staticmethod
-    def update_user_refresh_token(db:Session,user_id:int,refresh_token:str):
+    async def update_user_refresh_token(db:AsyncSession,user_id:int,refresh_token:str):
         """Update user's JWT refresh token in database"""
-        user_auth = db.query(UserAuth).filter(
+        user_auth = await db.scalar(select(UserAuth).where(
             UserAuth.user_id==user_id,
             UserAuth.auth_method=="google"
-        ).first()
+        ))
         if user_auth:
             user_auth.refresh_token=refresh_token
-            db.commit()
+            await db.commit()
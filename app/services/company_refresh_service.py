@@ -0,0 +1,175 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.http_client import get_http_client
+from app.core.metrics import stage_timer
+from app.db.prep_cache_db import PrepCacheDB
+from app.db.sessions import SessionLocal
+from app.models.company_pages import CompanyPages
+from app.services.crawl_scheduler import crawl_scheduler
+from app.services.scrape_service import MAX_CHARS_PER_PAGE
+from app.utils.boilerplate import BoilerplateFilter
+from app.utils.hashing import text_hash
+from app.utils.html_pipeline import parse_document
+from app.utils.single_flight import SingleFlight
+
+# A static re-fetch only reproduces pages that were fetched statically in the first place
+REFRESHABLE_SCRAPE_MODE = "static"
+
+# A page that now comes back nearly empty (blocked, or turned into a JS shell) keeps its old text
+MIN_REFRESH_TEXT_CHARS = 200
+
+# Background refreshes running in this process, keyed by company id
+refresh_flights = SingleFlight()
+
+
+class CompanyRefresh:
+    """
+    Incremental re-crawl of an existing company's pages, in the background: preps use the
+    stored pages and never wait for it.
+
+    Only pages first scraped statically are re-fetched (Playwright-rendered ones would come
+    back without what their scripts rendered). Each is re-validated with If-None-Match /
+    If-Modified-Since. 304 -> only checked_at moves. 200 -> text is re-extracted and
+    page_content is rewritten only when its hash changed.
+    """
+
+    @staticmethod
+    def refreshable(pages_rows: List[CompanyPages]) -> List[CompanyPages]:
+        return [row for row in pages_rows if row.scrape_mode == REFRESHABLE_SCRAPE_MODE]
+
+    @staticmethod
+    def last_checked(row: CompanyPages) -> Optional[datetime]:
+        value = row.checked_at or row.scraped_at
+        if not value:
+            return None
+        try:
+            checked = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+        return checked if checked.tzinfo else checked.replace(tzinfo=timezone.utc)
+
+    @staticmethod
+    def is_stale(pages_rows: List[CompanyPages]) -> bool:
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.COMPANY_REFRESH_AFTER_HOURS)
+        for row in CompanyRefresh.refreshable(pages_rows):
+            checked = CompanyRefresh.last_checked(row)
+            if checked is None or checked < cutoff:
+                return True
+        return False
+
+    @staticmethod
+    async def _revalidate(row: CompanyPages) -> Dict[str, Any]:
+        headers = {}
+        if row.etag:
+            headers["If-None-Match"] = row.etag
+        if row.last_modified:
+            headers["If-Modified-Since"] = row.last_modified
+
+        resp = await get_http_client().get(row.page_url, headers=headers)
+        if resp.status_code == 304:
+            return {"url": row.page_url, "status": 304, "text": ""}
+        resp.raise_for_status()
+
+        text = parse_document(resp.text, row.page_url).text
+        return {
+            "url": row.page_url,
+            "status": resp.status_code,
+            "text": text,
+            "etag": resp.headers.get("etag"),
+            "last_modified": resp.headers.get("last-modified"),
+        }
+
+    @staticmethod
+    def _strip_boilerplate(row: CompanyPages, pages_rows: List[CompanyPages], text: str) -> str:
+        """Drop text the company's other stored pages already carry, as the first scrape did."""
+        boilerplate = BoilerplateFilter()
+        boilerplate.seed(other.page_content for other in pages_rows if other is not row)
+        return boilerplate.strip(text)[:MAX_CHARS_PER_PAGE]
+
+    @staticmethod
+    def refresh_in_background(company_id: int) -> None:
+        """Start refreshing the company's stale pages unless that's already running here; doesn't wait."""
+        refresh_flights.start(company_id, lambda: CompanyRefresh._refresh_company(company_id))
+
+    @staticmethod
+    def _load(company_id: int, db: Session) -> List[CompanyPages]:
+        return db.query(CompanyPages).filter(CompanyPages.company_id == company_id).all()
+
+    @staticmethod
+    async def _refresh_company(company_id: int) -> None:
+        # Own session: the prep that noticed the stale pages has moved on
+        db = SessionLocal()
+        try:
+            pages_rows = await asyncio.to_thread(CompanyRefresh._load, company_id, db)
+            # Another process may have refreshed them meanwhile
+            if not CompanyRefresh.is_stale(pages_rows):
+                return
+            with stage_timer("refresh"):
+                await CompanyRefresh.refresh_pages(pages_rows, db)
+        except Exception as e:
+            print(f"[ERROR] Company refresh failed for company {company_id}: {e}")
+        finally:
+            await asyncio.to_thread(db.close)
+
+    @staticmethod
+    async def refresh_pages(pages_rows: List[CompanyPages], db: Session) -> Dict[str, int]:
+        """Re-validate the refreshable rows among `pages_rows` (the others only seed boilerplate)."""
+        rows = CompanyRefresh.refreshable(pages_rows)
+        if not rows:
+            return {"checked": 0, "not_modified": 0, "unchanged": 0, "changed": 0, "failed": 0}
+
+        by_url = {row.page_url: row for row in rows}
+
+        async def _fetch(url: str) -> Dict[str, Any]:
+            return await CompanyRefresh._revalidate(by_url[url])
+
+        results = await crawl_scheduler.crawl(list(by_url), _fetch)
+        return await asyncio.to_thread(CompanyRefresh._apply, results, by_url, pages_rows, db)
+
+    @staticmethod
+    def _apply(results: List[Dict[str, Any]], by_url: Dict[str, CompanyPages], pages_rows: List[CompanyPages], db: Session) -> Dict[str, int]:
+        stats = {"checked": len(by_url), "not_modified": 0, "unchanged": 0, "changed": 0, "failed": 0}
+        now = datetime.now(timezone.utc).isoformat()
+
+        # Failed / robots-disallowed pages count as checked too, so they aren't retried on every prep
+        for row in by_url.values():
+            row.checked_at = now
+
+        answered = set()
+        for res in results:
+            row = by_url[res["url"]]
+            answered.add(res["url"])
+            if res["status"] == 304:
+                stats["not_modified"] += 1
+                continue
+
+            row.etag = res.get("etag")
+            row.last_modified = res.get("last_modified")
+            text = CompanyRefresh._strip_boilerplate(row, pages_rows, res["text"])
+            if len(text) < MIN_REFRESH_TEXT_CHARS and len(row.page_content or "") > len(text):
+                stats["unchanged"] += 1
+                continue
+
+            new_hash = text_hash(text)
+            if new_hash == (row.content_hash or text_hash(row.page_content)):
+                row.content_hash = new_hash
+                stats["unchanged"] += 1
+                continue
+
+            row.page_content = text
+            row.content_hash = new_hash
+            row.scraped_at = now
+            stats["changed"] += 1
+
+        stats["failed"] = len(by_url) - len(answered)
+        if stats["changed"]:
+            # Cached preps were generated from the old text
+            PrepCacheDB.invalidate_company(pages_rows[0].company_id, db)
+        db.commit()
+        print(f"[INFO] Company refresh: {stats}")
+        return stats
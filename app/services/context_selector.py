@@ -0,0 +1,168 @@
+# app/services/context_selector.py
+"""
+Relevance-ranked company context.
+
+Instead of sending every CompanyPages row in full to Gemini, pages are split into
+chunks, ranked with BM25 against the job description (and, with a lower weight,
+the resume), and the best chunks are packed into PREP_CONTEXT_TOKEN_BUDGET.
+
+A slice of the budget is reserved for the opening chunk of "about"-type pages and the
+homepage, since the About/Mission/Vision section needs them even when they share
+no words with the job description.
+"""
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+CHARS_PER_TOKEN = 4
+CHUNK_CHARS = 1200
+ANCHOR_BUDGET_SHARE = 0.25
+ANCHOR_KEYWORDS = ["home", "about", "mission", "vision", "values", "who-we-are", "our-story", "culture"]
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+RESUME_WEIGHT = 0.5
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it",
+    "its", "of", "on", "or", "our", "that", "the", "their", "this", "to", "we", "will", "with", "you",
+    "your", "us", "was", "were", "can", "all", "any", "more", "not", "but", "if", "into", "about",
+}
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.\-]*[a-z0-9+#]|[a-z0-9]")
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+def chunk_text(text: str, size: int = CHUNK_CHARS) -> List[str]:
+    """Split on whitespace close to `size` chars so words aren't cut."""
+    text = (text or "").strip()
+    chunks = []
+    while text:
+        if len(text) <= size:
+            chunks.append(text)
+            break
+        cut = text.rfind(" ", 0, size)
+        if cut <= size // 2:
+            cut = size
+        chunks.append(text[:cut].strip())
+        text = text[cut:].strip()
+    return chunks
+
+
+class Chunk:
+    def __init__(self, page_index: int, position: int, text: str):
+        self.page_index = page_index
+        self.position = position
+        self.text = text
+        self.terms = Counter(tokenize(text))
+        self.length = sum(self.terms.values())
+        self.score = 0.0
+
+
+def _bm25(chunks: List[Chunk], query: Dict[str, float]) -> None:
+    n = len(chunks)
+    avg_len = (sum(c.length for c in chunks) / n) or 1.0
+    df = Counter()
+    for c in chunks:
+        df.update(c.terms.keys())
+    for c in chunks:
+        score = 0.0
+        for term, weight in query.items():
+            tf = c.terms.get(term)
+            if not tf:
+                continue
+            idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+            score += weight * idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * c.length / avg_len))
+        c.score = score
+
+
+def _query_weights(job_desc: str, resume: str) -> Dict[str, float]:
+    weights: Dict[str, float] = {}
+    for term in set(tokenize(job_desc)):
+        weights[term] = weights.get(term, 0.0) + 1.0
+    for term in set(tokenize(resume)):
+        weights[term] = weights.get(term, 0.0) + RESUME_WEIGHT
+    return weights
+
+
+def _is_anchor_page(page: Dict[str, str]) -> bool:
+    label = f"{page.get('page_title') or ''} {page.get('page_url') or ''}".lower()
+    return any(k in label for k in ANCHOR_KEYWORDS)
+
+
+def select_company_context(
+    pages: List[Dict[str, str]],
+    job_desc: str,
+    resume: str,
+    token_budget: Optional[int] = None,
+) -> Tuple[List[Dict[str, str]], Dict[str, int]]:
+    """
+    pages: [{"page_title", "page_url", "page_content"}] as built by company_page_to_dict.
+    Returns the same shape with page_content cut down to the selected chunks, plus stats.
+    """
+    token_budget = token_budget or settings.PREP_CONTEXT_TOKEN_BUDGET
+    tokens_before = sum(estimate_tokens(p.get("page_content")) for p in pages)
+    stats = {"tokens_before": tokens_before, "tokens_after": tokens_before, "chunks_total": 0, "chunks_selected": 0}
+    if tokens_before <= token_budget:
+        return pages, stats
+
+    chunks: List[Chunk] = []
+    for i, page in enumerate(pages):
+        for pos, text in enumerate(chunk_text(page.get("page_content"))):
+            chunks.append(Chunk(i, pos, text))
+    stats["chunks_total"] = len(chunks)
+    if not chunks:
+        return pages, stats
+
+    _bm25(chunks, _query_weights(job_desc, resume))
+
+    selected: List[Chunk] = []
+    taken = set()
+    used = 0
+
+    def _take(c: Chunk, limit: int) -> bool:
+        nonlocal used
+        cost = estimate_tokens(c.text)
+        if id(c) in taken or used + cost > limit:
+            return False
+        taken.add(id(c))
+        selected.append(c)
+        used += cost
+        return True
+
+    # 1) opening chunk of home/about-type pages, within the reserved share
+    anchor_limit = int(token_budget * ANCHOR_BUDGET_SHARE)
+    for c in chunks:
+        if c.position == 0 and _is_anchor_page(pages[c.page_index]):
+            _take(c, anchor_limit)
+
+    # 2) everything else by relevance; chunks sharing no terms with the query are dropped
+    for c in sorted(chunks, key=lambda c: c.score, reverse=True):
+        if c.score <= 0:
+            break
+        _take(c, token_budget)
+
+    by_page: Dict[int, List[Chunk]] = {}
+    for c in selected:
+        by_page.setdefault(c.page_index, []).append(c)
+
+    out: List[Dict[str, str]] = []
+    for i, page in enumerate(pages):
+        page_chunks = sorted(by_page.get(i, []), key=lambda c: c.position)
+        if not page_chunks:
+            continue
+        out.append({**page, "page_content": " … ".join(c.text for c in page_chunks)})
+
+    stats["chunks_selected"] = len(selected)
+    stats["tokens_after"] = sum(estimate_tokens(p["page_content"]) for p in out)
+    return out, stats
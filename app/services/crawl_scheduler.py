@@ -0,0 +1,153 @@
+# app/services/crawl_scheduler.py
+"""
+Crawl scheduler for internal pages.
+
+Replaces the "fetch one link, sleep 1s, fetch the next" loops in the scrapers:
+- Every host gets a token bucket; robots.txt Crawl-delay (if any) slows it down further
+- Concurrency is bounded per host and for the whole process
+- Once the character budget is reached, outstanding fetches are cancelled
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from app.core.config import settings
+from app.utils.robot_parser import get_crawl_delay, is_scraping_allowed
+
+PageFetcher = Callable[[str], Awaitable[Optional[Dict[str, Any]]]]
+
+MAX_TRACKED_HOSTS = 1024
+
+
+class HostBucket:
+    """Token bucket + concurrency cap for one host."""
+
+    def __init__(self, interval_sec: float, burst: int, max_concurrency: int):
+        self.interval_sec = interval_sec
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+    def set_interval(self, interval_sec: float, burst: int) -> None:
+        self.interval_sec = interval_sec
+        self.burst = burst
+        self.tokens = min(self.tokens, float(burst))
+
+    async def take(self) -> None:
+        if self.interval_sec <= 0:
+            return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(float(self.burst), self.tokens + (now - self.updated) / self.interval_sec)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) * self.interval_sec)
+
+
+class CrawlScheduler:
+    def __init__(self, min_interval_sec: float, burst: int, per_host_concurrency: int, global_concurrency: int):
+        self.min_interval_sec = min_interval_sec
+        self.burst = burst
+        self.per_host_concurrency = per_host_concurrency
+        self._global = asyncio.Semaphore(global_concurrency)
+        self._hosts: "OrderedDict[str, HostBucket]" = OrderedDict()
+
+    async def _bucket_for(self, url: str) -> HostBucket:
+        host = urlparse(url).netloc
+        crawl_delay = await get_crawl_delay(url)
+        if crawl_delay is not None and crawl_delay > self.min_interval_sec:
+            interval, burst = crawl_delay, 1
+        else:
+            interval, burst = self.min_interval_sec, self.burst
+
+        bucket = self._hosts.get(host)
+        if bucket is None:
+            bucket = HostBucket(interval, burst, self.per_host_concurrency)
+            self._hosts[host] = bucket
+            while len(self._hosts) > MAX_TRACKED_HOSTS:
+                self._hosts.popitem(last=False)
+        else:
+            bucket.set_interval(interval, burst)
+            self._hosts.move_to_end(host)
+        return bucket
+
+    async def crawl(
+        self,
+        links: List[str],
+        fetch_page: PageFetcher,
+        max_total_chars: Optional[int] = None,
+        action: str = "scrape",
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch `links` concurrently with fetch_page(link) -> {"key", "url", "text"} | None.
+        Links disallowed by robots.txt are skipped, failures are logged and skipped.
+        Results come back in the order of `links`. When the summed "text" length reaches
+        `max_total_chars`, fetches still in flight are cancelled. `action` words the failure log
+        ("Failed to <action> <link>").
+        """
+        if not links:
+            return []
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(links)
+        total_chars = 0
+        budget_hit = asyncio.Event()
+
+        async def _one(index: int, link: str) -> None:
+            nonlocal total_chars
+            if not await is_scraping_allowed(link):
+                return
+            bucket = await self._bucket_for(link)
+            # Host slot first: links queued behind one host's cap must not hold global slots
+            # that other hosts could use
+            async with bucket.semaphore, self._global:
+                if budget_hit.is_set():
+                    return
+                await bucket.take()
+                try:
+                    page = await fetch_page(link)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"[ERROR] Failed to {action} {link}: {e}")
+                    return
+            if not page or budget_hit.is_set():
+                return
+            results[index] = page
+            total_chars += len(page.get("text") or "")
+            if max_total_chars is not None and total_chars >= max_total_chars:
+                budget_hit.set()
+
+        tasks = [asyncio.create_task(_one(i, link)) for i, link in enumerate(links)]
+        stopper = asyncio.create_task(budget_hit.wait())
+        try:
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending | {stopper}, return_when=asyncio.FIRST_COMPLETED)
+                pending.discard(stopper)
+                if budget_hit.is_set():
+                    for t in pending:
+                        t.cancel()
+                    await asyncio.gather(*pending, return_exceptions=True)
+                    break
+        finally:
+            stopper.cancel()
+            for t in tasks:
+                if not t.done():
+                    t.cancel()
+
+        return [r for r in results if r is not None]
+
+
+crawl_scheduler = CrawlScheduler(
+    min_interval_sec=settings.CRAWL_HOST_MIN_INTERVAL_SEC,
+    burst=settings.CRAWL_HOST_BURST,
+    per_host_concurrency=settings.CRAWL_PER_HOST_CONCURRENCY,
+    global_concurrency=settings.CRAWL_GLOBAL_CONCURRENCY,
+)
@@ -0,0 +1,187 @@
+# app/services/favicon_store.py
+"""
+Content-addressed favicon store.
+
+- Favicons are fetched with the shared async client and capped at FAVICON_MAX_BYTES;
+  the URL comes from the scraped page, so only public hosts are fetched (each redirect
+  hop is checked) and only image bodies are stored
+- Files are named only by the sha256 of their bytes, so the same CDN icon used by
+  many companies is stored once
+- Company.image holds the public URL of the stored file (served by app/api/favicon.py)
+"""
+import asyncio
+import hashlib
+import os
+import re
+import time
+from typing import Optional, Set
+
+from app.core.config import settings
+from app.core.http_client import get_http_client
+from app.utils.url import is_public_url
+
+EXTENSIONS = {
+    "png": ".png",
+    "svg": ".svg",
+    "jpeg": ".jpg",
+    "jpg": ".jpg",
+    "gif": ".gif",
+    "webp": ".webp",
+    "icon": ".ico",
+}
+FILENAME_RE = re.compile(r"^[0-9a-f]{64}\.(ico|png|svg|jpg|gif|webp)$")
+MIN_FAVICON_BYTES = 50
+MAX_REDIRECTS = 5
+
+
+def _signature(content: bytes) -> Optional[str]:
+    if content.startswith(b"\x89PNG\r\n\x1a\n"):
+        return ".png"
+    if content.startswith(b"\x00\x00\x01\x00"):
+        return ".ico"
+    if content.startswith((b"GIF87a", b"GIF89a")):
+        return ".gif"
+    if content.startswith(b"\xff\xd8\xff"):
+        return ".jpg"
+    if content.startswith(b"RIFF") and content[8:12] == b"WEBP":
+        return ".webp"
+    head = content[:512].lstrip()
+    if head.startswith(b"<svg") or (head.startswith(b"<?xml") and b"<svg" in head):
+        return ".svg"
+    return None
+
+
+def _extension(content_type: str, content: bytes) -> Optional[str]:
+    """File extension for an icon, or None if the response isn't one (HTML, JSON, ...)."""
+    signature = _signature(content)
+    if signature:
+        return signature
+    ctype = (content_type or "").split(";")[0].strip().lower()
+    if not ctype.startswith("image/"):
+        return None
+    for key, ext in EXTENSIONS.items():
+        if key in ctype:
+            return ext
+    return None
+
+
+def _write_if_missing(path: str, content: bytes) -> None:
+    if os.path.exists(path):
+        return
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+class FaviconStore:
+    def __init__(self, save_dir: str, max_bytes: int, public_base_url: str):
+        self.save_dir = save_dir
+        self.max_bytes = max_bytes
+        self.public_base_url = public_base_url.rstrip("/")
+
+    def public_url(self, filename: str) -> str:
+        return f"{self.public_base_url}/{filename}"
+
+    def is_stored(self, url: Optional[str]) -> bool:
+        return bool(url) and url.startswith(self.public_base_url + "/")
+
+    def path_for(self, filename: str) -> Optional[str]:
+        if not FILENAME_RE.match(filename):
+            return None
+        return os.path.join(self.save_dir, filename)
+
+    async def _download(self, favicon_url: str) -> Optional[tuple]:
+        # The URL comes from a scraped page: every hop, redirects included, must be a public host
+        url = favicon_url
+        for _ in range(MAX_REDIRECTS + 1):
+            if not await is_public_url(url):
+                print(f"[WARN] Favicon {favicon_url} points at a non-public host ({url}), skipped")
+                return None
+            async with get_http_client().stream("GET", url, follow_redirects=False) as r:
+                if r.is_redirect:
+                    location = r.headers.get("location")
+                    if not location:
+                        return None
+                    url = str(r.url.join(location))
+                    continue
+                if r.status_code != 200:
+                    return None
+                chunks = []
+                size = 0
+                async for chunk in r.aiter_bytes():
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        print(f"[WARN] Favicon {favicon_url} over {self.max_bytes} bytes, skipped")
+                        return None
+                    chunks.append(chunk)
+                return b"".join(chunks), r.headers.get("content-type", "")
+        print(f"[WARN] Favicon {favicon_url} redirected more than {MAX_REDIRECTS} times, skipped")
+        return None
+
+    async def store(self, favicon_url: Optional[str]) -> Optional[str]:
+        """
+        Fetch + store the favicon and return its public URL, or None if it couldn't be stored
+        (callers keep the original URL in that case).
+        """
+        if not favicon_url or self.is_stored(favicon_url):
+            return favicon_url or None
+        try:
+            downloaded = await self._download(favicon_url)
+            if downloaded is None:
+                return None
+            content, content_type = downloaded
+            if len(content) < MIN_FAVICON_BYTES:
+                return None
+
+            extension = _extension(content_type, content)
+            if extension is None:
+                print(f"[WARN] Favicon {favicon_url} is not an image ({content_type or 'no content type'}), skipped")
+                return None
+
+            filename = hashlib.sha256(content).hexdigest() + extension
+            os.makedirs(self.save_dir, exist_ok=True)
+            await asyncio.to_thread(_write_if_missing, os.path.join(self.save_dir, filename), content)
+            return self.public_url(filename)
+        except Exception as e:
+            print(f"[WARN] Failed to store favicon {favicon_url}: {e}")
+            return None
+
+    def prune(self, referenced_urls: Set[str], min_age_sec: int = 24 * 60 * 60) -> int:
+        """Delete stored files no Company/Project references any more (older than min_age_sec)."""
+        if not os.path.isdir(self.save_dir):
+            return 0
+        keep = {u.rsplit("/", 1)[-1] for u in referenced_urls if self.is_stored(u)}
+        removed = 0
+        now = time.time()
+        for filename in os.listdir(self.save_dir):
+            path = self.path_for(filename)
+            if path is None or filename in keep:
+                continue
+            if now - os.path.getmtime(path) < min_age_sec:
+                continue
+            os.remove(path)
+            removed += 1
+        return removed
+
+
+favicon_store = FaviconStore(
+    save_dir=settings.FAVICON_DIR,
+    max_bytes=settings.FAVICON_MAX_BYTES,
+    public_base_url=settings.FAVICON_PUBLIC_BASE_URL,
+)
+
+
+if __name__ == "__main__":
+    # python -m app.services.favicon_store  -> evict favicons nothing points at
+    from app.db.sessions import SessionLocal
+    from app.models.company import Company
+    from app.models.project import Project
+
+    db = SessionLocal()
+    try:
+        referenced = {u for (u,) in db.query(Company.image).distinct() if u}
+        referenced |= {u for (u,) in db.query(Project.company_logo).distinct() if u}
+    finally:
+        db.close()
+    print(f"Removed {favicon_store.prune(referenced)} unreferenced favicons")
@@ -1,101 +1,425 @@
+import asyncio
+import time
+from contextlib import aclosing
 from datetime import datetime, timezone
-from typing import List, cast
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, cast
 
 from fastapi import HTTPException,status
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
+from app.core.metrics import observe_stage, stage_timer
+from app.db.credit_db import PrepCredit
+from app.db.prep_cache_db import PrepCacheDB, prep_input_hash
 from app.db.prep_db import PrepDB
+from app.db.sessions import SessionLocal
+from app.db.tos_db import TosVerdictDB, host_of, policy_hash
 from app.models.company import Company
 from app.models.company_pages import CompanyPages
-from app.models.user import User
 from app.services.auth_services import AuthService
+from app.services.company_refresh_service import CompanyRefresh
+from app.services.context_selector import select_company_context
+from app.services.favicon_store import favicon_store
 from app.services.prompt_service import PromptService
 from app.services.scrape_service import get_scraped_data
 from app.services.tos_extractor import get_tos_data
 from app.utils.convert import company_page_to_dict
+from app.utils.fetch_context import FetchContext
+from app.utils.hashing import text_hash
+from app.utils.single_flight import SingleFlight
 
+# First-time company scrapes in flight, keyed by normalised base URL (valid_base_url)
+company_flights = SingleFlight()
+# Generations in flight, keyed by (user, prep input hash): a double submit generates once
+prep_flights = SingleFlight()
 
+# progress(event, data): called as pipeline stages start/finish; used by the SSE endpoint
+ProgressFn = Callable[[str,Dict[str,Any]],None]
+
+
+def _emit(progress:Optional[ProgressFn],event:str,**data):
+    if progress is not None:
+        progress(event,data)
 
 
 class InterviewPrep:
 
     @staticmethod
-    async def site_complaince(url:str):
-        tos_data = await get_tos_data(url)
-        allow_scrape_tos = PromptService.tos_prompt(tos_data)
+    async def site_complaince(url:str,db:Session,fetch_ctx:Optional[FetchContext]=None):
+        tos_data = await get_tos_data(url,fetch_ctx)
+        if not tos_data.get("pages"):
+            return await PromptService.tos_prompt_async(tos_data)
+
+        # Same host + same policy text -> reuse the stored verdict, skip the LLM
+        host = host_of(url)
+        text_hash_value = policy_hash(tos_data)
+        cached = await asyncio.to_thread(TosVerdictDB.get_verdict,host,text_hash_value,db)
+        if cached is not None:
+            return cached
+
+        allow_scrape_tos = await PromptService.tos_prompt_async(tos_data)
+        await asyncio.to_thread(TosVerdictDB.save_verdict,host,text_hash_value,allow_scrape_tos,db)
         return allow_scrape_tos
 
+    @staticmethod
+    async def _timed(label:str,url:str,coro:Awaitable,progress:Optional[ProgressFn]=None,stage:Optional[str]=None):
+        started = time.perf_counter()
+        outcome = "ok"
+        if stage:
+            _emit(progress,"stage",stage=stage,status="started")
+        try:
+            return await coro
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            elapsed = time.perf_counter()-started
+            print(f"[INFO] {label} for {url}: {outcome} in {elapsed:.2f}s")
+            if stage:
+                observe_stage(stage,outcome,elapsed)
+                _emit(progress,"stage",stage=stage,status=outcome,elapsed_sec=round(elapsed,2))
+
+    @staticmethod
+    async def speculative_scrape(url:str,db:Session,progress:Optional[ProgressFn]=None)->Dict[str,Any]:
+        """
+        Run the ToS check and the company scrape side by side.
+        Scraped pages stay in memory until the verdict is in: allow -> returned for saving,
+        deny (or a failed ToS check) -> the scrape is cancelled and its result discarded.
+        """
+        # One fetch cache for the whole pipeline: ToS, site type, scrape and favicon share the homepage
+        fetch_ctx = FetchContext()
+        tos_task = asyncio.create_task(
+            InterviewPrep._timed("ToS check",url,InterviewPrep.site_complaince(url,db,fetch_ctx),progress,"tos_check")
+        )
+        scrape_task = asyncio.create_task(
+            InterviewPrep._timed("Speculative scrape",url,get_scraped_data(url,fetch_ctx),progress,"scrape")
+        )
+        try:
+            allow_scrape_tos = await tos_task
+        except BaseException:
+            scrape_task.cancel()
+            await asyncio.gather(scrape_task,return_exceptions=True)
+            raise
+
+        if not allow_scrape_tos:
+            scrape_task.cancel()
+            await asyncio.gather(scrape_task,return_exceptions=True)
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Scraping not allowed by the site's Terms/Privacy policy."
+            )
+        return await scrape_task
+
 
 
     @staticmethod
-    async def create_prep(resume:str,url:str,job_desc:str,token:str,db:Session):
+    async def _create_company(url:str,progress:Optional[ProgressFn]=None)->int:
+        """
+        ToS check + scrape + insert for a company we haven't seen. Runs as a single-flight task
+        with its own session, so it outlives any one caller. Returns the company id.
+        """
+        db = SessionLocal()
+        try:
+            # Another process may have finished it while this one was queued
+            existing = await asyncio.to_thread(InterviewPrep._company_id,url,db)
+            if existing is not None:
+                return existing
+
+            # ToS check + scrape run in parallel; pages are only persisted after an allow verdict
+            scraped = await InterviewPrep.speculative_scrape(url,db,progress)
+            scraped_data = scraped.get("company_data",scraped)
+            favicon_url = scraped_data.get("favicon_url")
+            image = await favicon_store.store(favicon_url) or favicon_url
+            return await asyncio.to_thread(InterviewPrep._insert_company,url,scraped_data,image,db)
+        finally:
+            await asyncio.to_thread(db.close)
+
+    @staticmethod
+    def _company_id(url:str,db:Session)->Optional[int]:
+        return db.query(Company.company_id).filter(Company.url==url).scalar()
+
+    @staticmethod
+    def _insert_company(url:str,scraped_data:Dict[str,Any],image:Optional[str],db:Session)->int:
+        try:
+            # Unique company URL: a process that lost the race keeps the winner's row and pages
+            company_id = db.execute(
+                pg_insert(Company)
+                .values(url=url,name=scraped_data.get("company_name_guess"),image=image)
+                .on_conflict_do_nothing(index_elements=[Company.url])
+                .returning(Company.company_id)
+            ).scalar()
+            if company_id is None:
+                db.rollback()
+                return InterviewPrep._company_id(url,db)
+
+            now = datetime.now(timezone.utc).isoformat()
+            seen = set()
+            for p in scraped_data.get("pages",[]):
+                page_url = p.get("url")
+                if not page_url or page_url in seen:
+                    continue
+                seen.add(page_url)
+                row = CompanyPages()
+                row.company_id=company_id
+                row.page_title=p.get("key")
+                row.page_url=page_url
+                row.page_content=p.get("text")
+                row.scraped_at=now
+                row.etag=p.get("etag")
+                row.last_modified=p.get("last_modified")
+                row.content_hash=text_hash(p.get("text"))
+                row.checked_at=now
+                row.scrape_mode=p.get("scrape_mode")
+                db.add(row)
+            # Company and its pages become visible together
+            db.commit()
+            return company_id
+        except Exception:
+            db.rollback()
+            raise
+
+    @staticmethod
+    def verify_access(token:str)->dict:
         payload=AuthService.verify_token(token,"access")
         if not payload:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,detail="Unauthorised Access")
-        pages_rows: List[CompanyPages] = []
+        return payload
+
+    @staticmethod
+    def _stored_company(url:str,db:Session)->Tuple[Optional[Company],List[CompanyPages]]:
         company = db.query(Company).filter(Company.url==url).first()
+        if company is None:
+            return None, []
+        pages_rows = cast(
+            List[CompanyPages],
+            db.query(CompanyPages).filter(CompanyPages.company_id == company.company_id).all()
+        )
+        return company, pages_rows
+
+    @staticmethod
+    def _cached_for_stored(resume:str,url:str,job_desc:str,payload:dict,db:Session)->Optional[Tuple[int,Any]]:
+        """The cache lookup on the company's stored pages, before any credit, scrape or Gemini work."""
+        if not settings.PREP_DEDUP_ENABLED:
+            return None
+        company, pages_rows = InterviewPrep._stored_company(url,db)
+        if company is None:
+            return None
+        return InterviewPrep._cached_result(payload,url,prep_input_hash(resume,company.company_id,pages_rows,job_desc),db)
+
+    @staticmethod
+    async def _prepare(resume:str,url:str,job_desc:str,payload:dict,db:Session,progress:Optional[ProgressFn]=None)->Tuple[int,dict,str]:
+        """
+        Company lookup/scrape and context selection for an already authenticated user whose credit is reserved.
+        Returns (company_id, prep_data, input_hash); input_hash keys the prep result cache.
+        DB work runs in threads; every commit on `db` expires the loaded rows, so they are read first.
+        """
+        company, pages_rows = await asyncio.to_thread(InterviewPrep._stored_company,url,db)
         print(payload)
-        user = db.query(User).filter(User.user_id==payload.get("sub")).first()
-        if user.credits<0:
-            raise HTTPException(status_code=status.HTTP_402_PAYMENT_REQUIRED,detail="You have run out of credits")
         if company is not None:
-            pages_rows = cast(
-                List[CompanyPages],
-                db.query(CompanyPages).filter(CompanyPages.company_id == company.company_id).all()
-            )
-
+            # Stale pages are re-validated in the background; this prep goes ahead on what's stored
+            if settings.COMPANY_REFRESH_ENABLED and CompanyRefresh.is_stale(pages_rows):
+                CompanyRefresh.refresh_in_background(company.company_id)
         else:
-            allow_scrape_tos = await InterviewPrep.site_complaince(url)
-            if not allow_scrape_tos:
-                raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Scraping not allowed by the site's Terms/Privacy policy."
-                )
-            if allow_scrape_tos:
-                scraped =await get_scraped_data(url)
-                scraped_data = scraped.get("company_data",scraped)
-                pages = scraped_data.get("pages",[])
-                name_guess = scraped_data.get("company_name_guess")
-                new_company = Company(url=url)
-                new_company.name = name_guess
-                new_company.image = scraped_data.get("favicon_url")
-                db.add(new_company)
-                db.commit()
-                db.refresh(new_company)
-                company = new_company
-                now = datetime.now(timezone.utc).isoformat()
-                for p in pages:
-                    page_url = p.get("url")
-                    if not page_url:
-                        continue
-
-                    exists=(
-                        db.query(CompanyPages).filter(CompanyPages.company_id == new_company.company_id,
-                    CompanyPages.page_url == page_url).first()
-                    )
-                    if exists:
-                        continue
-                    row = CompanyPages()
-                    row.company_id=new_company.company_id
-                    row.page_title=p.get("key")
-                    row.page_url=page_url
-                    row.page_content=p.get("text")
-                    row.scraped_at=now
-                    db.add(row)
-                db.commit()
-
-                pages_rows = cast(
-                    List[CompanyPages],
-                    db.query(CompanyPages)
-                    .filter(CompanyPages.company_id == new_company.company_id)
-                    .all()
-                )
+            # Concurrent first-time preps for the same company share one ToS check + scrape
+            await company_flights.do(url,lambda: InterviewPrep._create_company(url,progress))
+            company, pages_rows = await asyncio.to_thread(InterviewPrep._stored_company,url,db)
 
+        company_id = company.company_id
+        image = company.image
+        input_hash = prep_input_hash(resume,company_id,pages_rows,job_desc)
         company_data_clean = [company_page_to_dict(p) for p in pages_rows]
+        if settings.PREP_CONTEXT_SELECTION_ENABLED:
+            # Only the chunks relevant to this JD/resume, packed into the token budget
+            with stage_timer("context_selection"):
+                company_data_clean, context_stats = select_company_context(company_data_clean,job_desc,resume)
+            print(f"[INFO] Company context for {url}: {context_stats}")
         prep_data = {"resume":resume,
             "company_data":company_data_clean,
             "job_description":job_desc}
-        result = PromptService.create_prep_prompt(prep_data)
+
+        # Companies created before the favicon store still hot-link; move them over once
+        if image and not favicon_store.is_stored(image):
+            stored = await favicon_store.store(image)
+            if stored:
+                company.image = stored
+                await asyncio.to_thread(db.commit)
+        return company_id, prep_data, input_hash
+
+    @staticmethod
+    def _cached_result(payload:dict,url:str,input_hash:str,db:Session)->Optional[Tuple[int,Any]]:
+        if not settings.PREP_DEDUP_ENABLED:
+            return None
+        cached = PrepCacheDB.get_result(payload.get("sub"),input_hash,db)
+        if cached is not None:
+            print(f"[INFO] Prep for {url} served from cache (project {cached[0]}), {PrepCacheDB.metrics()}")
+        return cached
+
+    @staticmethod
+    def _save(payload:dict,company_id:int,input_hash:str,result,db:Session)->int:
         created =datetime.now(timezone.utc).isoformat()
-        PrepDB.interview_prep_save(payload.get("sub"),company.company_id,created,result,db)
-        return result
\ No newline at end of file
+        with stage_timer("save"):
+            prep_id = PrepDB.interview_prep_save(payload.get("sub"),company_id,created,result,db)
+        if settings.PREP_DEDUP_ENABLED:
+            # The prep (and its credit) is already committed; a cache write failure must not undo that
+            try:
+                PrepCacheDB.save_result(payload.get("sub"),company_id,input_hash,prep_id,result,db)
+            except Exception as e:
+                print(f"[WARN] Could not cache prep {prep_id}: {e}")
+        return prep_id
+
+    @staticmethod
+    async def _generate(payload:dict,company_id:int,input_hash:str,prep_data:dict,credit:PrepCredit,
+                        on_section:Optional[Callable[[str,Any],None]]=None)->Tuple[int,Any]:
+        """
+        Gemini generation + save, run as a prep_flights task with its own session so it outlives
+        any one caller. It holds the credit of the caller that started it: failed() unless saved.
+        on_section(name, data) gets each part of the prep as it streams in (streamed generation).
+        """
+        db = SessionLocal()
+        saved = False
+        try:
+            if on_section is None:
+                result = await PromptService.create_prep_prompt_async(prep_data)
+            else:
+                result = None
+                async for kind, value in PromptService.create_prep_prompt_stream(prep_data):
+                    if kind == "section":
+                        on_section(*value)
+                    else:
+                        result = value
+            prep_id = await asyncio.to_thread(InterviewPrep._save,payload,company_id,input_hash,result,db)
+            saved = True
+            return prep_id, result
+        finally:
+            if not saved:
+                await asyncio.to_thread(credit.failed,db)
+            await asyncio.to_thread(db.close)
+
+    @staticmethod
+    async def _drain(task:asyncio.Future,events:asyncio.Queue)->AsyncIterator[Tuple[str,Dict[str,Any]]]:
+        """Yield queued (event, data) pairs until `task` is done; cancels it if the consumer goes away first."""
+        try:
+            while not task.done() or not events.empty():
+                if events.empty():
+                    getter = asyncio.ensure_future(events.get())
+                    await asyncio.wait({task,getter},return_when=asyncio.FIRST_COMPLETED)
+                    if not getter.done():
+                        getter.cancel()
+                        continue
+                    yield getter.result()
+                else:
+                    yield events.get_nowait()
+        finally:
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task,return_exceptions=True)
+
+    @staticmethod
+    async def create_prep(resume:str,url:str,job_desc:str,token:str,db:Session):
+        payload = InterviewPrep.verify_access(token)
+        _, result = await InterviewPrep.run_prep(resume,url,job_desc,payload,db)
+        return result
+
+    @staticmethod
+    async def run_prep(resume:str,url:str,job_desc:str,payload:dict,db:Session,credit:Optional[PrepCredit]=None)->Tuple[int,Any]:
+        """
+        The whole pipeline for an authenticated user (token payload); returns (prep_id, result).
+        `credit` pays for it; by default the user's own credit, reserved and refunded on `db`.
+        """
+        credit = credit or PrepCredit(payload.get("sub"))
+        with stage_timer("total"):
+            # Resubmitted inputs (client retry / timeout) -> the existing project, before any credit, scrape or Gemini work
+            cached = await asyncio.to_thread(InterviewPrep._cached_for_stored,resume,url,job_desc,payload,db)
+            if cached is not None:
+                return cached
+
+            # Fails with 402 before any scrape / Gemini work; given back unless a new prep gets saved
+            await asyncio.to_thread(credit.reserve,db)
+            handed_over = False
+            finished = False
+            try:
+                company_id, prep_data, input_hash = await InterviewPrep._prepare(resume,url,job_desc,payload,db)
+                # The inputs changed (refresh / first scrape) and an identical prep may have finished meanwhile
+                cached = await asyncio.to_thread(InterviewPrep._cached_result,payload,url,input_hash,db)
+                if cached is not None:
+                    finished = True
+                    return cached
+
+                def generate():
+                    nonlocal handed_over
+                    handed_over = True
+                    return InterviewPrep._generate(payload,company_id,input_hash,prep_data,credit)
+
+                # Only the first caller's generate() runs and takes over its credit; the others share its result
+                outcome = await prep_flights.do((payload.get("sub"),input_hash),generate)
+                finished = True
+                return outcome
+            finally:
+                if not handed_over:
+                    await asyncio.to_thread(credit.release if finished else credit.failed,db)
+
+    @staticmethod
+    async def create_prep_stream(resume:str,url:str,job_desc:str,token:str,db:Session)->AsyncIterator[Tuple[str,Dict[str,Any]]]:
+        """
+        Same pipeline as create_prep, as (event, data) pairs for Server-Sent Events:
+        "stage" while ToS check / scrape / generation run, "section" for each part
+        of the prep as Gemini finishes it, then "done" once the result is validated and saved.
+        Errors propagate to the caller.
+        """
+        payload = InterviewPrep.verify_access(token)
+        cached = await asyncio.to_thread(InterviewPrep._cached_for_stored,resume,url,job_desc,payload,db)
+        if cached is not None:
+            yield "stage", {"stage":"generation","status":"cached"}
+            yield "done", {"prep_id":cached[0],"result":cached[1].model_dump()}
+            return
+
+        credit = PrepCredit(payload.get("sub"))
+        await asyncio.to_thread(credit.reserve,db)
+        handed_over = False
+        finished = False
+        try:
+            events: asyncio.Queue = asyncio.Queue()
+            push = lambda e,d: events.put_nowait((e,d))
+            prepare_task = asyncio.create_task(
+                InterviewPrep._prepare(resume,url,job_desc,payload,db,push)
+            )
+            async with aclosing(InterviewPrep._drain(prepare_task,events)) as stream:
+                async for event in stream:
+                    yield event
+            company_id, prep_data, input_hash = prepare_task.result()
+
+            cached = await asyncio.to_thread(InterviewPrep._cached_result,payload,url,input_hash,db)
+            if cached is not None:
+                finished = True
+                yield "stage", {"stage":"generation","status":"cached"}
+                yield "done", {"prep_id":cached[0],"result":cached[1].model_dump()}
+                return
+
+            yield "stage", {"stage":"generation","status":"started"}
+            started = time.perf_counter()
+
+            def generate():
+                nonlocal handed_over
+                handed_over = True
+                return InterviewPrep._generate(
+                    payload,company_id,input_hash,prep_data,credit,
+                    lambda name,data: push("section",{"name":name,"data":data}),
+                )
+
+            # A caller joining someone else's generation gets no sections, only the result
+            flight = asyncio.ensure_future(prep_flights.do((payload.get("sub"),input_hash),generate))
+            async with aclosing(InterviewPrep._drain(flight,events)) as stream:
+                async for event in stream:
+                    yield event
+            prep_id, result = flight.result()
+            finished = True
+            yield "stage", {"stage":"generation","status":"ok","elapsed_sec":round(time.perf_counter()-started,2)}
+            yield "done", {"prep_id":prep_id,"result":result.model_dump()}
+        finally:
+            # Also runs when the client disconnects (generator closed / cancelled)
+            if not handed_over:
+                await asyncio.to_thread(credit.release if finished else credit.failed,db)
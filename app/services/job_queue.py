@@ -0,0 +1,283 @@
+# app/services/job_queue.py
+"""
+Queue for prep jobs.
+
+POST /prep enqueues, app/workers/prep_worker.py claims and runs them. Backends are picked
+by PREP_QUEUE_BACKEND from QUEUE_BACKENDS; "database" keeps jobs in the prep_job table
+(Postgres in production, claims use FOR UPDATE SKIP LOCKED; also works on SQLite).
+
+Delivery is at-least-once: a claimed job is leased for PREP_JOB_VISIBILITY_TIMEOUT_SEC
+(workers extend the lease while running), and a job whose worker died becomes claimable
+again once the lease runs out, up to PREP_JOB_MAX_ATTEMPTS. extend / complete / fail only
+act for the current, unexpired lease holder, so a worker that lost its lease can't
+overwrite the outcome of the attempt that replaced it.
+"""
+import json
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.credit_db import CreditDB
+from app.models.prep_job import PrepJob
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class LeaseLost(Exception):
+    """The worker no longer holds the job's lease (it expired or the job went to another worker)."""
+
+
+class JobQueue(ABC):
+    @abstractmethod
+    def enqueue(self, user_id: int, payload: Dict[str, Any]) -> str:
+        """Store a job and return its id."""
+
+    @abstractmethod
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Lease the next runnable job: {"job_id", "user_id", "payload", "attempts"}, or None."""
+
+    @abstractmethod
+    def extend(self, job_id: str, worker_id: str) -> bool:
+        """Push the lease out again; False if the job is no longer ours."""
+
+    @abstractmethod
+    def hold_credit(self, job_id: str, worker_id: str) -> bool:
+        """
+        Make sure the job holds its user's credit: taken by the first attempt that gets here and
+        kept by re-deliveries. False if the user has none left; raises LeaseLost if the job isn't ours.
+        """
+
+    @abstractmethod
+    def release_credit(self, job_id: str, worker_id: str) -> None:
+        """Give the job's credit back (the prep didn't need it); a no-op without the lease."""
+
+    @abstractmethod
+    def complete(self, job_id: str, worker_id: str, prep_id: int) -> None:
+        """Mark the job done; a no-op if worker_id no longer holds the lease."""
+
+    @abstractmethod
+    def fail(self, job_id: str, worker_id: str, error: str, error_status: int, retryable: bool) -> None:
+        """
+        Record a failed attempt; retryable jobs go back to the queue (keeping their credit) until
+        max attempts, then fail for good and give the credit back. A no-op if worker_id no longer
+        holds the lease.
+        """
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+
+class DatabaseJobQueue(JobQueue):
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        visibility_timeout_sec: int,
+        max_attempts: int,
+        retry_backoff_sec: int,
+    ):
+        self.session_factory = session_factory
+        self.visibility_timeout = timedelta(seconds=visibility_timeout_sec)
+        self.max_attempts = max_attempts
+        self.retry_backoff_sec = retry_backoff_sec
+
+    def enqueue(self, user_id: int, payload: Dict[str, Any]) -> str:
+        now = _now()
+        job = PrepJob(
+            job_id=uuid.uuid4().hex,
+            user_id=user_id,
+            status=QUEUED,
+            payload=json.dumps(payload, ensure_ascii=False),
+            attempts=0,
+            available_at=now,
+            created_at=now,
+            updated_at=now,
+        )
+        with self.session_factory() as db:
+            db.add(job)
+            db.commit()
+            return job.job_id
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        with self.session_factory() as db:
+            while True:
+                now = _now()
+                # Queued jobs past their backoff, or running jobs whose lease ran out
+                job = (
+                    db.query(PrepJob)
+                    .filter(PrepJob.status.in_((QUEUED, RUNNING)), PrepJob.available_at <= now)
+                    .order_by(PrepJob.available_at)
+                    .with_for_update(skip_locked=True)
+                    .first()
+                )
+                if job is None:
+                    db.commit()
+                    return None
+                if job.attempts >= self.max_attempts:
+                    self._return_credit(db, job)
+                    self._finish(job, FAILED, now, error="Job timed out too many times")
+                    db.commit()
+                    continue
+
+                job.status = RUNNING
+                job.attempts += 1
+                job.locked_by = worker_id
+                job.available_at = now + self.visibility_timeout
+                job.updated_at = now
+                claimed = {
+                    "job_id": job.job_id,
+                    "user_id": job.user_id,
+                    "payload": json.loads(job.payload or "{}"),
+                    "attempts": job.attempts,
+                }
+                db.commit()
+                return claimed
+
+    def _owned(self, db: Session, job_id: str, worker_id: str) -> Optional[PrepJob]:
+        """The job, locked, if worker_id still holds an unexpired lease on it; otherwise None."""
+        return (
+            db.query(PrepJob)
+            .filter(
+                PrepJob.job_id == job_id,
+                PrepJob.status == RUNNING,
+                PrepJob.locked_by == worker_id,
+                # Past its lease the job is claimable again, even if nobody has taken it yet
+                PrepJob.available_at > _now(),
+            )
+            .with_for_update()
+            .first()
+        )
+
+    @staticmethod
+    def _finish(job: PrepJob, state: str, now: datetime, error: Optional[str] = None, error_status: Optional[int] = None) -> None:
+        job.status = state
+        job.payload = None
+        job.locked_by = None
+        job.error = error
+        job.error_status = error_status
+        job.updated_at = now
+
+    @staticmethod
+    def _return_credit(db: Session, job: PrepJob) -> None:
+        # Same transaction as the job update, so the credit can't be returned twice or lost
+        if job.credit_reserved:
+            CreditDB.give_back(job.user_id, db)
+            job.credit_reserved = False
+
+    def hold_credit(self, job_id: str, worker_id: str) -> bool:
+        with self.session_factory() as db:
+            job = self._owned(db, job_id, worker_id)
+            if job is None:
+                db.commit()
+                raise LeaseLost(job_id)
+            if not job.credit_reserved:
+                if not CreditDB.take(job.user_id, db):
+                    db.commit()
+                    return False
+                job.credit_reserved = True
+                job.updated_at = _now()
+            db.commit()
+            return True
+
+    def release_credit(self, job_id: str, worker_id: str) -> None:
+        with self.session_factory() as db:
+            job = self._owned(db, job_id, worker_id)
+            if job is not None:
+                self._return_credit(db, job)
+                job.updated_at = _now()
+            db.commit()
+
+    def extend(self, job_id: str, worker_id: str) -> bool:
+        with self.session_factory() as db:
+            job = self._owned(db, job_id, worker_id)
+            if job is None:
+                db.commit()
+                return False
+            now = _now()
+            job.available_at = now + self.visibility_timeout
+            job.updated_at = now
+            db.commit()
+            return True
+
+    def complete(self, job_id: str, worker_id: str, prep_id: int) -> None:
+        with self.session_factory() as db:
+            job = self._owned(db, job_id, worker_id)
+            if job is not None:
+                job.prep_id = prep_id
+                self._finish(job, DONE, _now())
+            db.commit()
+
+    def fail(self, job_id: str, worker_id: str, error: str, error_status: int, retryable: bool) -> None:
+        with self.session_factory() as db:
+            job = self._owned(db, job_id, worker_id)
+            if job is None:
+                db.commit()
+                return
+            now = _now()
+            if retryable and job.attempts < self.max_attempts:
+                job.status = QUEUED
+                job.locked_by = None
+                job.error = error
+                job.error_status = error_status
+                job.available_at = now + timedelta(seconds=self.retry_backoff_sec * job.attempts)
+                job.updated_at = now
+            else:
+                self._return_credit(db, job)
+                self._finish(job, FAILED, now, error=error, error_status=error_status)
+            db.commit()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self.session_factory() as db:
+            job = db.query(PrepJob).filter(PrepJob.job_id == job_id).first()
+            if job is None:
+                return None
+            return {
+                "job_id": job.job_id,
+                "user_id": job.user_id,
+                "status": job.status,
+                "attempts": job.attempts,
+                "prep_id": job.prep_id,
+                "error": job.error,
+                "error_status": job.error_status,
+                "created_at": job.created_at.isoformat(),
+                "updated_at": job.updated_at.isoformat(),
+            }
+
+
+def _database_queue() -> JobQueue:
+    from app.db.sessions import SessionLocal
+
+    return DatabaseJobQueue(
+        session_factory=SessionLocal,
+        visibility_timeout_sec=settings.PREP_JOB_VISIBILITY_TIMEOUT_SEC,
+        max_attempts=settings.PREP_JOB_MAX_ATTEMPTS,
+        retry_backoff_sec=settings.PREP_JOB_RETRY_BACKOFF_SEC,
+    )
+
+
+QUEUE_BACKENDS: Dict[str, Callable[[], JobQueue]] = {
+    "database": _database_queue,
+}
+
+_queue: Optional[JobQueue] = None
+
+
+def get_job_queue() -> JobQueue:
+    global _queue
+    if _queue is None:
+        backend = settings.PREP_QUEUE_BACKEND
+        if backend not in QUEUE_BACKENDS:
+            raise ValueError(f"Unknown PREP_QUEUE_BACKEND {backend!r}, expected one of {sorted(QUEUE_BACKENDS)}")
+        _queue = QUEUE_BACKENDS[backend]()
+    return _queue
@@ -0,0 +1,153 @@
+# app/services/page_render.py
+"""
+Page loading helpers shared by the Playwright scraper and the ToS extractor.
+
+Lightweight mode (settings.PLAYWRIGHT_LIGHTWEIGHT_MODE):
+- images, media and fonts are aborted at the route level
+- requests to known analytics / tracking hosts are aborted
+- instead of networkidle + fixed sleeps, we wait until the body text length settles
+
+Every page load is timed and its response bytes counted (as transferred, from
+request.sizes(), so chunked and compressed responses count too), per mode. The mode is a
+process-wide setting, so full vs lightweight savings come from benchmarks/bench_page_render.py,
+which loads the same URLs both ways side by side.
+"""
+import asyncio
+import time
+from typing import Dict, Optional, Set
+from urllib.parse import urlparse
+
+from app.core.config import settings
+
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+
+ANALYTICS_DOMAINS = [
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "connect.facebook.net", "hotjar.com", "cdn.segment.com", "api.segment.io",
+    "mixpanel.com", "amplitude.com", "fullstory.com", "clarity.ms", "js-agent.newrelic.com",
+    "nr-data.net", "hs-analytics.net", "px.ads.linkedin.com", "snap.licdn.com",
+    "bat.bing.com", "analytics.tiktok.com", "adservice.google.com", "cdn.optimizely.com",
+]
+
+
+class RenderStats:
+    """Per-mode counters: pages, total ms, bytes received, requests blocked."""
+
+    def __init__(self):
+        self._modes: Dict[str, Dict[str, float]] = {}
+
+    def _mode(self, mode: str) -> Dict[str, float]:
+        return self._modes.setdefault(mode, {"pages": 0, "ms": 0.0, "bytes": 0, "blocked": 0})
+
+    def record_page(self, mode: str, ms: float, bytes_received: int) -> None:
+        m = self._mode(mode)
+        m["pages"] += 1
+        m["ms"] += ms
+        m["bytes"] += bytes_received
+
+    def record_blocked(self, mode: str) -> None:
+        self._mode(mode)["blocked"] += 1
+
+    def totals(self) -> Dict[str, Dict[str, float]]:
+        return {mode: dict(m) for mode, m in self._modes.items()}
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        out: Dict[str, Dict[str, float]] = {}
+        for mode, m in self._modes.items():
+            pages = m["pages"] or 1
+            out[mode] = {
+                "pages": m["pages"],
+                "blocked_requests": m["blocked"],
+                "avg_ms_per_page": m["ms"] / pages,
+                "avg_bytes_per_page": m["bytes"] / pages,
+            }
+        return out
+
+
+render_stats = RenderStats()
+
+
+def current_mode() -> str:
+    return "lightweight" if settings.PLAYWRIGHT_LIGHTWEIGHT_MODE else "full"
+
+
+def _is_analytics(url: str) -> bool:
+    host = urlparse(url).netloc.lower()
+    return any(host == d or host.endswith("." + d) for d in ANALYTICS_DOMAINS)
+
+
+async def prepare_context(context) -> None:
+    """Install the resource-blocking route on a BrowserContext (lightweight mode only)."""
+    if not settings.PLAYWRIGHT_LIGHTWEIGHT_MODE:
+        return
+
+    async def _route(route):
+        request = route.request
+        # Never block the navigation itself, only what it pulls in
+        if request.resource_type != "document" and (
+            request.resource_type in BLOCKED_RESOURCE_TYPES or _is_analytics(request.url)
+        ):
+            render_stats.record_blocked("lightweight")
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await context.route("**/*", _route)
+
+
+async def wait_for_content(page, fallback_ms: int) -> None:
+    """
+    Lightweight: poll body innerText length until it stops changing.
+    Full: the old fixed timer.
+    """
+    if not settings.PLAYWRIGHT_LIGHTWEIGHT_MODE:
+        await page.wait_for_timeout(fallback_ms)
+        return
+
+    poll_sec = settings.PLAYWRIGHT_SETTLE_POLL_MS / 1000
+    deadline = time.monotonic() + settings.PLAYWRIGHT_SETTLE_TIMEOUT_MS / 1000
+    last_len = -1
+    stable = 0
+    while time.monotonic() < deadline:
+        length = await page.evaluate("document.body ? document.body.innerText.length : 0")
+        if length > 0 and length == last_len:
+            stable += 1
+            if stable >= settings.PLAYWRIGHT_SETTLE_STABLE_POLLS:
+                return
+        else:
+            stable = 0
+        last_len = length
+        await asyncio.sleep(poll_sec)
+
+
+class PageLoadTracker:
+    """Counts response bytes on a page and records the load when finished."""
+
+    # finish() waits this long for size lookups of requests that already completed
+    SIZES_WAIT_SEC = 2.0
+
+    def __init__(self, page, mode: Optional[str] = None):
+        self.mode = mode or current_mode()
+        self.bytes_received = 0
+        self.started = time.perf_counter()
+        self._pending: Set[asyncio.Task] = set()
+        page.on("requestfinished", self._on_request_finished)
+
+    def _on_request_finished(self, request) -> None:
+        task = asyncio.ensure_future(self._count(request))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _count(self, request) -> None:
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return
+        # Encoded body size: what came over the wire, whatever Content-Length said (or didn't)
+        self.bytes_received += max(sizes.get("responseBodySize") or 0, 0)
+
+    async def finish(self) -> None:
+        elapsed_ms = (time.perf_counter() - self.started) * 1000
+        if self._pending:
+            await asyncio.wait(set(self._pending), timeout=self.SIZES_WAIT_SEC)
+        render_stats.record_page(self.mode, elapsed_ms, self.bytes_received)
@@ -1,44 +1,117 @@
+import asyncio
 import json
+from typing import Any, AsyncIterator, Optional, Tuple
 
 from fastapi import HTTPException,status
+from pydantic import ValidationError
 
 from google import genai
 from google.genai import types
 from google.genai.types import GenerateContentConfig
 from app.core.config import settings
+from app.core.metrics import record_gemini_usage, stage_timer
 from app.schema.prep_schema import InterviewPrepResponse
+from app.utils.json_stream import JsonMemberScanner
 from app.utils.prompts import TOS_SYSTEM_PROMPT, INTERVIEW_PREP_PROMPT
 
 client = genai.Client(api_key=settings.GOOGLE_GEMINI_API_KEY)
+
+# Caps in-flight Gemini calls per process (async variants only)
+gemini_slots = asyncio.Semaphore(settings.GEMINI_MAX_CONCURRENCY)
+
+
+def _tos_request(tos_data:dict):
+    base_url = tos_data.get("base_url", "")
+    pages = tos_data.get("pages") or []
+    tos_text = "\n\n".join(
+        f"[{p.get('key', 'legal')}] {p.get('url', '')}\n{(p.get('text') or '')}"
+        for p in pages
+    )
+    user_text = (
+        f"Base URL: {base_url}\n\n"
+        "Extracted legal/ToS/privacy/cookie text:\n"
+        f"{tos_text[:60000]}\n\n"
+        "Decide if scraping is permitted under the rules above."
+    )
+    config = GenerateContentConfig(
+        system_instruction=TOS_SYSTEM_PROMPT,
+        temperature=0.0,
+        response_mime_type="text/x.enum",
+        response_schema={
+            "type":"string",
+            "enum":["True","False"]
+        }
+    )
+    return [user_text], config
+
+
+def _prep_request(prep_data:dict):
+    if not prep_data:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="No data input to generate Interview Prep")
+    payload_text = json.dumps(prep_data, ensure_ascii=False)
+    config = GenerateContentConfig(
+        thinking_config=types.ThinkingConfig(include_thoughts=False),
+        system_instruction=INTERVIEW_PREP_PROMPT,
+        temperature=0.2,
+        max_output_tokens=8192,
+        response_mime_type="application/json",
+        response_schema=InterviewPrepResponse
+    )
+    return payload_text, config
+
+
+async def _generate_async(contents,config,timeout_sec:float,call:str):
+    """Native async call, bounded by the process-wide limiter and a per-call timeout."""
+    async with gemini_slots:
+        try:
+            with stage_timer(f"gemini_{call}"):
+                response = await asyncio.wait_for(
+                    client.aio.models.generate_content(model="gemini-2.5-flash",contents=contents,config=config),
+                    timeout=timeout_sec,
+                )
+            record_gemini_usage(call,response.usage_metadata)
+            return response
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT,detail="AI service timed out, please try again")
+
+
+async def _generate_stream_async(contents,config,timeout_sec:float,call:str)->AsyncIterator[Any]:
+    """Streaming variant of _generate_async; the timeout covers the whole stream, not each chunk."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time()+timeout_sec
+    usage = None
+    async with gemini_slots:
+        try:
+            with stage_timer(f"gemini_{call}"):
+                stream = await asyncio.wait_for(
+                    client.aio.models.generate_content_stream(model="gemini-2.5-flash",contents=contents,config=config),
+                    timeout=timeout_sec,
+                )
+                chunks = stream.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(),timeout=max(deadline-loop.time(),0))
+                    except StopAsyncIteration:
+                        break
+                    # Running totals; the last chunk carries the final counts
+                    usage = chunk.usage_metadata or usage
+                    yield chunk
+            record_gemini_usage(call,usage)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT,detail="AI service timed out, please try again")
+
+
 class PromptService:
     @staticmethod
     def tos_prompt(tos_data:dict):
         pages = tos_data.get("pages") or []
         if not pages:
             return True
-        base_url = tos_data.get("base_url", "")
-        tos_text = "\n\n".join(
-            f"[{p.get('key', 'legal')}] {p.get('url', '')}\n{(p.get('text') or '')}"
-            for p in pages
-        )
-        user_text = (
-            f"Base URL: {base_url}\n\n"
-            "Extracted legal/ToS/privacy/cookie text:\n"
-            f"{tos_text[:60000]}\n\n"
-            "Decide if scraping is permitted under the rules above."
-        )
+        contents, config = _tos_request(tos_data)
         response = client.models.generate_content(
             model="gemini-2.5-flash",
-            contents=[user_text],
-            config=GenerateContentConfig(
-                system_instruction=TOS_SYSTEM_PROMPT,
-                temperature=0.0,
-                response_mime_type="text/x.enum",
-                response_schema={
-                    "type":"string",
-                    "enum":["True","False"]
-                }
-            )
+            contents=contents,
+            config=config
         )
         verdict = response.text.strip() =="True"
 
@@ -46,20 +119,53 @@ class PromptService:
 
     @staticmethod
     def create_prep_prompt(prep_data:dict)->InterviewPrepResponse:
-        if not prep_data:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="No data input to generate Interview Prep")
-        payload_text = json.dumps(prep_data, ensure_ascii=False)
+        payload_text, config = _prep_request(prep_data)
         response = client.models.generate_content(
             model="gemini-2.5-flash",
             contents=payload_text,
-            config=GenerateContentConfig(
-                thinking_config=types.ThinkingConfig(include_thoughts=False),
-                system_instruction=INTERVIEW_PREP_PROMPT,
-                temperature=0.2,
-                max_output_tokens=8192,
-                response_mime_type="application/json",
-                response_schema=InterviewPrepResponse
-            )
+            config=config
         )
 
-        return response.parsed
\ No newline at end of file
+        return response.parsed
+
+    @staticmethod
+    async def tos_prompt_async(tos_data:dict)->bool:
+        pages = tos_data.get("pages") or []
+        if not pages:
+            return True
+        contents, config = _tos_request(tos_data)
+        response = await _generate_async(contents,config,settings.GEMINI_TOS_TIMEOUT_SEC,"tos")
+        return response.text.strip() =="True"
+
+    @staticmethod
+    async def create_prep_prompt_async(prep_data:dict)->InterviewPrepResponse:
+        payload_text, config = _prep_request(prep_data)
+        response = await _generate_async(payload_text,config,settings.GEMINI_PREP_TIMEOUT_SEC,"prep")
+        return response.parsed
+
+    @staticmethod
+    async def create_prep_prompt_stream(prep_data:dict)->AsyncIterator[Tuple[str,Any]]:
+        """
+        Yields ("section", (name, value)) as parts of the JSON response complete, e.g.
+        ("job_position", "...") or ("interview_qa.Technical", [...]), then a final
+        ("result", InterviewPrepResponse | None). None means the model output didn't
+        validate; PrepDB.interview_prep_save rejects it like an empty .parsed.
+        """
+        payload_text, config = _prep_request(prep_data)
+        scanner = JsonMemberScanner(max_depth=2)
+        parts = []
+        async for chunk in _generate_stream_async(payload_text,config,settings.GEMINI_PREP_TIMEOUT_SEC,"prep"):
+            text = chunk.text or ""
+            parts.append(text)
+            for path, value in scanner.feed(text):
+                # Objects are reported member by member; skip the repeat when they close
+                if len(path)==1 and isinstance(value,dict):
+                    continue
+                yield "section", (".".join(path), value)
+
+        result: Optional[InterviewPrepResponse] = None
+        try:
+            result = InterviewPrepResponse.model_validate_json("".join(parts))
+        except ValidationError as e:
+            print(f"[WARN] Streamed prep response failed validation: {e}")
+        yield "result", result
@@ -1,18 +1,20 @@
 # app/services/scrape_service.py
 import asyncio
-import os
 import re
-import time
-import hashlib
-from typing import Optional, Tuple, Dict, Any, List
+from typing import Optional, Dict, Any, List
 
-import requests
-from bs4 import BeautifulSoup
 from fastapi import HTTPException, status
-from playwright.async_api import async_playwright
 from urllib.parse import urljoin, urlparse
 
+from app.core.browser_pool import browser_pool
+from app.core.config import settings
+from app.core.metrics import record_boilerplate_removed, record_scraped_pages, stage_timer
+from app.utils.boilerplate import BoilerplateFilter
+from app.utils.fetch_context import FetchContext, fetch
+from app.utils.html_pipeline import normalise_whitespace, parse_fetched
 from app.utils.site_type_detector import is_dynamic_site
+from app.services.crawl_scheduler import crawl_scheduler
+from app.services.page_render import PageLoadTracker, prepare_context, wait_for_content
 from app.utils.robot_parser import is_scraping_allowed
 
 
@@ -32,7 +34,6 @@ RELEVANT_KEYWORDS = [
 # Safety + Politeness
 # -----------------------------
 MAX_PAGES = 10
-POLITENESS_DELAY_SEC = 1.0
 MAX_CHARS_PER_PAGE = 20_000
 MAX_TOTAL_CHARS = 100_000
 
@@ -48,15 +49,6 @@ DEFAULT_HEADERS = {
 # Helper functions
 # ============================================================
 
-def normalise_whitespace(text: str) -> str:
-    return re.sub(r"\s+", " ", (text or "")).strip()
-
-
-def extract_home_title_from_soup(soup: BeautifulSoup) -> Optional[str]:
-    t = soup.find("title")
-    return t.get_text(strip=True) if t else None
-
-
 def normalise_company_name_from_title(title: Optional[str]) -> Optional[str]:
     """
     Convert a <title> into a decent company name.
@@ -102,117 +94,13 @@ def normalise_company_name_from_title(title: Optional[str]) -> Optional[str]:
     return t
 
 
-def _rel_tokens(rel_val) -> List[str]:
-    """
-    BeautifulSoup rel can be None / str / list[str].
-    Convert to a list of lower tokens.
-    """
-    if not rel_val:
-        return []
-    if isinstance(rel_val, list):
-        return [str(x).lower().strip() for x in rel_val if str(x).strip()]
-    return [str(rel_val).lower().strip()]
-
-
-def extract_favicon_url_from_html(base_url: str, html: str) -> str:
-    """
-    Try to find favicon via <link rel="icon"...>. Fallback to /favicon.ico.
-    More robust than strict-equality rel checks.
-    """
-    soup = BeautifulSoup(html, "html.parser")
-    icon_tokens = {"icon", "shortcut icon", "apple-touch-icon", "apple-touch-icon-precomposed"}
-
-    for link in soup.find_all("link", href=True):
-        rel_tokens = _rel_tokens(link.get("rel"))
-        rel_joined = " ".join(rel_tokens)
-
-        # match any of the common icon rel types
-        if any(tok in rel_joined for tok in icon_tokens):
-            return urljoin(base_url, link["href"])
-
-    return urljoin(base_url, "/favicon.ico")
-
-
-def download_favicon(
-    favicon_url: str,
-    company_id: int,
-    save_dir: str = "static/favicons",
-) -> Tuple[Optional[str], Optional[str]]:
-    """
-    Download favicon to local filesystem and return (favicon_url, local_path).
-    If download fails, returns (None, None).
-    """
-    os.makedirs(save_dir, exist_ok=True)
-
-    try:
-        r = requests.get(
-            favicon_url,
-            timeout=10,
-            stream=True,
-            headers={"User-Agent": DEFAULT_HEADERS["User-Agent"]},
-            allow_redirects=True,
-        )
-        if r.status_code != 200:
-            return None, None
-
-        content = r.content
-        if not content or len(content) < 50:
-            return None, None
-
-        ctype = (r.headers.get("content-type") or "").lower()
-        ext = ".ico"
-        if "png" in ctype:
-            ext = ".png"
-        elif "svg" in ctype:
-            ext = ".svg"
-        elif "jpeg" in ctype or "jpg" in ctype:
-            ext = ".jpg"
-
-        digest = hashlib.sha256(content).hexdigest()[:12]
-        filename = f"company_{company_id}_{digest}{ext}"
-        path = os.path.join(save_dir, filename)
-
-        with open(path, "wb") as f:
-            f.write(content)
-
-        return favicon_url, path
-
-    except Exception:
-        return None, None
-
-
-def extract_internal_links(soup: BeautifulSoup, base_url: str, keywords: List[str]) -> List[str]:
-    domain = urlparse(base_url).netloc
-    links: List[str] = []
-
-    for a in soup.find_all("a", href=True):
-        full_link = urljoin(base_url, a["href"])
-        parsed = urlparse(full_link)
-
-        if parsed.scheme not in ("http", "https"):
-            continue
-
-        if parsed.netloc == domain and any(kw in full_link.lower() for kw in keywords):
-            links.append(full_link)
-
-    # de-dup preserving order
-    seen = set()
-    deduped: List[str] = []
-    for l in links:
-        if l not in seen:
-            seen.add(l)
-            deduped.append(l)
-
-    return deduped
-
-
-def find_type(url: str) -> bool:
+async def find_type(url: str, fetch_ctx: Optional[FetchContext] = None) -> bool:
     if not url.strip():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="URL cannot be empty or whitespace.",
         )
-    return is_dynamic_site(url)
+    return await is_dynamic_site(url, fetch_ctx)
 
 
 # ============================================================
@@ -224,8 +112,8 @@ def find_type(url: str) -> bool:
 #   - company_name_guess (cleaned, not "Home")
 # ============================================================
 
-def beautiful_scrape(url: str) -> Dict[str, Any]:
-    if not is_scraping_allowed(url):
+async def beautiful_scrape(url: str, fetch_ctx: Optional[FetchContext] = None) -> Dict[str, Any]:
+    if not await is_scraping_allowed(url):
         raise HTTPException(status_code=403, detail="Scraping disallowed by robots.txt")
 
     result: Dict[str, Any] = {
@@ -236,67 +124,62 @@ def beautiful_scrape(url: str) -> Dict[str, Any]:
         "pages": [],
     }
     total_chars = 0
+    # Nav/footer/cookie banner are kept on the homepage only, and don't count against the budget elsewhere
+    boilerplate = BoilerplateFilter()
 
     try:
-        response = requests.get(url, timeout=10, headers=DEFAULT_HEADERS)
+        response = await fetch(url, fetch_ctx, timeout=10)
         response.raise_for_status()
 
-        # Extract favicon + title before stripping tags
-        result["favicon_url"] = extract_favicon_url_from_html(url, response.text)
-
-        soup = BeautifulSoup(response.text, "html.parser")
-        home_title = extract_home_title_from_soup(soup)
+        # One parse gives favicon, title, cleaned text and links (shared with the ToS extractor)
+        doc = parse_fetched(response)
+        result["favicon_url"] = doc.favicon_url
+        home_title = doc.title
         result["home_title"] = home_title
         result["company_name_guess"] = normalise_company_name_from_title(home_title)
 
         # Homepage text
-        for tag in soup(["script", "style", "noscript"]):
-            tag.extract()
-
-        home_text = normalise_whitespace(soup.get_text())[:MAX_CHARS_PER_PAGE]
-        result["pages"].append({"key": "home", "url": url, "text": home_text})
+        home_text = boilerplate.strip(doc.text)[:MAX_CHARS_PER_PAGE]
+        result["pages"].append({
+            "key": "home", "url": url, "text": home_text,
+            "etag": response.headers.get("etag"), "last_modified": response.headers.get("last-modified"),
+        })
         total_chars += len(home_text)
 
         if total_chars >= MAX_TOTAL_CHARS:
             return result
 
-        # Internal links (use the cleaned soup; link tags remain)
-        internal_links = extract_internal_links(soup, url, RELEVANT_KEYWORDS)[:MAX_PAGES]
-
-        for link in internal_links:
-            if total_chars >= MAX_TOTAL_CHARS:
-                break
-            if not is_scraping_allowed(link):
-                continue
-
-            time.sleep(POLITENESS_DELAY_SEC)
-
-            try:
-                page_response = requests.get(link, timeout=10, headers=DEFAULT_HEADERS)
-                page_response.raise_for_status()
+        # Internal links
+        internal_links = doc.links_matching(RELEVANT_KEYWORDS)[:MAX_PAGES]
 
-                page_soup = BeautifulSoup(page_response.text, "html.parser")
-                for tag in page_soup(["script", "style", "noscript"]):
-                    tag.extract()
+        async def _scrape_page(link: str) -> Optional[Dict[str, Any]]:
+            page_response = await fetch(link, fetch_ctx, timeout=10)
+            page_response.raise_for_status()
 
-                text = normalise_whitespace(page_soup.get_text())[:MAX_CHARS_PER_PAGE]
-                page_name = urlparse(link).path.strip("/").replace("/", "-") or "page"
-                result["pages"].append({"key": page_name, "url": link, "text": text})
-                total_chars += len(text)
+            text = parse_fetched(page_response).text
+            if not text:
+                return None
+            page_name = urlparse(link).path.strip("/").replace("/", "-") or "page"
+            return {
+                "key": page_name, "url": link, **_unstripped(text),
+                "etag": page_response.headers.get("etag"), "last_modified": page_response.headers.get("last-modified"),
+            }
 
-            except Exception as e:
-                print(f"[ERROR] Failed to scrape {link}: {e}")
+        # Robots checks, politeness and concurrency are handled by the scheduler
+        crawled = await crawl_scheduler.crawl(internal_links, _scrape_page, MAX_TOTAL_CHARS - total_chars)
+        result["pages"].extend(_strip_in_order(crawled, boilerplate, MAX_TOTAL_CHARS - total_chars))
 
     except HTTPException:
         raise
     except Exception as e:
         print(f"[ERROR] Failed to scrape homepage {url}: {e}")
 
+    _log_boilerplate(url, "static", boilerplate)
     return result
 
 
 async def playwright_scrape(url: str) -> Dict[str, Any]:
-    if not is_scraping_allowed(url):
+    if not await is_scraping_allowed(url):
         raise HTTPException(status_code=403, detail="Scraping disallowed by robots.txt")
 
     result: Dict[str, Any] = {
@@ -307,6 +190,7 @@ async def playwright_scrape(url: str) -> Dict[str, Any]:
         "pages": [],
     }
     total_chars = 0
+    boilerplate = BoilerplateFilter()
 
     async def _goto_with_backoff(pw_page, target_url: str, timeout_ms: int) -> None:
         for attempt in range(BACKOFF_MAX_RETRIES + 1):
@@ -320,29 +204,33 @@ async def playwright_scrape(url: str) -> Dict[str, Any]:
                 await asyncio.sleep(BACKOFF_BASE_SEC * (2 ** attempt))
 
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                user_agent=(
-                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                    "(KHTML, like Gecko) Chrome/113.0.0.0 Safari/537.36"
-                ),
-                viewport={"width": 1280, "height": 800},
-                locale="en-US",
-                java_script_enabled=True,
-                extra_http_headers={
-                    "Accept-Language": "en-US,en;q=0.9",
-                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-                    "Referer": url,
-                },
-            )
+        async with browser_pool.context(
+            user_agent=(
+                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                "(KHTML, like Gecko) Chrome/113.0.0.0 Safari/537.36"
+            ),
+            viewport={"width": 1280, "height": 800},
+            locale="en-US",
+            java_script_enabled=True,
+            extra_http_headers={
+                "Accept-Language": "en-US,en;q=0.9",
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+                "Referer": url,
+            },
+        ) as context:
+            await prepare_context(context)
             pw_page = await context.new_page()
 
             # ---------- Load homepage ----------
-            await pw_page.goto(url, timeout=30000)
-            await pw_page.wait_for_load_state("networkidle")
+            tracker = PageLoadTracker(pw_page)
+            if settings.PLAYWRIGHT_LIGHTWEIGHT_MODE:
+                await pw_page.goto(url, wait_until="domcontentloaded", timeout=30000)
+            else:
+                await pw_page.goto(url, timeout=30000)
+                await pw_page.wait_for_load_state("networkidle")
             await pw_page.wait_for_selector("body", timeout=5000)
-            await pw_page.wait_for_timeout(1200)
+            await wait_for_content(pw_page, fallback_ms=1200)
+            await tracker.finish()
 
             # Title + company name guess
             home_title = await pw_page.title()
@@ -366,12 +254,11 @@ async def playwright_scrape(url: str) -> Dict[str, Any]:
 
             # Homepage text
             home_text = await pw_page.evaluate("document.body.innerText")
-            home_text = normalise_whitespace(home_text)[:MAX_CHARS_PER_PAGE]
+            home_text = boilerplate.strip(normalise_whitespace(home_text))[:MAX_CHARS_PER_PAGE]
             result["pages"].append({"key": "home", "url": url, "text": home_text})
             total_chars += len(home_text)
 
             if total_chars >= MAX_TOTAL_CHARS:
-                await browser.close()
                 return result
 
             # ---------- Collect internal links ----------
@@ -395,39 +282,31 @@ async def playwright_scrape(url: str) -> Dict[str, Any]:
             deduped = deduped[:MAX_PAGES]
 
             if not deduped:
-                await browser.close()
                 return result
 
-            successful_scrapes = 0
-
-            # ---------- Scrape internal pages ----------
-            for link in deduped:
-                if total_chars >= MAX_TOTAL_CHARS:
-                    break
-                if not is_scraping_allowed(link):
-                    continue
-
-                await asyncio.sleep(POLITENESS_DELAY_SEC)
-
+            # ---------- Scrape internal pages (one tab per page, in parallel) ----------
+            async def _scrape_tab(link: str) -> Optional[Dict[str, Any]]:
+                tab = await context.new_page()
                 try:
-                    await _goto_with_backoff(pw_page, link, timeout_ms=20000)
-                    await asyncio.sleep(0.6)
+                    tracker = PageLoadTracker(tab)
+                    await _goto_with_backoff(tab, link, timeout_ms=20000)
+                    await wait_for_content(tab, fallback_ms=600)
+                    await tracker.finish()
 
-                    text = await pw_page.evaluate("document.body.innerText")
-                    text = normalise_whitespace(text)[:MAX_CHARS_PER_PAGE]
+                    text = await tab.evaluate("document.body.innerText")
+                    text = normalise_whitespace(text)
+                    if not text:
+                        return None
 
                     page_name = urlparse(link).path.strip("/").replace("/", "-") or "page"
-                    result["pages"].append({"key": page_name, "url": link, "text": text})
-
-                    successful_scrapes += 1
-                    total_chars += len(text)
-
-                except Exception as e:
-                    print(f"[ERROR] Failed to scrape {link}: {e}")
+                    return {"key": page_name, "url": link, **_unstripped(text)}
+                finally:
+                    await tab.close()
 
-            await browser.close()
+            crawled = await crawl_scheduler.crawl(deduped, _scrape_tab, MAX_TOTAL_CHARS - total_chars)
+            result["pages"].extend(_strip_in_order(crawled, boilerplate, MAX_TOTAL_CHARS - total_chars))
 
-            if successful_scrapes == 0:
+            if not crawled:
                 raise HTTPException(
                     status_code=403,
                     detail="Scraping blocked by the server. robots.txt allows it, but access was denied.",
@@ -436,8 +315,50 @@ async def playwright_scrape(url: str) -> Dict[str, Any]:
     except Exception as e:
         print(f"[ERROR] Playwright failed on {url}: {e}")
 
+    _log_boilerplate(url, "playwright", boilerplate)
     return result
 
 
-async def get_scraped_data(url: str) -> Dict[str, Any]:
-    return await playwright_scrape(url) if find_type(url) else beautiful_scrape(url)
+def _unstripped(text: str) -> Dict[str, str]:
+    # "text" (capped) is what the crawl budget counts; the full text is stripped afterwards
+    return {"text": text[:MAX_CHARS_PER_PAGE], "raw_text": text}
+
+
+def _strip_in_order(pages: List[Dict[str, Any]], boilerplate: BoilerplateFilter, max_total_chars: int) -> List[Dict[str, Any]]:
+    """
+    Boilerplate-strip crawled pages in link order (the order crawl returns them), not in the
+    order they finished downloading, so the same site always keeps shared blocks on the same
+    page. Pages left empty are dropped; stops once max_total_chars is reached.
+    """
+    kept: List[Dict[str, Any]] = []
+    total_chars = 0
+    for page in pages:
+        text = boilerplate.strip(page.pop("raw_text"))[:MAX_CHARS_PER_PAGE]
+        if not text:
+            continue
+        page["text"] = text
+        kept.append(page)
+        total_chars += len(text)
+        if total_chars >= max_total_chars:
+            break
+    return kept
+
+
+def _log_boilerplate(url: str, mode: str, boilerplate: BoilerplateFilter) -> None:
+    stats = boilerplate.stats()
+    record_boilerplate_removed(mode, stats["chars_removed"])
+    if stats["chars_in"]:
+        print(f"[INFO] Boilerplate removed for {url}: {stats['chars_removed']} of {stats['chars_in']} chars, "
+              f"{stats['pages_emptied']} pages had nothing else")
+
+
+async def get_scraped_data(url: str, fetch_ctx: Optional[FetchContext] = None) -> Dict[str, Any]:
+    with stage_timer("site_type"):
+        dynamic = await find_type(url, fetch_ctx)
+    mode = "playwright" if dynamic else "static"
+    with stage_timer(f"{mode}_scrape"):
+        result = await playwright_scrape(url) if dynamic else await beautiful_scrape(url, fetch_ctx)
+    record_scraped_pages(mode, result.get("pages") or [])
+    for page in result.get("pages") or []:
+        page["scrape_mode"] = mode
+    return result
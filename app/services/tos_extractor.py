@@ -10,22 +10,23 @@ This module is intentionally "vibe-coded":
 
 Key ideas:
 - Always respect robots.txt first
-- Prefer lightweight scraping (requests + BeautifulSoup)
+- Prefer lightweight scraping (httpx + BeautifulSoup)
 - Fall back to Playwright only when necessary
 - Limit scope aggressively to avoid aggressive crawling
 """
 import re
-import time
-import asyncio
 from typing import Dict, List, Optional
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
 
-import requests
 from bs4 import BeautifulSoup
 from fastapi import HTTPException
-from playwright.async_api import async_playwright
 
+from app.core.browser_pool import browser_pool
+from app.utils.fetch_context import FetchContext, FetchedPage, fetch
+from app.utils.html_pipeline import bs4_parser_name, parse_fetched
 from app.utils.site_type_detector import is_dynamic_site
+from app.services.crawl_scheduler import crawl_scheduler
+from app.services.page_render import PageLoadTracker, prepare_context, wait_for_content
 from app.utils.robot_parser import is_scraping_allowed
 
 
@@ -37,7 +38,6 @@ TOS_KEYWORDS = [
 ]
 
 MAX_TOS_PAGES = 3
-POLITENESS_DELAY_SEC = 1.0
 MAX_CHARS_PER_PAGE = 40_000
 
 DEFAULT_HEADERS = {
@@ -55,33 +55,9 @@ def _strip_noise(soup: BeautifulSoup) -> None:
         tag.extract()
 
 
-def _extract_candidate_links_from_html(base_url: str, html: str) -> List[str]:
-    soup = BeautifulSoup(html, "html.parser")
-    domain = urlparse(base_url).netloc
-
-    links: List[str] = []
-    for a in soup.find_all("a", href=True):
-        full = urljoin(base_url, a["href"])
-        parsed = urlparse(full)
-
-        if parsed.scheme not in ("http", "https"):
-            continue
-        if parsed.netloc != domain:
-            continue
-
-        lower = full.lower()
-        if any(k in lower for k in TOS_KEYWORDS):
-            links.append(full)
-
-    # de-dup preserve order
-    seen = set()
-    out = []
-    for l in links:
-        if l not in seen:
-            seen.add(l)
-            out.append(l)
-
-    return out
+def _extract_candidate_links(home_resp: FetchedPage) -> List[str]:
+    # Reuses the homepage parse shared with the scraper / site type detector
+    return parse_fetched(home_resp).links_matching(TOS_KEYWORDS)
 
 
 def _guess_common_tos_urls(base_url: str) -> List[str]:
@@ -110,14 +86,14 @@ def _guess_common_tos_urls(base_url: str) -> List[str]:
     return out
 
 
-def _requests_get(url: str, timeout: int = 10) -> requests.Response:
-    resp = requests.get(url, timeout=timeout, headers=DEFAULT_HEADERS)
+async def _http_get(url: str, timeout: int = 10, fetch_ctx: Optional[FetchContext] = None):
+    resp = await fetch(url, fetch_ctx, timeout=timeout)
     resp.raise_for_status()
     return resp
 
 
 def _bs_extract_main_text(html: str) -> str:
-    soup = BeautifulSoup(html, "html.parser")
+    soup = BeautifulSoup(html, bs4_parser_name())
     _strip_noise(soup)
 
     # Prefer <main> if present
@@ -133,24 +109,24 @@ def _bs_extract_main_text(html: str) -> str:
     return _clean_text(soup.get_text(" "))
 
 
-def tos_extract_bs(base_url: str) -> Dict:
+async def tos_extract_bs(base_url: str, fetch_ctx: Optional[FetchContext] = None) -> Dict:
     """
-    Extract TOS/Privacy-like pages using requests + BeautifulSoup.
+    Extract TOS/Privacy-like pages using httpx + BeautifulSoup.
     Returns: {"base_url":..., "pages":[{"key":..., "url":..., "text":...}, ...]}
     """
-    if not is_scraping_allowed(base_url):
+    if not await is_scraping_allowed(base_url):
         raise HTTPException(status_code=403, detail="Scraping disallowed by robots.txt (base URL)")
 
     result = {"base_url": base_url, "pages": []}
 
     # 1) fetch homepage
     try:
-        home_resp = _requests_get(base_url, timeout=10)
+        home_resp = await _http_get(base_url, timeout=10, fetch_ctx=fetch_ctx)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to fetch base URL: {e}")
 
     # 2) extract candidate TOS links
-    candidates = _extract_candidate_links_from_html(base_url, home_resp.text)
+    candidates = _extract_candidate_links(home_resp)
 
     # 3) if none found, try guessing common URLs
     if not candidates:
@@ -159,22 +135,16 @@ def tos_extract_bs(base_url: str) -> Dict:
     # 4) limit how many we try
     candidates = candidates[:MAX_TOS_PAGES]
 
-    for link in candidates:
-        # robots check per path
-        if not is_scraping_allowed(link):
-            continue
-
-        time.sleep(POLITENESS_DELAY_SEC)
+    async def _extract_page(link: str) -> Dict:
+        resp = await _http_get(link, timeout=10, fetch_ctx=fetch_ctx)
+        text = _bs_extract_main_text(resp.text)
+        text = text[:MAX_CHARS_PER_PAGE]
 
-        try:
-            resp = _requests_get(link, timeout=10)
-            text = _bs_extract_main_text(resp.text)
-            text = text[:MAX_CHARS_PER_PAGE]
+        key = urlparse(link).path.strip("/").replace("/", "-") or "legal"
+        return {"key": key, "url": link, "text": text}
 
-            key = urlparse(link).path.strip("/").replace("/", "-") or "legal"
-            result["pages"].append({"key": key, "url": link, "text": text})
-        except Exception:
-            continue
+    # robots check per path + politeness are handled by the scheduler
+    result["pages"] = await crawl_scheduler.crawl(candidates, _extract_page, action="extract ToS from")
 
     return result
 
@@ -184,19 +154,20 @@ async def tos_extract_playwright(base_url: str) -> Dict:
     Same output format as tos_extract_bs, but uses Playwright.
     Helpful when the site renders legal pages dynamically.
     """
-    if not is_scraping_allowed(base_url):
+    if not await is_scraping_allowed(base_url):
         raise HTTPException(status_code=403, detail="Scraping disallowed by robots.txt (base URL)")
 
     result = {"base_url": base_url, "pages": []}
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context(user_agent=DEFAULT_HEADERS["User-Agent"])
+    async with browser_pool.context(user_agent=DEFAULT_HEADERS["User-Agent"]) as context:
+        await prepare_context(context)
         page = await context.new_page()
 
+        tracker = PageLoadTracker(page)
         await page.goto(base_url, wait_until="domcontentloaded", timeout=30000)
         await page.wait_for_selector("body", timeout=5000)
-        await asyncio.sleep(1.0)
+        await wait_for_content(page, fallback_ms=1000)
+        await tracker.finish()
 
         links = await page.eval_on_selector_all("a[href]", "els => els.map(e => e.href)")
         domain = urlparse(base_url).netloc
@@ -219,43 +190,42 @@ async def tos_extract_playwright(base_url: str) -> Dict:
 
         deduped = deduped[:MAX_TOS_PAGES]
 
-        for link in deduped:
-            if not is_scraping_allowed(link):
-                continue
-
-            await asyncio.sleep(POLITENESS_DELAY_SEC)
-
+        async def _extract_tab(link: str) -> Dict:
+            tab = await context.new_page()
             try:
-                await page.goto(link, wait_until="domcontentloaded", timeout=20000)
-                await page.wait_for_selector("body", timeout=5000)
-                await asyncio.sleep(0.5)
+                tracker = PageLoadTracker(tab)
+                await tab.goto(link, wait_until="domcontentloaded", timeout=20000)
+                await tab.wait_for_selector("body", timeout=5000)
+                await wait_for_content(tab, fallback_ms=500)
+                await tracker.finish()
 
                 # Prefer main if exists
-                has_main = await page.locator("main").count()
+                has_main = await tab.locator("main").count()
                 if has_main:
-                    text = await page.locator("main").inner_text()
+                    text = await tab.locator("main").inner_text()
                 else:
-                    text = await page.evaluate("document.body.innerText")
+                    text = await tab.evaluate("document.body.innerText")
 
                 text = _clean_text(text)[:MAX_CHARS_PER_PAGE]
                 key = urlparse(link).path.strip("/").replace("/", "-") or "legal"
-                result["pages"].append({"key": key, "url": link, "text": text})
-            except Exception:
-                continue
+                return {"key": key, "url": link, "text": text}
+            finally:
+                await tab.close()
 
-        await browser.close()
+        result["pages"] = await crawl_scheduler.crawl(deduped, _extract_tab, action="extract ToS from")
 
     return result
 
 
-async def get_tos_data(base_url: str) -> Dict:
+async def get_tos_data(base_url: str, fetch_ctx: Optional[FetchContext] = None) -> Dict:
     """
     Picks best method automatically.
+    Pass the pipeline's FetchContext so the homepage fetched here is reused by the scraper.
     """
     try:
-        if is_dynamic_site(base_url):
+        if await is_dynamic_site(base_url, fetch_ctx):
             return await tos_extract_playwright(base_url)
-        return tos_extract_bs(base_url)
+        return await tos_extract_bs(base_url, fetch_ctx)
     except Exception:
         # fallback
         return await tos_extract_playwright(base_url)
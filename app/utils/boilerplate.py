@@ -0,0 +1,66 @@
+# app/utils/boilerplate.py
+"""
+Cross-page boilerplate removal for one site's scraped text.
+
+Page text is already flattened to one whitespace-normalised line, so blocks are found by
+word shingling: every run of SHINGLE_WORDS consecutive words is hashed, and words covered
+by a shingle that an earlier page of the same site already contained are dropped. The nav
+bar, cookie banner and footer therefore survive once (on the homepage, which is fed first)
+instead of on every page.
+"""
+from typing import Dict, Iterable, List, Set
+
+from app.core.config import settings
+
+
+class BoilerplateFilter:
+    """Stateful per-site filter; feed pages in the order they should keep shared text."""
+
+    def __init__(self, shingle_words: int = None, enabled: bool = None):
+        self.shingle_words = shingle_words or settings.BOILERPLATE_SHINGLE_WORDS
+        self.enabled = settings.BOILERPLATE_REMOVAL_ENABLED if enabled is None else enabled
+        self._seen: Set[int] = set()
+        self.chars_in = 0
+        self.chars_out = 0
+        self.pages_emptied = 0
+
+    def _shingles(self, words: List[str]) -> List[int]:
+        n = self.shingle_words
+        lowered = [w.lower() for w in words]
+        return [hash(tuple(lowered[i:i + n])) for i in range(len(lowered) - n + 1)]
+
+    def seed(self, texts: Iterable[str]) -> None:
+        """Register text that is already stored (e.g. other pages of the company) without filtering it."""
+        for text in texts:
+            self._seen.update(self._shingles((text or "").split(" ")))
+
+    def strip(self, text: str) -> str:
+        text = text or ""
+        self.chars_in += len(text)
+        if not self.enabled:
+            self.chars_out += len(text)
+            return text
+
+        words = text.split(" ")
+        shingles = self._shingles(words)
+        covered = [False] * len(words)
+        for i, key in enumerate(shingles):
+            if key in self._seen:
+                for j in range(i, i + self.shingle_words):
+                    covered[j] = True
+        # Only after matching, so a page never removes its own repeated text
+        self._seen.update(shingles)
+
+        kept = " ".join(w for w, c in zip(words, covered) if not c)
+        if text and not kept:
+            self.pages_emptied += 1
+        self.chars_out += len(kept)
+        return kept
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "chars_in": self.chars_in,
+            "chars_out": self.chars_out,
+            "chars_removed": self.chars_in - self.chars_out,
+            "pages_emptied": self.pages_emptied,
+        }
@@ -0,0 +1,29 @@
+import asyncio
+from typing import Awaitable, TypeVar
+
+from fastapi import HTTPException, Request
+
+T = TypeVar("T")
+
+CLIENT_CLOSED_REQUEST = 499
+
+
+async def cancel_on_disconnect(request: Request, coro: Awaitable[T], poll_sec: float = 1.0) -> T:
+    """
+    Await `coro`, but cancel it as soon as the HTTP client goes away,
+    so abandoned requests stop burning scrape / Gemini time.
+    """
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=poll_sec)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                print(f"[INFO] Client disconnected, cancelling {request.url.path}")
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                raise HTTPException(status_code=CLIENT_CLOSED_REQUEST, detail="Client closed request")
+    finally:
+        if not task.done():
+            task.cancel()
@@ -0,0 +1,6 @@
+def etag_matches(if_none_match, etag:str)->bool:
+    """If-None-Match check: a comma-separated list (or *), compared weakly as RFC 9110 requires."""
+    if not if_none_match:
+        return False
+    candidates = [c.strip().removeprefix("W/") for c in if_none_match.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in candidates
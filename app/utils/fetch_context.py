@@ -0,0 +1,79 @@
+import asyncio
+from typing import Dict, Optional
+
+import httpx
+
+from app.core.http_client import get_http_client
+
+
+class FetchedPage:
+    """
+    Snapshot of one HTTP response: status, headers, body and final URL (after redirects).
+    Mirrors the bits of a Response object the scrapers use.
+    """
+
+    def __init__(self, url: str, final_url: str, status_code: int, headers: Dict[str, str], content: bytes, encoding: Optional[str]):
+        self.url = url
+        self.final_url = final_url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.encoding = encoding or "utf-8"
+        self._document = None  # filled by html_pipeline.parse_fetched
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise httpx.HTTPError(f"{self.status_code} Error for url: {self.final_url}")
+
+
+class FetchContext:
+    """
+    Per-request fetch cache keyed by URL.
+
+    One prep pipeline creates one FetchContext and passes it to the ToS extractor,
+    the site type detector, the scraper and the favicon download, so each URL is
+    downloaded once. Failures are cached too, so a dead homepage isn't retried four times.
+    Concurrent callers asking for the same URL share a single in-flight request.
+    """
+    # Process-wide totals across all contexts, for /metrics
+    total_fetches = 0
+    total_hits = 0
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None):
+        self.headers = headers
+        self._pages: Dict[str, "asyncio.Future[FetchedPage]"] = {}
+        self.fetches = 0
+        self.hits = 0
+
+    async def _download(self, url: str, timeout: float) -> FetchedPage:
+        resp = await get_http_client().get(url, timeout=timeout, headers=self.headers)
+        return FetchedPage(
+            url=url,
+            final_url=str(resp.url),
+            status_code=resp.status_code,
+            headers=dict(resp.headers),
+            content=resp.content,
+            encoding=resp.encoding,
+        )
+
+    async def get(self, url: str, timeout: float = 10) -> FetchedPage:
+        pending = self._pages.get(url)
+        if pending is not None:
+            self.hits += 1
+            FetchContext.total_hits += 1
+            return await asyncio.shield(pending)
+
+        self.fetches += 1
+        FetchContext.total_fetches += 1
+        pending = asyncio.ensure_future(self._download(url, timeout))
+        self._pages[url] = pending
+        return await asyncio.shield(pending)
+
+
+async def fetch(url: str, fetch_ctx: Optional[FetchContext] = None, timeout: float = 10) -> FetchedPage:
+    """Fetch through the given context, or a throwaway one when called standalone."""
+    return await (fetch_ctx or FetchContext()).get(url, timeout=timeout)
@@ -0,0 +1,8 @@
+import hashlib
+import re
+
+
+def text_hash(text: str) -> str:
+    """sha256 of whitespace-normalised text, so formatting-only changes hash the same."""
+    normalised = re.sub(r"\s+", " ", (text or "")).strip()
+    return hashlib.sha256(normalised.encode("utf-8")).hexdigest()
@@ -0,0 +1,231 @@
+"""
+Single-parse HTML pipeline.
+
+Every fetched document is parsed once and everything the scrapers need is pulled out
+in the same pass: title, favicon, cleaned text, same-site links, and the bits the
+site type detector looks at (body text length, <script> tags).
+
+Backends, picked by settings.HTML_PARSER_BACKEND:
+- "selectolax" (fastest, optional dependency)
+- "lxml"       (fast, optional dependency)
+- "bs4"        (BeautifulSoup + html.parser, always available)
+- "auto"       (first one that is installed, in the order above)
+If a fast backend fails on a document we fall back to bs4 for that document.
+"""
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+
+from app.core.config import settings
+
+try:
+    from selectolax.parser import HTMLParser as SelectolaxParser
+except ImportError:  # optional
+    SelectolaxParser = None
+
+try:
+    import lxml.html as lxml_html
+except ImportError:  # optional
+    lxml_html = None
+
+
+NOISE_TAGS = ["script", "style", "noscript"]
+ICON_RELS = {"icon", "shortcut icon", "apple-touch-icon", "apple-touch-icon-precomposed"}
+
+
+def normalise_whitespace(text: str) -> str:
+    return re.sub(r"\s+", " ", (text or "")).strip()
+
+
+class RawDocument:
+    """What a backend hands back before URL resolution / filtering."""
+
+    def __init__(self):
+        self.title: Optional[str] = None
+        self.icon_links: List[Tuple[str, str]] = []  # (rel, href) in document order
+        self.anchor_hrefs: List[str] = []
+        self.text: str = ""
+        self.body_text_len: int = 0
+        self.script_srcs: List[str] = []
+        self.script_count: int = 0
+
+
+class ParsedDocument:
+    def __init__(self, base_url: str, title: Optional[str], favicon_url: str, text: str,
+                 links: List[str], body_text_len: int, script_srcs: List[str], script_count: int, backend: str):
+        self.base_url = base_url
+        self.title = title
+        self.favicon_url = favicon_url
+        self.text = text
+        self.links = links
+        self.body_text_len = body_text_len
+        self.script_srcs = script_srcs
+        self.script_count = script_count
+        self.backend = backend
+
+    def links_matching(self, keywords: List[str]) -> List[str]:
+        """Same-site links whose full URL contains any of the keywords (order preserved)."""
+        return [l for l in self.links if any(kw in l.lower() for kw in keywords)]
+
+
+# ============================================================
+# Backends
+# ============================================================
+
+def _rel_tokens(rel_val) -> List[str]:
+    """
+    BeautifulSoup rel can be None / str / list[str].
+    Convert to a list of lower tokens.
+    """
+    if not rel_val:
+        return []
+    if isinstance(rel_val, list):
+        return [str(x).lower().strip() for x in rel_val if str(x).strip()]
+    return [str(x).lower() for x in str(rel_val).split()]
+
+
+def _parse_bs4(html: str) -> RawDocument:
+    raw = RawDocument()
+    soup = BeautifulSoup(html, "html.parser")
+
+    t = soup.find("title")
+    raw.title = t.get_text(strip=True) if t else None
+    raw.icon_links = [(" ".join(_rel_tokens(l.get("rel"))), l["href"]) for l in soup.find_all("link", href=True)]
+    raw.anchor_hrefs = [a["href"] for a in soup.find_all("a", href=True)]
+
+    scripts = soup.find_all("script")
+    raw.script_count = len(scripts)
+    raw.script_srcs = [s.get("src", "") for s in scripts]
+    raw.body_text_len = len(soup.body.get_text(strip=True)) if soup.body else 0
+
+    for tag in soup(NOISE_TAGS):
+        tag.extract()
+    raw.text = soup.get_text()
+    return raw
+
+
+def _parse_lxml(html: str) -> RawDocument:
+    raw = RawDocument()
+    root = lxml_html.document_fromstring(html.encode("utf-8"), parser=lxml_html.HTMLParser(encoding="utf-8"))
+
+    t = root.find(".//title")
+    raw.title = t.text_content().strip() if t is not None else None
+    raw.icon_links = [(" ".join(_rel_tokens(l.get("rel"))), l.get("href")) for l in root.iter("link") if l.get("href") is not None]
+    raw.anchor_hrefs = [a.get("href") for a in root.iter("a") if a.get("href") is not None]
+
+    scripts = list(root.iter("script"))
+    raw.script_count = len(scripts)
+    raw.script_srcs = [s.get("src", "") for s in scripts]
+    body = root.find("body")
+    raw.body_text_len = sum(len(s.strip()) for s in body.itertext()) if body is not None else 0
+
+    for el in list(root.iter(*NOISE_TAGS)):
+        el.drop_tree()
+    raw.text = root.text_content()
+    return raw
+
+
+def _parse_selectolax(html: str) -> RawDocument:
+    raw = RawDocument()
+    tree = SelectolaxParser(html)
+
+    t = tree.css_first("title")
+    raw.title = t.text(strip=True) if t is not None else None
+    raw.icon_links = [(" ".join(_rel_tokens(l.attributes.get("rel"))), l.attributes.get("href")) for l in tree.css("link[href]")]
+    raw.anchor_hrefs = [a.attributes.get("href") for a in tree.css("a[href]")]
+
+    scripts = tree.css("script")
+    raw.script_count = len(scripts)
+    raw.script_srcs = [s.attributes.get("src") or "" for s in scripts]
+    raw.body_text_len = len(tree.body.text(deep=True, separator="", strip=True)) if tree.body is not None else 0
+
+    tree.strip_tags(NOISE_TAGS)
+    raw.text = tree.root.text(deep=True, separator="") if tree.root is not None else ""
+    return raw
+
+
+BACKENDS: Dict[str, Callable[[str], RawDocument]] = {"bs4": _parse_bs4}
+if lxml_html is not None:
+    BACKENDS["lxml"] = _parse_lxml
+if SelectolaxParser is not None:
+    BACKENDS["selectolax"] = _parse_selectolax
+
+
+def resolve_backend(name: Optional[str] = None) -> str:
+    name = (name or settings.HTML_PARSER_BACKEND).lower()
+    if name == "auto":
+        for candidate in ("selectolax", "lxml", "bs4"):
+            if candidate in BACKENDS:
+                return candidate
+    if name not in BACKENDS:
+        print(f"[WARN] HTML parser backend '{name}' not available, using bs4")
+        return "bs4"
+    return name
+
+
+def bs4_parser_name() -> str:
+    """Parser to hand BeautifulSoup where we still need a soup (lxml if installed)."""
+    return "lxml" if lxml_html is not None else "html.parser"
+
+
+# ============================================================
+# Pipeline
+# ============================================================
+
+def parse_document(html: str, base_url: str, backend: Optional[str] = None) -> ParsedDocument:
+    """Parse `html` once and return everything the scrapers / detectors need."""
+    name = resolve_backend(backend)
+    try:
+        raw = BACKENDS[name](html)
+    except Exception as e:
+        if name == "bs4":
+            raise
+        print(f"[WARN] {name} failed to parse {base_url}, falling back to bs4: {e}")
+        name = "bs4"
+        raw = _parse_bs4(html)
+
+    # Favicon: first <link rel=...icon...>, else /favicon.ico
+    favicon_url = urljoin(base_url, "/favicon.ico")
+    for rel, href in raw.icon_links:
+        if any(tok in rel for tok in ICON_RELS):
+            favicon_url = urljoin(base_url, href)
+            break
+
+    # Same-site http(s) links, resolved and de-duped preserving order
+    domain = urlparse(base_url).netloc
+    seen = set()
+    links: List[str] = []
+    for href in raw.anchor_hrefs:
+        full_link = urljoin(base_url, href)
+        parsed = urlparse(full_link)
+        if parsed.scheme not in ("http", "https") or parsed.netloc != domain:
+            continue
+        if full_link not in seen:
+            seen.add(full_link)
+            links.append(full_link)
+
+    return ParsedDocument(
+        base_url=base_url,
+        title=raw.title,
+        favicon_url=favicon_url,
+        text=normalise_whitespace(raw.text),
+        links=links,
+        body_text_len=raw.body_text_len,
+        script_srcs=raw.script_srcs,
+        script_count=raw.script_count,
+        backend=name,
+    )
+
+
+def parse_fetched(page) -> ParsedDocument:
+    """
+    Parse a FetchedPage once; later callers sharing the same FetchContext
+    (ToS extractor, site type detector, scraper) get the cached result.
+    """
+    doc = getattr(page, "_document", None)
+    if doc is None:
+        doc = parse_document(page.text, page.url)
+        page._document = doc
+    return doc
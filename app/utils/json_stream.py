@@ -0,0 +1,90 @@
+import json
+from typing import Any, List, Optional, Tuple
+
+
+class _Open:
+    __slots__ = ("kind", "key", "member_start")
+
+    def __init__(self, kind: str, key: Optional[str], member_start: int):
+        self.kind = kind
+        self.key = key
+        self.member_start = member_start
+
+
+class JsonMemberScanner:
+    """
+    Incrementally pull completed object members out of a JSON document that arrives in pieces
+    (e.g. a streamed LLM response).
+
+    feed() returns [(path, value)] for every member that closed in the new text, where path is
+    the tuple of keys from the root, e.g. ("interview_qa", "General"). Members nested deeper than
+    max_depth objects, or inside arrays, are only reported as part of their parent.
+    """
+
+    def __init__(self, max_depth: int = 2):
+        self.max_depth = max_depth
+        self.text = ""
+        self.pos = 0
+        self.in_string = False
+        self.escape = False
+        self.stack: List[_Open] = []
+
+    def feed(self, piece: str) -> List[Tuple[Tuple[str, ...], Any]]:
+        completed: List[Tuple[Tuple[str, ...], Any]] = []
+        self.text += piece or ""
+        text = self.text
+        for i in range(self.pos, len(text)):
+            c = text[i]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == "\\":
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+                continue
+
+            if c == '"':
+                self.in_string = True
+            elif c in "{[":
+                self.stack.append(_Open(c, self._pending_key(i), i + 1))
+            elif c == ",":
+                if self.stack and self.stack[-1].kind == "{":
+                    self._complete(i, completed)
+                    self.stack[-1].member_start = i + 1
+            elif c == "}":
+                if self.stack:
+                    self._complete(i, completed)
+                    self.stack.pop()
+            elif c == "]":
+                if self.stack:
+                    self.stack.pop()
+        self.pos = len(text)
+        return completed
+
+    def _pending_key(self, i: int) -> Optional[str]:
+        """Key of the member whose value opens at index i (None for the root / array items)."""
+        if not self.stack or self.stack[-1].kind != "{":
+            return None
+        head = self.text[self.stack[-1].member_start:i].rsplit(":", 1)[0].strip()
+        try:
+            return json.loads(head)
+        except ValueError:
+            return None
+
+    def _complete(self, i: int, completed: list) -> None:
+        top = self.stack[-1]
+        if top.kind != "{" or len(self.stack) > self.max_depth:
+            return
+        segment = self.text[top.member_start:i]
+        if not segment.strip():
+            return
+        parents = [o.key for o in self.stack[1:]]
+        if any(k is None for k in parents):
+            return
+        try:
+            member = json.loads("{" + segment + "}")
+        except ValueError:
+            return
+        for key, value in member.items():
+            completed.append((tuple(parents) + (key,), value))
@@ -1,17 +1,126 @@
+import threading
+import time
 import urllib.robotparser
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 from urllib.parse import urlparse
 
-def is_scraping_allowed(url: str, user_agent: str = "*") -> bool:
-    parsed = urlparse(url)
-    robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+from app.core.config import settings
+from app.core.http_client import get_http_client
+from app.utils.single_flight import SingleFlight
 
-    rp = urllib.robotparser.RobotFileParser()
-    try:
+
+class RobotsCache:
+    """
+    Per-host cache of parsed robots.txt rules, shared by every caller in the process.
+
+    - Entries live for `ttl_sec`, the least recently used host is evicted past `max_hosts`
+    - Other 4xx (404, 410, ...) mean there is no robots.txt: cached as "allow all" for `negative_ttl_sec`
+    - 5xx and network errors / timeouts are cached as "disallow all" for `negative_ttl_sec`
+      (RFC 9309 2.3.1.4: an unreachable robots.txt is a complete disallow; RobotFileParser.read()
+      also left a 5xx unread, so can_fetch returned False)
+    - 401/403 are cached as "disallow all", matching RobotFileParser.read()
+    - Concurrent misses for the same host share one fetch
+    """
+
+    def __init__(self, ttl_sec: int, negative_ttl_sec: int, max_hosts: int):
+        self.ttl_sec = ttl_sec
+        self.negative_ttl_sec = negative_ttl_sec
+        self.max_hosts = max_hosts
+        self._entries: "OrderedDict[str, Tuple[float, urllib.robotparser.RobotFileParser]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.negative = 0
+        self.evictions = 0
+
+    async def _fetch(self, robots_url: str) -> Tuple[urllib.robotparser.RobotFileParser, int, bool]:
+        """(parser, ttl, negative): negative results are the ones not backed by a robots.txt we read."""
+        rp = urllib.robotparser.RobotFileParser()
         rp.set_url(robots_url)
-        rp.read()
-        allowed = rp.can_fetch(user_agent, url)
-        print(f"[INFO] robots.txt check for {url}: {allowed}")
-        return allowed
-    except Exception as e:
-        print(f"[WARN] Could not read robots.txt at {robots_url}: {e}")
-        return True  # Be cautious: If robots.txt fails, allow by default
\ No newline at end of file
+        try:
+            resp = await get_http_client().get(robots_url, timeout=5)
+        except Exception as e:
+            print(f"[WARN] Could not read robots.txt at {robots_url}, disallowing for now: {e}")
+            rp.disallow_all = True
+            return rp, self.negative_ttl_sec, True
+
+        if resp.status_code in (401, 403):
+            rp.disallow_all = True
+            return rp, self.ttl_sec, False
+        if resp.status_code >= 500:
+            print(f"[WARN] robots.txt at {robots_url} returned {resp.status_code}, disallowing for now")
+            rp.disallow_all = True
+            return rp, self.negative_ttl_sec, True
+        if resp.status_code >= 400:
+            rp.allow_all = True
+            return rp, self.negative_ttl_sec, True
+
+        rp.parse(resp.text.splitlines())
+        return rp, self.ttl_sec, False
+
+    async def _load(self, robots_url: str) -> urllib.robotparser.RobotFileParser:
+        # Fetch outside the lock; the lock only guards the dict
+        rp, ttl, negative = await self._fetch(robots_url)
+        if negative:
+            self.negative += 1
+
+        with self._lock:
+            self._entries[robots_url] = (time.monotonic() + ttl, rp)
+            self._entries.move_to_end(robots_url)
+            while len(self._entries) > self.max_hosts:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return rp
+
+    async def get(self, url: str) -> urllib.robotparser.RobotFileParser:
+        parsed = urlparse(url)
+        robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(robots_url)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(robots_url)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # A cold cache under load shouldn't send one robots.txt request per caller
+        return await self._flights.do(robots_url, lambda: self._load(robots_url))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "hosts": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "negative": self.negative,
+            "evictions": self.evictions,
+            "coalesced": self._flights.followers,
+        }
+
+
+robots_cache = RobotsCache(
+    ttl_sec=settings.ROBOTS_CACHE_TTL_SEC,
+    negative_ttl_sec=settings.ROBOTS_CACHE_NEGATIVE_TTL_SEC,
+    max_hosts=settings.ROBOTS_CACHE_MAX_HOSTS,
+)
+
+
+async def is_scraping_allowed(url: str, user_agent: str = "*") -> bool:
+    rp = await robots_cache.get(url)
+    allowed = rp.can_fetch(user_agent, url)
+    print(f"[INFO] robots.txt check for {url}: {allowed}")
+    return allowed
+
+
+async def get_crawl_delay(url: str, user_agent: str = "*") -> Optional[float]:
+    """Crawl-delay declared for this host in robots.txt, if any."""
+    delay = (await robots_cache.get(url)).crawl_delay(user_agent)
+    return float(delay) if delay is not None else None
+
@@ -0,0 +1,45 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls per key: the first caller starts `fn()`, everyone arriving
+    while it runs awaits the same task and gets the same result or exception.
+
+    The task is shielded from its callers, so one caller going away (client disconnect)
+    doesn't cancel the work for the others. Nothing is cached once the task finishes.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        return await asyncio.shield(self.start(key, fn))
+
+    def start(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> "asyncio.Task[Any]":
+        """
+        The running task for `key`, started from `fn()` if there is none, without waiting for it.
+        Fire-and-forget callers get no exception: `fn()` should handle (log) its own.
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.followers += 1
+        return task
+
+    def _forget(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Nobody may be left to read it (all callers cancelled); don't log "exception never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        return len(self._tasks)
@@ -1,7 +1,9 @@
-import requests
-from bs4 import BeautifulSoup
+from typing import Optional
 
-def is_dynamic_site(url:str)->bool:
+from app.utils.fetch_context import FetchContext, fetch
+from app.utils.html_pipeline import parse_fetched
+
+async def is_dynamic_site(url:str,fetch_ctx:Optional[FetchContext]=None)->bool:
     """
         Check whether the given website is static or dynamic.
 
@@ -12,6 +14,7 @@ def is_dynamic_site(url:str)->bool:
 
         Args:
             url (str): Full website URL.
+            fetch_ctx (FetchContext): Optional per-request cache, so the homepage is reused instead of re-downloaded.
 
         Returns:
             bool:
@@ -19,21 +22,18 @@ def is_dynamic_site(url:str)->bool:
                 False -> Static site (simple HTML-based)
         """
     try:
-        response = requests.get(url,timeout=10)
+        response = await fetch(url,fetch_ctx,timeout=10)
         response.raise_for_status()
 
 
-        soup = BeautifulSoup(response.text,"html.parser")
+        # Shared single parse of the homepage
+        doc = parse_fetched(response)
 
         # If there's very little visible content or too much JS
-        body_text = soup.body.get_text(strip=True)
-        scripts = soup.find_all("script")
-
-        if len(body_text)<100 or len(scripts)>20:
+        if doc.body_text_len<100 or doc.script_count>20:
             return True #Likely Dynamic
 
-        for script in scripts:
-            src = script.get("src", "")
+        for src in doc.script_srcs:
             if any(lib in src for lib in ["react", "vue", "angular"]):
                 return True
 
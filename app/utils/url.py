@@ -1,10 +1,41 @@
+import asyncio
 import ipaddress
+import socket
+from typing import Union
 from urllib.parse import urlparse
 
 from fastapi import HTTPException,status
 from pydantic import HttpUrl
 
 
+def is_internal_ip(ip:Union[ipaddress.IPv4Address,ipaddress.IPv6Address])->bool:
+    # ::ffff:10.0.0.1 reaches 10.0.0.1
+    if isinstance(ip,ipaddress.IPv6Address) and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return (ip.is_private or ip.is_loopback or ip.is_reserved or ip.is_link_local
+            or ip.is_multicast or ip.is_unspecified)
+
+
+async def is_public_url(url:str)->bool:
+    """
+    True if url is http(s) and every address its host resolves to is public. For URLs taken
+    from scraped pages, before we fetch them ourselves (valid_base_url only sees the literal host).
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http","https") or not parsed.hostname:
+        return False
+    try:
+        return not is_internal_ip(ipaddress.ip_address(parsed.hostname))
+    except ValueError:
+        pass
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(parsed.hostname,parsed.port or {"http":80,"https":443}[parsed.scheme],type=socket.SOCK_STREAM)
+    except (OSError,ValueError):
+        return False
+    addresses = {info[4][0].split("%")[0] for info in infos}
+    return bool(addresses) and not any(is_internal_ip(ipaddress.ip_address(a)) for a in addresses)
+
+
 def valid_base_url(url:HttpUrl)->str:
     parsed = urlparse(str(url))
 
@@ -19,12 +50,13 @@ def valid_base_url(url:HttpUrl)->str:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Invalid hostname")
     try:
         ip = ipaddress.ip_address(hostname)
-        if ip.is_private or ip.is_loopback or ip.is_reserved:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Private or Internal ips are not allowed")
     except ValueError:
-        pass
+        ip = None
+    if ip is not None and is_internal_ip(ip):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,detail="Private or Internal ips are not allowed")
     base_url=f"{parsed.scheme}://{hostname}"
-    if parsed.port:
+    # https://x.com:443 and https://x.com are the same company
+    if parsed.port and parsed.port!={"http":80,"https":443}[parsed.scheme]:
         base_url+=f":{parsed.port}"
     return base_url
 
@@ -0,0 +1,186 @@
+# app/workers/prep_worker.py
+"""
+Prep job worker.
+
+    python -m app.workers.prep_worker [--processes N]
+
+Each process runs PREP_WORKER_CONCURRENCY jobs at a time with its own browser pool,
+HTTP client and Gemini limiter. SIGTERM / SIGINT stop claiming new jobs and let the
+running ones finish; anything cut off is re-delivered after its lease expires.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+from typing import Any, Dict
+
+from fastapi import HTTPException, status
+from prometheus_client import start_http_server
+
+from app.core.browser_pool import browser_pool
+from app.core.config import settings
+from app.core.http_client import close_http_client
+from app.db.credit_db import PrepCredit
+from app.db.prep_db import InvalidDataException
+from app.db.sessions import SessionLocal
+from app.services.interview_prep_service import InterviewPrep
+from app.services.job_queue import JobQueue, LeaseLost, get_job_queue
+
+
+class JobCredit(PrepCredit):
+    """
+    A queued prep's credit lives on its job row: held once per job and reused by re-deliveries.
+    A failed attempt leaves it there; queue.fail gives it back once the job fails for good, and
+    after a lost lease it belongs to whichever worker has the job now.
+    """
+
+    def __init__(self, queue: JobQueue, job_id: str, slot_id: str):
+        self.queue = queue
+        self.job_id = job_id
+        self.slot_id = slot_id
+
+    def reserve(self, db) -> None:
+        if not self.queue.hold_credit(self.job_id, self.slot_id):
+            raise HTTPException(status_code=status.HTTP_402_PAYMENT_REQUIRED, detail="You have run out of credits")
+
+    def release(self, db) -> None:
+        self.queue.release_credit(self.job_id, self.slot_id)
+
+    def failed(self, db) -> None:
+        pass
+
+
+class PrepWorker:
+    def __init__(self, queue: JobQueue, concurrency: int, poll_sec: float):
+        self.queue = queue
+        self.concurrency = concurrency
+        self.poll_sec = poll_sec
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = asyncio.Event()
+
+    async def run(self) -> None:
+        print(f"[INFO] Prep worker {self.worker_id} started, concurrency {self.concurrency}")
+        await asyncio.gather(*(self._slot(f"{self.worker_id}/{i}") for i in range(self.concurrency)))
+        print(f"[INFO] Prep worker {self.worker_id} stopped")
+
+    async def _slot(self, slot_id: str) -> None:
+        # Leases are per slot: a job re-delivered to another slot of this process isn't still "ours" here
+        while not self.stopping.is_set():
+            try:
+                job = await asyncio.to_thread(self.queue.claim, slot_id)
+            except Exception as e:
+                print(f"[ERROR] Failed to claim prep job: {e}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self.stopping.wait(), timeout=self.poll_sec)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job, slot_id)
+
+    async def _heartbeat(self, job_id: str, slot_id: str, run: asyncio.Task) -> bool:
+        """Extends the lease while `run` works; cancels it and returns True once the lease is lost."""
+        interval = max(settings.PREP_JOB_VISIBILITY_TIMEOUT_SEC / 3, 1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                extended = await asyncio.to_thread(self.queue.extend, job_id, slot_id)
+            except Exception as e:
+                # Try again next beat; the lease is only gone once extend says so
+                print(f"[WARN] Failed to extend the lease on prep job {job_id}: {e}")
+                continue
+            if not extended:
+                print(f"[WARN] Lost the lease on prep job {job_id}, stopping it")
+                run.cancel()
+                return True
+
+    async def _run(self, job: Dict[str, Any], slot_id: str) -> None:
+        job_id = job["job_id"]
+        payload = job["payload"]
+        db = SessionLocal()
+        run = asyncio.create_task(InterviewPrep.run_prep(
+            payload["resume"], payload["url"], payload["job_desc"], {"sub": job["user_id"]}, db,
+            JobCredit(self.queue, job_id, slot_id),
+        ))
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, slot_id, run))
+        try:
+            prep_id, _ = await run
+            await asyncio.to_thread(self.queue.complete, job_id, slot_id, prep_id)
+            print(f"[INFO] Prep job {job_id} done (prep {prep_id}, attempt {job['attempts']})")
+        except (asyncio.CancelledError, LeaseLost) as e:
+            if isinstance(e, asyncio.CancelledError) and not (heartbeat.done() and heartbeat.result()):
+                raise
+            # Re-delivered: the job, and the credit it holds, belong to the next worker now
+            print(f"[WARN] Prep job {job_id} abandoned after losing its lease")
+        except HTTPException as e:
+            # 4xx (ToS denied, no credits, ...) won't change on retry; 5xx (Gemini timeout) might
+            await asyncio.to_thread(
+                self.queue.fail, job_id, slot_id, str(e.detail), e.status_code, e.status_code >= 500
+            )
+            print(f"[WARN] Prep job {job_id} failed with {e.status_code}: {e.detail}")
+        except InvalidDataException:
+            await asyncio.to_thread(
+                self.queue.fail, job_id, slot_id,
+                "AI service returned an invalid prep", status.HTTP_502_BAD_GATEWAY, True,
+            )
+            print(f"[WARN] Prep job {job_id} got an invalid AI result")
+        except Exception as e:
+            await asyncio.to_thread(
+                self.queue.fail, job_id, slot_id,
+                "Internal server error", status.HTTP_500_INTERNAL_SERVER_ERROR, True,
+            )
+            print(f"[ERROR] Prep job {job_id} failed: {e}")
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+            db.close()
+
+
+async def _serve() -> None:
+    worker = PrepWorker(get_job_queue(), settings.PREP_WORKER_CONCURRENCY, settings.PREP_WORKER_POLL_SEC)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stopping.set)
+    try:
+        await browser_pool.start()
+    except Exception as e:
+        print(f"[WARN] Browser pool failed to start, will retry on first use: {e}")
+    try:
+        await worker.run()
+    finally:
+        await browser_pool.stop()
+        await close_http_client()
+
+
+def _process_main(index: int = 0) -> None:
+    if settings.PREP_WORKER_METRICS_PORT:
+        port = settings.PREP_WORKER_METRICS_PORT + index
+        start_http_server(port)
+        print(f"[INFO] Prep worker metrics on :{port}/metrics")
+    asyncio.run(_serve())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--processes", type=int, default=settings.PREP_WORKER_PROCESSES)
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        _process_main()
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    processes = [ctx.Process(target=_process_main, args=(i,), name=f"prep-worker-{i}") for i in range(args.processes)]
+    for p in processes:
+        p.start()
+    # Children get SIGINT from the terminal themselves; pass on SIGTERM
+    signal.signal(signal.SIGTERM, lambda *_: [p.terminate() for p in processes if p.is_alive()])
+    for p in processes:
+        p.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Measure cross-page boilerplate removal on stored company pages.
+
+Input is a JSON file with a list of companies, each a list of pages in scrape order
+(homepage first), using either scraper keys or CompanyPages columns:
+
+    [[{"url": "...", "text": "..."}, ...], [{"page_url": "...", "page_content": "..."}, ...]]
+
+    python -m benchmarks.bench_boilerplate companies.json
+
+Reports stored characters, estimated prompt tokens (chars / 4) and how many pages fit under
+MAX_TOTAL_CHARS, without and with BoilerplateFilter, applying the same per-page truncation
+as the scrapers.
+"""
+import argparse
+import json
+
+from app.services.context_selector import estimate_tokens
+from app.services.scrape_service import MAX_CHARS_PER_PAGE, MAX_TOTAL_CHARS
+from app.utils.boilerplate import BoilerplateFilter
+
+
+def _budgeted(texts):
+    """Pages the crawler would keep before the MAX_TOTAL_CHARS budget runs out."""
+    kept, total = [], 0
+    for text in texts:
+        if total >= MAX_TOTAL_CHARS:
+            break
+        text = text[:MAX_CHARS_PER_PAGE]
+        if not text:
+            continue
+        kept.append(text)
+        total += len(text)
+    return kept
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("companies", help="JSON file with a list of page lists")
+    args = parser.parse_args()
+
+    with open(args.companies, encoding="utf-8") as f:
+        companies = json.load(f)
+
+    totals = {"before_chars": 0, "after_chars": 0, "before_pages": 0, "after_pages": 0}
+    print(f"{'#':>3} {'pages':>5} {'chars before':>12} {'chars after':>12} {'saved':>7} {'fit before':>10} {'fit after':>9}")
+    for i, pages in enumerate(companies):
+        texts = [p.get("text") or p.get("page_content") or "" for p in pages]
+        before = _budgeted(texts)
+        boilerplate = BoilerplateFilter(enabled=True)
+        after = _budgeted(boilerplate.strip(t) for t in texts)
+
+        before_chars = sum(len(t) for t in before)
+        after_chars = sum(len(t) for t in after)
+        totals["before_chars"] += before_chars
+        totals["after_chars"] += after_chars
+        totals["before_pages"] += len(before)
+        totals["after_pages"] += len(after)
+        saved = 1 - after_chars / before_chars if before_chars else 0.0
+        print(f"{i:>3} {len(texts):>5} {before_chars:>12} {after_chars:>12} {saved:>6.1%} {len(before):>10} {len(after):>9}")
+
+    if companies:
+        n = len(companies)
+        print(f"\navg stored chars/company: {totals['before_chars'] / n:.0f} -> {totals['after_chars'] / n:.0f}")
+        print(f"avg prompt tokens/company: {estimate_tokens('x' * (totals['before_chars'] // n))} -> "
+              f"{estimate_tokens('x' * (totals['after_chars'] // n))}")
+        print(f"avg pages under MAX_TOTAL_CHARS: {totals['before_pages'] / n:.1f} -> {totals['after_pages'] / n:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Report prompt tokens saved by relevance-ranked company context.
+
+Input is a JSON file with a list of preps:
+
+    [{"job_description": "...", "resume": "...",
+      "company_data": [{"page_title": "...", "page_url": "...", "page_content": "..."}]}]
+
+(company_data as built by company_page_to_dict; dump it from company_pages for real companies).
+
+    python -m benchmarks.bench_context_selection preps.json [--budget 8000]
+
+Tokens are estimated the same way the selector budgets them (chars / 4) over the
+full json.dumps(prep_data) payload, i.e. what actually goes to Gemini.
+"""
+import argparse
+import json
+import time
+
+from app.services.context_selector import estimate_tokens, select_company_context
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("preps", help="JSON file with a list of preps")
+    parser.add_argument("--budget", type=int, default=None, help="override PREP_CONTEXT_TOKEN_BUDGET")
+    args = parser.parse_args()
+
+    with open(args.preps, encoding="utf-8") as f:
+        preps = json.load(f)
+
+    total_before = total_after = 0
+    print(f"{'#':>3} {'before':>9} {'after':>9} {'saved':>7} {'ms':>7}")
+    for i, prep in enumerate(preps):
+        full = {"resume": prep["resume"], "company_data": prep["company_data"], "job_description": prep["job_description"]}
+        started = time.perf_counter()
+        selected, _ = select_company_context(prep["company_data"], prep["job_description"], prep["resume"], args.budget)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        trimmed = {**full, "company_data": selected}
+
+        before = estimate_tokens(json.dumps(full, ensure_ascii=False))
+        after = estimate_tokens(json.dumps(trimmed, ensure_ascii=False))
+        total_before += before
+        total_after += after
+        print(f"{i:>3} {before:>9} {after:>9} {1 - after / before:>6.1%} {elapsed_ms:>7.1f}")
+
+    if preps:
+        n = len(preps)
+        print(f"\navg tokens/prep: {total_before / n:.0f} -> {total_after / n:.0f} "
+              f"({(total_before - total_after) / n:.0f} saved, {1 - total_after / total_before:.1%})")
+
+
+if __name__ == "__main__":
+    main()
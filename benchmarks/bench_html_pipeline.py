@@ -0,0 +1,113 @@
+"""
+Benchmark the HTML pipeline backends on a saved corpus.
+
+Save some homepages / internal pages as .html files into a folder, then:
+
+    python -m benchmarks.bench_html_pipeline path/to/corpus [--repeat 5]
+
+For every available backend it reports pages/sec and peak RSS for one full parse_document()
+pass over the corpus, plus the old approach of parsing the homepage twice with
+BeautifulSoup + html.parser for comparison.
+
+lxml and selectolax allocate in C, which tracemalloc can't see, so each run happens in its
+own subprocess and reports its resident set size: the peak (ru_maxrss) and the growth over
+the RSS it had after imports and loading the corpus.
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from bs4 import BeautifulSoup
+
+from app.utils.html_pipeline import BACKENDS, parse_document
+
+LEGACY = "legacy-bs4x2"
+
+
+def load_corpus(folder: str) -> List[Tuple[str, str]]:
+    docs = []
+    for path in sorted(Path(folder).glob("**/*.htm*")):
+        docs.append((f"https://{path.stem}.example/", path.read_text(encoding="utf-8", errors="replace")))
+    return docs
+
+
+def legacy_double_parse(html: str, base_url: str) -> None:
+    # What beautiful_scrape used to do per homepage: favicon parse + main parse
+    BeautifulSoup(html, "html.parser").find_all("link", href=True)
+    soup = BeautifulSoup(html, "html.parser")
+    soup.find("title")
+    for tag in soup(["script", "style", "noscript"]):
+        tag.extract()
+    soup.get_text()
+    soup.find_all("a", href=True)
+
+
+def _current_rss_kib() -> int:
+    # Linux; ru_maxrss is already in KiB there
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() // 1024
+
+
+def run(fn: Callable[[str, str], object], docs: List[Tuple[str, str]], repeat: int) -> Dict[str, float]:
+    base_rss = _current_rss_kib()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for base_url, html in docs:
+            fn(html, base_url)
+    elapsed = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "pages_per_sec": len(docs) * repeat / elapsed,
+        "peak_rss_mib": peak_rss / 1024,
+        "growth_mib": max(peak_rss - base_rss, 0) / 1024,
+    }
+
+
+def _child(name: str, corpus: str, repeat: int) -> None:
+    docs = load_corpus(corpus)
+    if name == LEGACY:
+        fn = legacy_double_parse
+    else:
+        fn = lambda html, url: parse_document(html, url, backend=name)
+    # Warm up imports / lazy tables outside the measured pass
+    fn(*reversed(docs[0]))
+    print(json.dumps(run(fn, docs, repeat)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("corpus", help="folder of saved .html pages")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(args.child, args.corpus, args.repeat)
+        return
+
+    docs = load_corpus(args.corpus)
+    if not docs:
+        raise SystemExit(f"No .html files found in {args.corpus}")
+    print(f"{len(docs)} documents, {args.repeat} passes, one subprocess per backend\n")
+    print(f"{'backend':<14} {'pages/s':>10} {'peak RSS':>12} {'RSS growth':>12}")
+
+    for name in [LEGACY, *BACKENDS]:
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_html_pipeline", args.corpus,
+             "--repeat", str(args.repeat), "--child", name],
+            capture_output=True, text=True,
+        )
+        if out.returncode != 0:
+            print(f"{name:<14} failed: {out.stderr.strip().splitlines()[-1:]}")
+            continue
+        r = json.loads(out.stdout.strip().splitlines()[-1])
+        print(f"{name:<14} {r['pages_per_sec']:>10.1f} {r['peak_rss_mib']:>8.1f} MiB {r['growth_mib']:>8.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Side-by-side comparison of full and lightweight Playwright page loads.
+
+    python -m benchmarks.bench_page_render urls.txt [--repeat 2]
+
+urls.txt has one URL per line. Every URL is loaded in both modes in the same process, in a
+fresh context each time (alternating the order), the way playwright_scrape loads a homepage.
+Reports per mode: ms per page, bytes transferred per page (request.sizes()), requests blocked,
+and body text length; plus how much of the full-mode text the lightweight load still has
+(share of full-mode words also present in lightweight mode). PLAYWRIGHT_LIGHTWEIGHT_MODE
+should only be turned on when that share stays close to 100% for the sites we scrape.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+from playwright.async_api import async_playwright
+
+from app.core.config import settings
+from app.services.page_render import PageLoadTracker, prepare_context, render_stats, wait_for_content
+from app.utils.html_pipeline import normalise_whitespace
+
+MODES = ("full", "lightweight")
+
+
+async def load(browser, url: str, mode: str) -> Dict[str, object]:
+    # prepare_context / wait_for_content read the setting; the tracker is told the mode explicitly
+    settings.PLAYWRIGHT_LIGHTWEIGHT_MODE = mode == "lightweight"
+    blocked_before = render_stats.totals().get(mode, {}).get("blocked", 0)
+    context = await browser.new_context(viewport={"width": 1280, "height": 800}, locale="en-US")
+    try:
+        await prepare_context(context)
+        page = await context.new_page()
+        tracker = PageLoadTracker(page, mode)
+        start = time.perf_counter()
+        if mode == "lightweight":
+            await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+        else:
+            await page.goto(url, timeout=30000)
+            await page.wait_for_load_state("networkidle")
+        await page.wait_for_selector("body", timeout=5000)
+        await wait_for_content(page, fallback_ms=1200)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        text = normalise_whitespace(await page.evaluate("document.body.innerText"))
+        await tracker.finish()
+    finally:
+        await context.close()
+    return {
+        "ms": elapsed_ms,
+        "bytes": tracker.bytes_received,
+        "blocked": render_stats.totals().get(mode, {}).get("blocked", 0) - blocked_before,
+        "text": text,
+    }
+
+
+def _coverage(full_text: str, light_text: str) -> float:
+    full_words = set(full_text.lower().split())
+    if not full_words:
+        return 1.0
+    return len(full_words & set(light_text.lower().split())) / len(full_words)
+
+
+async def run(urls: List[str], repeat: int) -> None:
+    rows: Dict[str, Dict[str, List[float]]] = {m: {"ms": [], "bytes": [], "blocked": [], "chars": []} for m in MODES}
+    coverage: List[float] = []
+    async with async_playwright() as pw:
+        browser = await pw.chromium.launch(headless=True)
+        try:
+            for i in range(repeat):
+                for url in urls:
+                    order = MODES if i % 2 == 0 else tuple(reversed(MODES))
+                    texts = {}
+                    for mode in order:
+                        try:
+                            r = await load(browser, url, mode)
+                        except Exception as e:
+                            print(f"[WARN] {mode} load of {url} failed: {e}")
+                            break
+                        rows[mode]["ms"].append(r["ms"])
+                        rows[mode]["bytes"].append(r["bytes"])
+                        rows[mode]["blocked"].append(r["blocked"])
+                        rows[mode]["chars"].append(len(r["text"]))
+                        texts[mode] = r["text"]
+                    if len(texts) == len(MODES):
+                        coverage.append(_coverage(texts["full"], texts["lightweight"]))
+        finally:
+            await browser.close()
+
+    print(f"{len(urls)} URLs x {repeat}\n")
+    print(f"{'mode':<12} {'ms/page p50':>12} {'KiB/page':>10} {'blocked/page':>13} {'text chars':>11}")
+    for mode in MODES:
+        r = rows[mode]
+        if not r["ms"]:
+            continue
+        print(f"{mode:<12} {statistics.median(r['ms']):>12.0f} {statistics.mean(r['bytes']) / 1024:>10.1f} "
+              f"{statistics.mean(r['blocked']):>13.1f} {statistics.mean(r['chars']):>11.0f}")
+    if coverage:
+        print(f"\nfull-mode words kept by lightweight: mean {statistics.mean(coverage):.1%}, worst {min(coverage):.1%}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("urls", help="file with one URL per line")
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args()
+    with open(args.urls) as f:
+        urls = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    asyncio.run(run(urls, args.repeat))
+
+
+if __name__ == "__main__":
+    main()